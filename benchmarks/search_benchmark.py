@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Search index latency benchmark: builds a synthetic catalog of applications
+in many qubes and measures how long queries take while typing, with and
+without fuzzy matching.
+
+Run from the repository root:
+    python3 benchmarks/search_benchmark.py --entries 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from qubes_menu.search_index import SearchIndex
+
+APP_NAMES = [
+    "firefox",
+    "thunderbird",
+    "xterm",
+    "terminal",
+    "files",
+    "libreoffice writer",
+    "libreoffice calc",
+    "text editor",
+    "settings",
+    "keepassxc",
+    "gimp",
+    "inkscape",
+    "evince document viewer",
+    "vlc media player",
+    "chromium web browser",
+    "signal desktop",
+    "qube manager",
+    "software updater",
+    "calculator",
+    "disk usage analyzer",
+]
+QUBE_WORDS = ["work", "personal", "vault", "sys", "net", "usb", "dev", "web"]
+KEYWORDS = ["internet", "mail", "office", "shell", "browser", "editor", "media"]
+
+# queries typed by the user; every prefix of each one is measured, as that is
+# what searching does while typing
+QUERIES = [
+    "firefox",
+    "firfox",
+    "thundrbird",
+    "work term",
+    "libre calc",
+    "setings",
+    "vault keepass",
+    "xyzzy",
+]
+
+
+def generate_catalog(entries: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Synthetic catalog: entry name -> search words."""
+    rng = random.Random(seed)
+    catalog = {}
+    qubes = max(1, entries // len(APP_NAMES))
+    for i in range(entries):
+        app_name = APP_NAMES[i % len(APP_NAMES)]
+        qube_name = f"{rng.choice(QUBE_WORDS)}-{i // len(APP_NAMES) % qubes}"
+        words = qube_name.split("-") + app_name.split()
+        words.extend(rng.sample(KEYWORDS, 2))
+        catalog[f"{qube_name}: {app_name} {i}"] = words
+    return catalog
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def measure(index: SearchIndex, repeat: int) -> List[float]:
+    """Time every keystroke of every query; returns latencies in seconds."""
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            for length in range(1, len(query) + 1):
+                search_words = query[:length].split()
+                start = time.perf_counter()
+                index.search(search_words)
+                latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-p99",
+        type=float,
+        default=None,
+        help="fail if p99 latency with fuzzy matching exceeds this many ms",
+    )
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.entries)
+    start = time.perf_counter()
+    index = SearchIndex()
+    for key, words in catalog.items():
+        index.add(key, words)
+    build_time = time.perf_counter() - start
+    print(f"catalog: {args.entries} entries, index built in {build_time:.3f}s")
+
+    p99 = 0.0
+    for fuzzy in (False, True):
+        index.fuzzy = fuzzy
+        latencies = measure(index, args.repeat)
+        p99 = percentile(latencies, 0.99) * 1000
+        print(
+            f"fuzzy={fuzzy!s:5} queries={len(latencies)} "
+            f"p50={percentile(latencies, 0.50) * 1000:.3f}ms "
+            f"p95={percentile(latencies, 0.95) * 1000:.3f}ms "
+            f"p99={p99:.3f}ms"
+        )
+
+    if args.max_p99 is not None and p99 > args.max_p99:
+        print(f"p99 latency above {args.max_p99}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Search page latency and ranking benchmark: generates .desktop files of
+a synthetic catalog of applications in many qubes, replays recorded typing
+in the Search page and checks that best results of some searches are the
+expected ones (see search_golden.json).
+
+Requires a display and qubesadmin with its test mocks. Run from the
+repository root:
+    xvfb-run python3 benchmarks/search_page_benchmark.py --entries 1000 10000
+"""
+import argparse
+import fnmatch
+import importlib.resources
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from qubesadmin.tests.mock_app import (
+    MockQubesComplete,
+    MockDispatcher,
+    MockQube,
+)
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+
+from qubes_menu.desktop_file_manager import DesktopFileManager
+from qubes_menu.search_page import SearchPage
+from qubes_menu.vm_manager import VMManager
+
+from search_benchmark import percentile
+
+GOLDEN_PATH = Path(__file__).parent / "search_golden.json"
+# seconds to wait for results of a single search before giving up
+SEARCH_TIMEOUT = 5
+
+# name, generic name, comment, categories, keywords, app id (the argument of
+# qubes.StartApp) and icon of applications available in every qube
+VM_APPS = [
+    (
+        "Firefox",
+        "Web Browser",
+        "Browse the World Wide Web",
+        "Network;WebBrowser",
+        "internet;www;web",
+        "firefox",
+        "firefox",
+    ),
+    (
+        "Thunderbird",
+        "Mail Client",
+        "Send and receive mail",
+        "Network;Email",
+        "email;mail;calendar",
+        "mozilla-thunderbird",
+        "thunderbird",
+    ),
+    (
+        "Terminal",
+        "Terminal",
+        "Use the command line",
+        "GNOME;GTK;System;TerminalEmulator",
+        "shell;prompt;command;commandline",
+        "org.gnome.Terminal",
+        "org.gnome.Terminal",
+    ),
+    (
+        "XTerm",
+        "Terminal",
+        "standard terminal emulator for the X window system",
+        "System;TerminalEmulator",
+        "shell;prompt;command;commandline",
+        "xterm",
+        "xterm-color",
+    ),
+    (
+        "Files",
+        "File Manager",
+        "Access and organize files",
+        "GNOME;GTK;Utility;Core;FileManager",
+        "folder;manager;explore;disk;filesystem",
+        "org.gnome.Nautilus",
+        "org.gnome.Nautilus",
+    ),
+    (
+        "Text Editor",
+        "Text Editor",
+        "Edit text files",
+        "GNOME;GTK;Utility;TextEditor",
+        "text;editor;plaintext;write",
+        "org.gnome.TextEditor",
+        "org.gnome.TextEditor",
+    ),
+    (
+        "LibreOffice Writer",
+        "Word Processor",
+        "Create and edit text and graphics in letters and reports",
+        "Office;WordProcessor",
+        "text;letter;document;doc;docx;odt",
+        "libreoffice-writer",
+        "libreoffice-writer",
+    ),
+    (
+        "LibreOffice Calc",
+        "Spreadsheet",
+        "Perform calculations, analyze information and manage lists",
+        "Office;Spreadsheet",
+        "accounting;stats;xls;xlsx;ods",
+        "libreoffice-calc",
+        "libreoffice-calc",
+    ),
+    (
+        "LibreOffice Impress",
+        "Presentation",
+        "Create and edit presentations for slideshows",
+        "Office;Presentation",
+        "slideshow;slides;ppt;pptx;odp",
+        "libreoffice-impress",
+        "libreoffice-impress",
+    ),
+    (
+        "KeePassXC",
+        "Password Manager",
+        "Community-driven port of the Windows application KeePass",
+        "Utility;Security",
+        "password;passphrase;security",
+        "org.keepassxc.KeePassXC",
+        "keepassxc",
+    ),
+    (
+        "Document Viewer",
+        "Document Viewer",
+        "View multi-page documents",
+        "GNOME;GTK;Office;Viewer",
+        "pdf;ps;postscript;djvu",
+        "org.gnome.Evince",
+        "org.gnome.Evince",
+    ),
+    (
+        "Image Viewer",
+        "Image Viewer",
+        "Browse and rotate images",
+        "GNOME;GTK;Graphics;Viewer",
+        "picture;slideshow;graphics",
+        "org.gnome.eog",
+        "org.gnome.eog",
+    ),
+    (
+        "GNU Image Manipulation Program",
+        "Image Editor",
+        "Create images and edit photographs",
+        "Graphics;2DGraphics;RasterGraphics",
+        "gimp;draw;photo;retouch;paint",
+        "gimp",
+        "gimp",
+    ),
+    (
+        "Calculator",
+        "Calculator",
+        "Perform arithmetic, scientific or financial calculations",
+        "GNOME;GTK;Utility;Calculator",
+        "calculation;arithmetic;scientific;financial",
+        "org.gnome.Calculator",
+        "accessories-calculator",
+    ),
+    (
+        "Videos",
+        "Media Player",
+        "Play movies",
+        "GTK;GNOME;AudioVideo;Player;Video",
+        "video;movie;film;clip;dvd",
+        "org.gnome.Totem",
+        "org.gnome.Totem",
+    ),
+    (
+        "Disk Usage Analyzer",
+        "Disk Usage Analyzer",
+        "Check folder sizes and available disk space",
+        "GTK;GNOME;System;Filesystem",
+        "storage;space;cleanup",
+        "org.gnome.baobab",
+        "org.gnome.baobab",
+    ),
+    (
+        "Software",
+        "Package Manager",
+        "Add, remove or update software on this computer",
+        "GNOME;GTK;System;PackageManager",
+        "updates;upgrade;sources;repositories;install",
+        "org.gnome.Software",
+        "org.gnome.Software",
+    ),
+    (
+        "Settings",
+        "Settings",
+        "Change system settings",
+        "GNOME;GTK;Settings",
+        "preferences;configuration",
+        "org.gnome.Settings",
+        "org.gnome.Settings",
+    ),
+    (
+        "Signal",
+        "Messenger",
+        "Private messaging from your desktop",
+        "Network;InstantMessaging;Chat",
+        "chat;messenger;sms",
+        "signal-desktop",
+        "signal-desktop",
+    ),
+    (
+        "VLC media player",
+        "Media player",
+        "Read, capture, broadcast your multimedia streams",
+        "AudioVideo;Player;Recorder",
+        "player;capture;dvd;audio;video;playlist",
+        "vlc",
+        "vlc",
+    ),
+]
+
+# name, comment, categories and command of applications in dom0
+DOM0_APPS = [
+    (
+        "Qube Manager",
+        "Manage qubes",
+        "System;Qubes",
+        "qubes-qube-manager",
+    ),
+    (
+        "Qubes Global Config",
+        "Configure global Qubes OS settings",
+        "System;Qubes;Settings",
+        "qubes-global-config",
+    ),
+    (
+        "Backup Qubes",
+        "Back up qubes",
+        "System;Qubes",
+        "qubes-backup",
+    ),
+    (
+        "Xfce Terminal",
+        "Terminal Emulator",
+        "GTK;System;TerminalEmulator",
+        "xfce4-terminal",
+    ),
+    (
+        "Appearance",
+        "Customize the look of your desktop",
+        "Settings;DesktopSettings",
+        "xfce4-appearance-settings",
+    ),
+]
+
+# qubes of a default installation; more qubes are added for large catalogs
+BASE_QUBES = [
+    "sys-net",
+    "sys-firewall",
+    "sys-usb",
+    "sys-whonix",
+    "personal",
+    "work",
+    "untrusted",
+    "vault",
+    "work-gpg",
+    "anon-whonix",
+    "default-dvm",
+    "fedora-41",
+    "debian-12",
+]
+EXTRA_QUBE_PREFIXES = ["proj", "client", "build", "lab"]
+
+# typing recorded from real use; "\b" is backspace
+RECORDED_TYPING = [
+    "firefox",
+    "work firefox",
+    "fire w",
+    "net term",
+    "term dom0",
+    "sys-net term",
+    "perso sonal",
+    "thunderbrid\b\b\bird",
+    "libre calc",
+    "gnome-terminal",
+    "browser",
+    "vault keepass",
+    "settings\b\b\b\b\b\b\b\b",
+    "xyzzy",
+]
+
+
+def get_qube_names(count: int) -> List[str]:
+    """Names of count qubes: default qubes first, then generated ones."""
+    names = BASE_QUBES[:count]
+    i = 0
+    while len(names) < count:
+        names.append(
+            f"{EXTRA_QUBE_PREFIXES[i % len(EXTRA_QUBE_PREFIXES)]}{i}"
+        )
+        i += 1
+    return names
+
+
+def generate_desktop_files(
+    directory: Path, entries: int, seed: int = 0
+) -> List[str]:
+    """Write about entries .desktop files, as generated by Qubes for apps in
+    qubes, plus some dom0 applications. Returns names of generated qubes."""
+    rng = random.Random(seed)
+    qube_names = get_qube_names(
+        max(1, (entries - len(DOM0_APPS)) // len(VM_APPS))
+    )
+    for qube in qube_names:
+        for app in VM_APPS:
+            name, generic, comment, categories, keywords, app_id, icon = app
+            # not all qubes have all apps installed
+            if qube not in BASE_QUBES and rng.random() < 0.05:
+                continue
+            file_name = f"org.qubes-os.vm._{qube}.{app_id}.desktop"
+            (directory / file_name).write_text(
+                "[Desktop Entry]\n"
+                "Version=1.0\n"
+                "Type=Application\n"
+                "Terminal=false\n"
+                f"X-Qubes-VmName={qube}\n"
+                f"Icon={icon}\n"
+                f"Name={qube}: {name}\n"
+                f"GenericName={qube}: {generic}\n"
+                f"Comment={comment}\n"
+                f"Categories={categories};X-Qubes-VM;\n"
+                f"Keywords={keywords};\n"
+                "Exec=qvm-run -q -a --service -- "
+                f"{qube} qubes.StartApp+{app_id}\n"
+                "X-Qubes-DispvmExec=qvm-run -q -a --service "
+                f"--dispvm={qube} -- qubes.StartApp+{app_id}\n",
+                encoding="utf-8",
+            )
+    for name, comment, categories, command in DOM0_APPS:
+        (directory / f"{command}.desktop").write_text(
+            "[Desktop Entry]\n"
+            "Version=1.0\n"
+            "Type=Application\n"
+            "Terminal=false\n"
+            f"Icon={command}\n"
+            f"Name={name}\n"
+            f"Comment={comment}\n"
+            f"Categories={categories};\n"
+            f"Exec={command}\n",
+            encoding="utf-8",
+        )
+    return qube_names
+
+
+def create_search_page(
+    directory: Path, qube_names: List[str]
+) -> Tuple[SearchPage, float]:
+    """Search page for a qubes system with the given qubes and desktop
+    files; also returns how long loading took, in seconds."""
+    qapp = MockQubesComplete()
+    for qube in qube_names:
+        qapp._qubes[qube] = MockQube(  # pylint: disable=protected-access
+            name=qube, qapp=qapp
+        )
+    qapp.update_vm_calls()
+    dispatcher = MockDispatcher(qapp)
+
+    builder = Gtk.Builder()
+    for glade_name in ["qubes-menu.glade", "qubes-menu-search-page.glade"]:
+        glade_path = importlib.resources.files("qubes_menu") / glade_name
+        with importlib.resources.as_file(glade_path) as path:
+            builder.add_from_file(str(path))
+
+    start = time.perf_counter()
+    vm_manager = VMManager(qapp, dispatcher)
+    with mock.patch.object(DesktopFileManager, "desktop_dirs", [directory]):
+        desktop_file_manager = DesktopFileManager(qapp)
+    search_page = SearchPage(vm_manager, builder, desktop_file_manager)
+    return search_page, time.perf_counter() - start
+
+
+def show_search(search_page: SearchPage, text: str):
+    """Do what typing text in the search entry does, and wait until results
+    are shown."""
+    search_page.search_entry.set_text(text)
+    # search-changed comes after a delay; do not wait for it
+    search_page._do_search()  # pylint: disable=protected-access
+    if text:
+        deadline = time.monotonic() + SEARCH_TIMEOUT
+        # pylint: disable=protected-access
+        while search_page._search_text != text:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Search results for {text!r} never arrived")
+            Gtk.main_iteration_do(False)
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def replay_typing(search_page: SearchPage, repeat: int) -> List[float]:
+    """Replay all recorded typing; returns latencies of every keystroke,
+    in seconds."""
+    latencies = []
+    for _ in range(repeat):
+        for typing in RECORDED_TYPING:
+            text = ""
+            for char in typing:
+                text = text[:-1] if char == "\b" else text + char
+                start = time.perf_counter()
+                show_search(search_page, text)
+                latencies.append(time.perf_counter() - start)
+            show_search(search_page, "")
+    return latencies
+
+
+def check_golden(search_page: SearchPage, golden: Dict[str, List[str]]):
+    """Compare best results of searches with expected ones; returns a list
+    of differences."""
+    failures = []
+    for query, expected in golden.items():
+        show_search(search_page, query)
+        # pylint: disable=protected-access
+        found = [
+            f"{app_info.vm_name}: {app_info.app_name}"
+            for app_info in search_page._shown_results[: len(expected)]
+        ]
+        if len(found) != len(expected) or not all(
+            fnmatch.fnmatchcase(result, pattern)
+            for result, pattern in zip(found, expected)
+        ):
+            failures.append(f"{query!r}: expected {expected}, found {found}")
+    show_search(search_page, "")
+    return failures
+
+
+def main():
+    """Run the benchmark for all catalog sizes and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--entries", type=int, nargs="+", default=[1000, 10000, 50000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-p99",
+        type=float,
+        default=None,
+        help="fail if p99 keystroke latency exceeds this many ms",
+    )
+    args = parser.parse_args()
+
+    with open(GOLDEN_PATH, encoding="utf-8") as file:
+        golden = json.load(file)
+
+    failed = False
+    for entries in args.entries:
+        with tempfile.TemporaryDirectory() as directory:
+            qube_names = generate_desktop_files(Path(directory), entries)
+            search_page, load_time = create_search_page(
+                Path(directory), qube_names
+            )
+            # pylint: disable=protected-access
+            search_page.search_entry.handler_block_by_func(
+                search_page._do_search
+            )
+            loaded = len(search_page.desktop_file_manager.app_entries)
+            latencies = replay_typing(search_page, args.repeat)
+            failures = check_golden(search_page, golden)
+
+        p99 = percentile(latencies, 0.99) * 1000
+        print(
+            f"entries={loaded} load={load_time:.2f}s "
+            f"keystrokes={len(latencies)} "
+            f"p50={percentile(latencies, 0.50) * 1000:.2f}ms "
+            f"p95={percentile(latencies, 0.95) * 1000:.2f}ms "
+            f"p99={p99:.2f}ms "
+            f"ranking={'ok' if not failures else 'FAILED'}"
+        )
+        for failure in failures:
+            print("    " + failure)
+        if failures:
+            failed = True
+        if args.max_p99 is not None and p99 > args.max_p99:
+            print(f"    p99 latency above {args.max_p99}ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+UI loading startup benchmark: time needed to load all menu glade files,
+CSS and menu icons, from the compiled resource bundle and from package
+files. Every measurement is done in a new process, as at menu start.
+
+Requires the bundle (make gresource) and, to compare icon loading, icons
+installed in the icon theme (make install-icons). Run from the repository
+root, with a display:
+    xvfb-run python3 benchmarks/startup_benchmark.py --repeat 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from search_benchmark import percentile
+
+GLADE_FILES = [
+    "qubes-menu.glade",
+    "qubes-menu-search-page.glade",
+    "qubes-menu-app-page.glade",
+    "qubes-menu-favorites-page.glade",
+    "qubes-menu-settings-page.glade",
+]
+CSS_FILES = ["qubes-menu-light.css", "qubes-menu-dark.css"]
+ICON_SIZE = 24
+
+MODES = ["resource", "files"]
+
+
+def load_ui() -> Dict[str, float]:
+    """Load all UI files and icons, as the menu does on start; returns
+    times of every step, in seconds."""
+    # pylint: disable=import-outside-toplevel
+    import gi
+
+    gi.require_version("Gtk", "3.0")
+    from gi.repository import Gtk, GLib
+
+    from qubes_menu.resources import register_resources, add_ui_file, load_css
+
+    times = {}
+    start = time.perf_counter()
+    register_resources()
+    times["register"] = time.perf_counter() - start
+
+    step_start = time.perf_counter()
+    builder = Gtk.Builder()
+    for glade_name in GLADE_FILES:
+        add_ui_file(builder, "qubes_menu", glade_name)
+    times["glade"] = time.perf_counter() - step_start
+
+    step_start = time.perf_counter()
+    for css_name in CSS_FILES:
+        load_css("qubes_menu", css_name)
+    times["css"] = time.perf_counter() - step_start
+
+    step_start = time.perf_counter()
+    icon_theme = Gtk.IconTheme.get_default()
+    icon_names = [
+        name[: -len(".svg")]
+        for name in os.listdir(os.path.join(ROOT, "icons"))
+        if name.startswith("qappmenu-")
+    ]
+    for icon_name in icon_names:
+        try:
+            icon_theme.load_icon(
+                icon_name, ICON_SIZE, Gtk.IconLookupFlags.FORCE_SIZE
+            )
+        except GLib.Error:
+            # not installed in the icon theme
+            pass
+    times["icons"] = time.perf_counter() - step_start
+
+    times["total"] = time.perf_counter() - start
+    return times
+
+
+def measure(mode: str, repeat: int) -> Dict[str, List[float]]:
+    """Load UI in new processes repeatedly; returns times of every step."""
+    env = dict(os.environ)
+    env.pop("QUBES_MENU_NO_GRESOURCE", None)
+    if mode == "files":
+        env["QUBES_MENU_NO_GRESOURCE"] = "1"
+    results: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env,
+            stdout=subprocess.PIPE,
+            check=True,
+        ).stdout
+        for step, value in json.loads(output).items():
+            results.setdefault(step, []).append(value)
+    return results
+
+
+def main():
+    """Measure both ways of loading UI and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(load_ui()))
+        return 0
+
+    if not os.path.exists(
+        os.path.join(ROOT, "qubes_menu", "qubes-menu.gresource")
+    ):
+        print("Resource bundle not found, run: make gresource", file=sys.stderr)
+        return 1
+
+    for mode in MODES:
+        results = measure(mode, args.repeat)
+        for step, values in results.items():
+            print(
+                f"{mode}: {step} "
+                f"p50={percentile(values, 0.50) * 1000:.1f}ms "
+                f"p95={percentile(values, 0.95) * 1000:.1f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Menu hotkey latency: time from starting the command bound to the menu
+hotkey until the menu window is visible, for the thin Gio client
+(qubes_menu.toggle_client) and for full Gtk.Application startup
+(qubes_menu.appmenu) passing the command line to the running menu.
+
+Requires a running menu and xdotool (used to check if the menu window is
+visible). Run from the repository root, in a graphical session:
+    python3 benchmarks/toggle_latency.py --repeat 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from search_benchmark import percentile
+
+CLIENTS = {
+    "thin": [sys.executable, "-m", "qubes_menu.toggle_client"],
+    "full": [sys.executable, "-m", "qubes_menu.appmenu"],
+}
+
+# how often to check if the window is visible, in seconds
+POLL_INTERVAL = 0.002
+# give up waiting for the window after this many seconds
+VISIBLE_TIMEOUT = 5
+
+
+def is_menu_visible(window_class: str) -> bool:
+    """Check if a visible window of the menu exists."""
+    return (
+        subprocess.run(
+            ["xdotool", "search", "--onlyvisible", "--classname", window_class],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        ).returncode
+        == 0
+    )
+
+
+def wait_for_visibility(
+    window_class: str, visible: bool, start: float
+) -> Optional[float]:
+    """Wait until the menu is (or is not) visible; returns time since
+    start, or None on timeout."""
+    while time.perf_counter() - start < VISIBLE_TIMEOUT:
+        if is_menu_visible(window_class) == visible:
+            return time.perf_counter() - start
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def hide_menu(window_class: str):
+    """Toggle the menu off, if it is visible."""
+    if is_menu_visible(window_class):
+        subprocess.run(CLIENTS["thin"], check=True)
+        hidden = wait_for_visibility(window_class, False, time.perf_counter())
+        if hidden is None:
+            raise RuntimeError("Menu cannot be hidden")
+
+
+def measure(
+    command: List[str], window_class: str, repeat: int
+) -> Tuple[List[float], List[float]]:
+    """Show the menu with a command repeatedly; returns times until the
+    command exits (the menu has handled it) and until the menu is visible,
+    in seconds."""
+    handled, visible = [], []
+    for _ in range(repeat):
+        hide_menu(window_class)
+        start = time.perf_counter()
+        subprocess.run(command, check=True)
+        handled.append(time.perf_counter() - start)
+        shown = wait_for_visibility(window_class, True, start)
+        if shown is None:
+            raise RuntimeError("Menu was not shown")
+        visible.append(shown)
+    hide_menu(window_class)
+    return handled, visible
+
+
+def _format(values: List[float]) -> str:
+    return (
+        f"p50={percentile(values, 0.50) * 1000:.1f}ms "
+        f"p95={percentile(values, 0.95) * 1000:.1f}ms "
+        f"max={max(values) * 1000:.1f}ms"
+    )
+
+
+def main():
+    """Measure all clients and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--clients", nargs="+", choices=list(CLIENTS), default=list(CLIENTS)
+    )
+    parser.add_argument(
+        "--window-class",
+        default="qubes-app-menu",
+        help="WM_CLASS name of the menu window",
+    )
+    args = parser.parse_args()
+
+    for client in args.clients:
+        handled, visible = measure(
+            CLIENTS[client], args.window_class, args.repeat
+        )
+        print(f"{client}: handled {_format(handled)}")
+        print(f"{client}: visible {_format(visible)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
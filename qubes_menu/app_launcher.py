@@ -0,0 +1,100 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+D-Bus interface of the running menu for starting apps without showing the
+menu, for example from keyboard shortcuts (see launch_client).
+"""
+from .dbus_service import DBusObject
+from .desktop_file_manager import ApplicationInfo
+from .constants import LAUNCHER_INTERFACE, LAUNCHER_PATH
+
+LAUNCHER_XML = f"""
+<node>
+  <interface name="{LAUNCHER_INTERFACE}">
+    <method name="LaunchApp">
+      <arg type="s" name="app_id" direction="in"/>
+      <arg type="s" name="qube" direction="in"/>
+    </method>
+  </interface>
+</node>
+"""
+
+
+class AppLauncher(DBusObject):
+    """
+    Starts apps, identified by .desktop file names, using already loaded
+    .desktop files. Started apps are recorded like apps started from the
+    menu (in recent apps and usage).
+    """
+
+    INTROSPECTION_XML = LAUNCHER_XML
+    OBJECT_PATH = LAUNCHER_PATH
+    METHODS = {"LaunchApp": ("launch_app", None)}
+
+    def __init__(self, app):
+        """
+        :param app: AppMenu; apps can be started once the menu is set up
+        """
+        super().__init__()
+        self.app = app
+
+    def launch_app(self, app_id: str, qube: str):
+        """
+        Start an app.
+        :param app_id: .desktop file name of the app
+        :param qube: name of the qube to start the app in; if empty, the
+        app's own qube is used
+        """
+        desktop_file_manager = self.app.desktop_file_manager
+        if not desktop_file_manager:
+            raise RuntimeError("Menu is not ready yet")
+        app_info = desktop_file_manager.get_app_info_by_name(app_id)
+        if not app_info:
+            raise ValueError(f"Unknown application: {app_id}")
+        vm = None
+        if qube:
+            try:
+                vm = self.app.qapp.domains[qube]
+            except KeyError as ex:
+                raise ValueError(f"Unknown qube: {qube}") from ex
+            self._check_qube(app_info, vm)
+        if not self.app.launch_app(app_info, vm):
+            raise ValueError(f"Cannot start {app_id} in qube {qube}")
+
+    @staticmethod
+    def _check_qube(app_info: ApplicationInfo, vm):
+        """Apps can be started only in their own qube or, like in the
+        menu, apps of a disposable template in its disposables."""
+        if not app_info.vm:
+            raise ValueError(
+                f"Cannot start {app_info.file_path.name} in a qube: "
+                "it is not a qube application"
+            )
+        if vm.name == app_info.vm.name:
+            return
+        if (
+            vm.klass == "DispVM"
+            and str(getattr(vm, "template", None)) == app_info.vm.name
+            and not app_info.disposable
+        ):
+            return
+        raise ValueError(
+            f"Cannot start {app_info.file_path.name} in qube {vm.name}"
+        )
@@ -24,8 +24,7 @@ A collection of custom Gtk widgets used elsewhere in the App Menu
 import subprocess
 import logging
 import urllib.parse
-from typing import Optional, List
-from functools import reduce
+from typing import Optional, List, Dict
 
 from .custom_widgets import (
     LimitedWidthLabel,
@@ -35,7 +34,12 @@ from .custom_widgets import (
 )
 from .desktop_file_manager import ApplicationInfo
 from .vm_manager import VMManager, VMEntry
-from .utils import load_icon, text_search, highlight_words, remove_from_feature
+from .utils import (
+    load_icon,
+    set_icon_async,
+    highlight_labels,
+    remove_from_feature,
+)
 from . import constants
 
 import gi
@@ -45,8 +49,6 @@ from gi.repository import Gtk, Gdk
 
 logger = logging.getLogger("qubes-appmenu")
 
-DISP_TEXT = "New disposable qube from "
-
 
 class AppEntry(Gtk.ListBoxRow):
     """
@@ -66,21 +68,44 @@ class AppEntry(Gtk.ListBoxRow):
         """
         super().__init__(**properties)
         self.app_info = app_info
-        self.app_info.entries.append(self)
-        self.vm_name = app_info.vm.name if app_info.vm else "dom0"
+        self.app_info.entries.add(self)
+        self.vm_name = app_info.vm_name
 
-        self.menu = SelfAwareMenu()
+        # right click menu and drag source are set up only when needed, as
+        # most rows are never clicked
+        self._menu: Optional[SelfAwareMenu] = None
 
         self.event_box = HoverEventBox(focus_widget=self)
         self.add(self.event_box)
         self.event_box.add_events(Gdk.EventMask.BUTTON_PRESS_MASK)
         self.event_box.connect("button-press-event", self.show_menu)
+        self._drag_handler_id: Optional[int] = self.event_box.connect(
+            "button-press-event", self._set_up_drag_source
+        )
 
+    @property
+    def menu(self) -> SelfAwareMenu:
+        """Right click menu, created on first use."""
+        if self._menu is None:
+            self._menu = self._create_menu()
+        return self._menu
+
+    def _create_menu(self) -> SelfAwareMenu:
+        """Create own right click menu."""
+        return SelfAwareMenu()
+
+    def _set_up_drag_source(self, *_args):
+        """Make the row draggable. Called on the first button press, before
+        the event reaches the row, so it can already start a drag."""
+        if self._drag_handler_id is not None:
+            self.event_box.disconnect(self._drag_handler_id)
+            self._drag_handler_id = None
         self.drag_source_set(
             Gdk.ModifierType.BUTTON1_MASK, [], Gdk.DragAction.COPY
         )
         self.drag_source_add_uri_targets()
         self.connect("drag-data-get", self._on_drag_data_get)
+        return False
 
     def _on_drag_data_get(self, _widget, _drag_context, data, _info, _time):
         data.set_uris(
@@ -128,7 +153,6 @@ class BaseAppEntry(AppEntry):
         self.box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
         self.event_box.add(self.box)
         self.get_style_context().add_class("app_entry")
-        self.menu = FavoritesMenu(lambda: self.app_info)
 
         self.icon = Gtk.Image()
         self.label = LimitedWidthLabel()
@@ -137,19 +161,23 @@ class BaseAppEntry(AppEntry):
 
         self.update_contents()
 
+    def _create_menu(self) -> SelfAwareMenu:
+        return FavoritesMenu(lambda: self.app_info)
+
     def show_menu(self, widget, event):
         """
         Show right click menu. For ephemeral VMs (class DispVM with a template
         set) the menu is inactive. If the current App is already added to
         favorites, the "add to favorites" option is checked and inactive.
         """
-        self.menu.set_menu_state()
+        if event.button == 3:
+            self.menu.set_menu_state()
         super().show_menu(widget, event)
 
     def update_contents(self):
         """Update icon and app name."""
-        self.icon.set_from_pixbuf(
-            load_icon(self.app_info.app_icon, Gtk.IconSize.LARGE_TOOLBAR)
+        set_icon_async(
+            self.icon, self.app_info.app_icon, Gtk.IconSize.LARGE_TOOLBAR
         )
         self.label.set_label(self.app_info.app_name)
         self.show_all()
@@ -162,7 +190,7 @@ class VMIcon(Gtk.Image):
         super().__init__()
         self.vm_entry = vm_entry
         if self.vm_entry:
-            self.vm_entry.entries.append(self)
+            self.vm_entry.entries.add(self)
         self.update_contents(update_label=True)
 
     def update_contents(
@@ -219,21 +247,15 @@ class AppEntryWithVM(AppEntry):
         self.grid.attach(self.app_label, 1, 0, 1, 1)
         self.grid.attach(box, 1, 1, 1, 1)
 
-        self.search_words: List[str] = []
-
         self.update_contents()
 
     def update_contents(self):
         """Update application and VM icons and application and vm names"""
-        app_icon = load_icon(self.app_info.app_icon, Gtk.IconSize.DIALOG)
-        self.app_icon.set_from_pixbuf(app_icon)
-
-        if self.app_info.disposable:
-            self.vm_label.set_text(DISP_TEXT + str(self.app_info.vm))
-        elif self.app_info.vm:
-            self.vm_label.set_text(str(self.app_info.vm))
-        else:
-            self.vm_label.set_text(str(self.app_info.qapp.local_name))
+        set_icon_async(
+            self.app_icon, self.app_info.app_icon, Gtk.IconSize.DIALOG
+        )
+
+        self.vm_label.set_text(self.app_info.vm_label)
         self.app_label.set_text(str(self.app_info.app_name))
 
         self.show_all()
@@ -247,14 +269,13 @@ class FavoritesAppEntry(AppEntryWithVM):
     feature.
     """
 
-    def __init__(
-        self, app_info: ApplicationInfo, vm_manager: VMManager, **properties
-    ):
-        super().__init__(app_info, vm_manager, **properties)
-        self.remove_item = Gtk.MenuItem(label="Remove from favorites")
-        self.remove_item.connect("activate", self._remove_from_favorites)
-        self.menu.add(self.remove_item)
-        self.menu.show_all()
+    def _create_menu(self) -> SelfAwareMenu:
+        menu = super()._create_menu()
+        remove_item = Gtk.MenuItem(label="Remove from favorites")
+        remove_item.connect("activate", self._remove_from_favorites)
+        menu.add(remove_item)
+        menu.show_all()
+        return menu
 
     def _remove_from_favorites(self, *_args, **_kwargs):
         """Remove from favorites, that is, from an appropriate VM
@@ -278,63 +299,31 @@ class SearchAppEntry(AppEntryWithVM):
     ):
 
         super().__init__(app_info, vm_manager, **properties)
-        self.menu = FavoritesMenu(lambda: self.app_info)
 
         self.last_search_words: Optional[List[str]] = None
-        self.last_search_result: int = 0
 
-        self.search_words = []
+    def _create_menu(self) -> SelfAwareMenu:
+        return FavoritesMenu(lambda: self.app_info)
 
-        # search uses partial matching in search words, those being:
-        # application name
-        # vm name
-        # disposable parent name if applicable
-        # "new disposable qube from" if applicable
-        # desktop file keywords if applicable
-
-        if self.app_info.vm:
-            self.search_words.extend(
-                self.app_info.vm.name.lower().replace("_", "-").split("-")
-            )
-        else:
-            self.search_words.append("dom0")
-
-        if self.app_info.disposable:
-            self.search_words.extend(DISP_TEXT.lower().split())
-
-        if self.app_info.app_name:
-            self.search_words.extend(
-                self.app_info.app_name.lower()
-                .replace("_", " ")
-                .replace("-", " ")
-                .split()
-            )
-
-        if self.app_info.keywords:
-            self.search_words.extend(k.lower() for k in self.app_info.keywords)
-
-    def find_text(self, search_words: List[str]):
-        """Check if provided search phrase is present in text.
-        Should return higher numbers for better match"""
-        # this is slightly processed to improve searching in split vm names
-        # (such as sys-net)
+    def update_contents(self):
+        """Update contents; any highlighting has to be done anew."""
+        super().update_contents()
+        self.app_label.set_attributes(None)
+        self.vm_label.set_attributes(None)
+        self.last_search_words = None
+
+    @property
+    def search_words(self) -> Dict[str, float]:
+        """Words this entry can be found by, with their weights; see
+        ApplicationInfo"""
+        return self.app_info.search_words
+
+    def highlight(self, search_words: List[str]):
+        """Highlight provided (parsed) search words in own labels."""
         if search_words == self.last_search_words:
-            return self.last_search_result
-
-        if search_words:
-            result = reduce(
-                lambda x, y: x * y,
-                [text_search(word, self.search_words) for word in search_words],
-            )
-        else:
-            result = 0
-
-        highlight_words([self.app_label, self.vm_label], search_words)
-
-        self.last_search_words = search_words
-        self.last_search_result = result
-
-        return result
+            return
+        if highlight_labels([self.app_label, self.vm_label], search_words):
+            self.last_search_words = search_words
 
     def show_menu(self, widget, event):
         """
@@ -342,5 +331,6 @@ class SearchAppEntry(AppEntryWithVM):
         set) the menu is inactive. If the current App is already added to
         favorites, the "add to favorites" option is checked and inactive.
         """
-        self.menu.set_menu_state()
+        if event.button == 3:
+            self.menu.set_menu_state()
         super().show_menu(widget, event)
@@ -23,7 +23,7 @@ Application page and related widgets and logic
 
 from typing import Optional
 
-from .desktop_file_manager import DesktopFileManager
+from .desktop_file_manager import ApplicationInfo, DesktopFileManager
 from .custom_widgets import (
     NetworkIndicator,
     VMRow,
@@ -33,12 +33,12 @@ from .custom_widgets import (
 from .app_widgets import AppEntry, BaseAppEntry
 from .vm_manager import VMEntry, VMManager
 from .page_handler import MenuPage
-from .utils import get_visible_child
+from .utils import get_visible_child, ListItem, update_list_store
 
 import gi
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, Gio
 
 
 class VMTypeToggle:
@@ -180,16 +180,16 @@ class AppPage(MenuPage):
         self.vm_right_pane.pack_start(self.network_indicator, False, False, 0)
         self.vm_right_pane.reorder_child(self.network_indicator, 0)
 
-        desktop_file_manager.register_callback(self._app_info_callback)
         self.toggle_buttons = VMTypeToggle(builder)
         self.toggle_buttons.connect_to_toggle(self._button_toggled)
 
-        self.app_list.set_filter_func(self._is_app_fitting)
+        # app list contains rows only for apps of the selected qube
+        self.app_model = Gio.ListStore.new(ListItem)
+        self.app_list.bind_model(self.app_model, self._create_app_row)
         self.app_list.connect("row-activated", self._app_clicked)
-        self.app_list.set_sort_func(
-            lambda x, y: x.app_info.sort_name > y.app_info.sort_name
-        )
-        self.app_list.invalidate_sort()
+
+        desktop_file_manager.register_callback(self._app_info_callback)
+        desktop_file_manager.register_remove_callback(self._app_info_callback)
 
         vm_manager.register_new_vm_callback(self._vm_callback)
         self.vm_list.set_sort_func(self._sort_vms)
@@ -222,9 +222,7 @@ class AppPage(MenuPage):
         # doesn't always fix it on the first try, but improves behavior in
         # case of unexpected focus chain changes, like pgup in some cases
         self.vm_list.select_row(self.vm_list.get_row_at_y(0))
-        self.app_list.set_filter_func(None)
-        self.app_list.invalidate_filter()
-        self.app_list.set_filter_func(self._is_app_fitting)
+        self._update_app_model()
 
         focus_child = get_visible_child(self.vm_list)
         focus_child.grab_focus()
@@ -271,13 +269,31 @@ class AppPage(MenuPage):
                 return True
         return False
 
-    def _app_info_callback(self, app_info):
+    def _app_info_callback(self, app_info: ApplicationInfo):
         """
-        Callback to be performed on all newly loaded ApplicationInfo instances.
+        Callback to be performed on all newly loaded and removed
+        ApplicationInfo instances.
         """
-        if app_info.vm:
-            entry = BaseAppEntry(app_info)
-            self.app_list.add(entry)
+        if self._is_app_fitting(app_info):
+            self._update_app_model()
+
+    @staticmethod
+    def _create_app_row(item: ListItem) -> BaseAppEntry:
+        """Create a row for an item of the app list model."""
+        return BaseAppEntry(item.value)
+
+    def _update_app_model(self):
+        """Show apps of the selected qube, sorted by name, in the app list.
+        Rows are created only for apps that were not shown before."""
+        apps = sorted(
+            (
+                app_info
+                for app_info in self.desktop_file_manager.get_app_infos()
+                if self._is_app_fitting(app_info)
+            ),
+            key=lambda app_info: app_info.sort_name,
+        )
+        update_list_store(self.app_model, apps)
 
     def _vm_callback(self, vm_entry: VMEntry):
         """
@@ -288,33 +304,28 @@ class AppPage(MenuPage):
                 vm_entry, show_dispvm_inheritance=not self.sort_running
             )
             vm_row.show_all()
-            vm_entry.entries.append(vm_row)
+            vm_entry.entries.add(vm_row)
             self.vm_list.add(vm_row)
             self.vm_list.invalidate_filter()
             self.vm_list.invalidate_sort()
 
-    def _is_app_fitting(self, appentry: BaseAppEntry):
+    def _is_app_fitting(self, app_info: ApplicationInfo):
         """
         Filter function for applications - attempts to filter only
         applications that have a VM same as selected VM, or, in the case
         of disposable VMs that are children of a parent DVM template,
-        show the DVM's menu entries.
+        show the DVM's menu entries. Applications from dom0 are never shown.
         """
-        if not self.selected_vm_entry:
+        if not self.selected_vm_entry or not app_info.vm:
             return False
-        if (
-            appentry.app_info.vm
-            and appentry.app_info.vm.name
-            != self.selected_vm_entry.vm_entry.vm_name
-        ):
+        if app_info.vm.name != self.selected_vm_entry.vm_entry.vm_name:
             return (
-                self.selected_vm_entry.vm_entry.parent_vm
-                == appentry.app_info.vm.name
-                and not appentry.app_info.disposable
+                self.selected_vm_entry.vm_entry.parent_vm == app_info.vm.name
+                and not app_info.disposable
             )
         if self.selected_vm_entry.vm_entry.is_dispvm_template:
             return (
-                appentry.app_info.disposable
+                app_info.disposable
                 == self.toggle_buttons.apps_toggle.get_active()
             )
         return True
@@ -339,7 +350,7 @@ class AppPage(MenuPage):
         if not widget.get_active():
             return
         self.vm_list.unselect_all()
-        self.app_list.invalidate_filter()
+        self._update_app_model()
         self.vm_list.invalidate_filter()
 
     def initialize_page(self):
@@ -367,7 +378,7 @@ class AppPage(MenuPage):
             self.app_list.ephemeral_vm = bool(
                 self.selected_vm_entry.vm_entry.parent_vm
             )
-        self.app_list.invalidate_filter()
+        self._update_app_model()
 
     def _set_right_visibility(self, visibility: bool):
         self.vm_right_pane.set_visible(visibility)
@@ -9,8 +9,7 @@ import asyncio
 import os
 import subprocess
 import sys
-from typing import Optional, Dict, Any
-import importlib.resources
+from typing import Optional, Dict, Any, Tuple, List
 import logging
 
 import qubesadmin
@@ -18,17 +17,27 @@ import qubesadmin.events
 
 from .settings_page import SettingsPage
 from .application_page import AppPage
-from .search_page import SearchPage
-from .desktop_file_manager import DesktopFileManager
+from .search_page import SearchPage, RecentAppsManager
+from .desktop_file_manager import ApplicationInfo, DesktopFileManager
 from .favorites_page import FavoritesPage
 from .custom_widgets import SelfAwareMenu
 from .vm_manager import VMManager
 from .page_handler import MenuPage
+from .usage_store import UsageStore
+from .search_provider import SearchProvider
+from .app_launcher import AppLauncher
+from .dbus_service import DBusObject
+from .state_file import StateFile, RecentList, get_state_path
+from .utils import icon_cache
+from .resources import register_resources, add_ui_file, load_css
 from .constants import (
     INITIAL_PAGE_FEATURE,
     SORT_RUNNING_FEATURE,
     POSITION_FEATURE,
     DISABLE_RECENT_FEATURE,
+    FUZZY_SEARCH_FEATURE,
+    SEARCH_RESULTS_FEATURE,
+    APP_MENU_BUS_NAME,
 )
 
 import gi
@@ -51,6 +60,14 @@ except ImportError:
 
 PAGE_LIST = ["search_page", "app_page", "favorites_page", "settings_page"]
 
+
+def get_page_glade_name(page_name: str) -> str:
+    """Name of the glade file with the given page (e.g. app_page is in
+    qubes-menu-app-page.glade); the main glade file contains just
+    placeholders for pages."""
+    return "qubes-menu-" + page_name.replace("_", "-") + ".glade"
+
+
 POSITION_LIST = [
     "mouse",
     "top-left",
@@ -70,19 +87,18 @@ GObject.signal_new(
 )
 
 
-def load_theme(widget: Gtk.Widget, light_theme_path: str, dark_theme_path: str):
+def load_theme(widget: Gtk.Widget, light_theme_name: str, dark_theme_name: str):
     """
     Load a dark or light theme to current screen, based on widget's
     current (system) defaults.
     :param widget: Gtk.Widget, preferably main window
-    :param light_theme_path: path to file with light theme css
-    :param dark_theme_path: path to file with dark theme css
+    :param light_theme_name: name of qubes_menu file with light theme css
+    :param dark_theme_name: name of qubes_menu file with dark theme css
     """
-    path = light_theme_path if is_theme_light(widget) else dark_theme_path
+    name = light_theme_name if is_theme_light(widget) else dark_theme_name
 
     screen = Gdk.Screen.get_default()
-    provider = Gtk.CssProvider()
-    provider.load_from_path(path)
+    provider = load_css("qubes_menu", name)
     Gtk.StyleContext.add_provider_for_screen(
         screen, provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
     )
@@ -114,7 +130,7 @@ class AppMenu(Gtk.Application):
         :param dispatcher: qubesadmin.vm.EventsDispatcher
         """
         super().__init__(
-            application_id="org.qubesos.appmenu",
+            application_id=APP_MENU_BUS_NAME,
             flags=Gio.ApplicationFlags.HANDLES_COMMAND_LINE,
         )
         self.qapp = qapp
@@ -124,6 +140,7 @@ class AppMenu(Gtk.Application):
         self.initial_page = "app_page"
         self.sort_running = False
         self.disable_recent = False
+        self.search_results_limit = SearchPage.RESULTS_TO_SHOW
         self.start_in_background = False
         self.kde = "KDE" in os.getenv("XDG_CURRENT_DESKTOP", "").split(":")
 
@@ -139,12 +156,23 @@ class AppMenu(Gtk.Application):
 
         self.desktop_file_manager: Optional[DesktopFileManager] = None
         self.vm_manager: Optional[VMManager] = None
-
+        # how often and how recently apps were started, for search ranking
+        self.usage_store: Optional[UsageStore] = None
+        self.recent_searches: Optional[RecentList] = None
+        self.recent_apps: Optional[RecentList] = None
+        # state kept between restarts, written on shutdown if needed
+        self.state_files: List[StateFile] = []
+        # objects exported on D-Bus, for other programs
+        self.dbus_objects: List[DBusObject] = []
+
+        # pages are built only when first shown (see get_page)
         self.handlers: Dict[str, MenuPage] = {}
 
         self.power_button: Optional[Gtk.Button] = None
 
         self.highlight_tag: Optional[str] = None
+        # background and foreground color of highlighted search text
+        self.highlight_colors: Optional[Tuple[Gdk.RGBA, Gdk.RGBA]] = None
 
         self.tasks = []
         self.appmenu_position: str = "mouse"
@@ -193,6 +221,28 @@ class AppMenu(Gtk.Application):
         self.activate()
         return 0
 
+    def do_dbus_register(self, connection, object_path):
+        """
+        Export the search provider and app launcher on D-Bus, together with
+        the application itself. This method overrides default
+        do_dbus_register from Gtk.Application.
+        """
+        # pylint: disable=arguments-differ
+        if not Gtk.Application.do_dbus_register(self, connection, object_path):
+            return False
+        self.dbus_objects = [SearchProvider(self), AppLauncher(self)]
+        for dbus_object in self.dbus_objects:
+            dbus_object.register(connection)
+        return True
+
+    def do_dbus_unregister(self, connection, object_path):
+        """Stop exporting own D-Bus objects."""
+        # pylint: disable=arguments-differ
+        for dbus_object in self.dbus_objects:
+            dbus_object.unregister()
+        self.dbus_objects = []
+        Gtk.Application.do_dbus_unregister(self, connection, object_path)
+
     def parse_options(self, options: Dict[str, Any]):
         """Parse command-line options."""
         if "keep-visible" in options:
@@ -355,7 +405,7 @@ class AppMenu(Gtk.Application):
 
             # grab a focus on the initially selected page so that keyboard
             # navigation works
-            self.handlers[self.initial_page].page_widget.grab_focus()
+            self.get_page(self.initial_page).page_widget.grab_focus()
 
             self.tasks = [
                 asyncio.ensure_future(self.dispatcher.listen_for_events()),
@@ -379,10 +429,48 @@ class AppMenu(Gtk.Application):
         app or clicking outside the menu.
         """
         # reset search tab
-        self.handlers["search_page"].initialize_page()
+        search_page = self.handlers.get("search_page")
+        if search_page:
+            search_page.initialize_page()
         if not self.keep_visible and self.main_window:
             self.main_window.hide()
 
+    def launch_app(self, app_info: ApplicationInfo, vm=None):
+        """
+        Run application from a .desktop file, without using any menu
+        widgets (for example on requests over D-Bus).
+        :param app_info: ApplicationInfo of the app
+        :param vm: QubesVM to run the app in; by default, app's own qube
+        :return: False if the app cannot be run in the provided qube
+        """
+        # pylint: disable=consider-using-with
+        if vm and not app_info.vm:
+            # dom0 apps cannot be started in qubes
+            return False
+        command = app_info.get_command_for_vm(vm)
+        if not command:
+            return False
+        subprocess.Popen(command, stdin=subprocess.DEVNULL)
+        self.emit("app-started", app_info.file_path.name)
+        return True
+
+    def show_search(self, search_text: str):
+        """Show the menu at the search page, searching for provided text."""
+        if not self.main_window:
+            return
+        search_page = self.get_page("search_page")
+        if not isinstance(search_page, SearchPage):
+            return
+        if self.main_notebook:
+            self.main_notebook.set_current_page(
+                PAGE_LIST.index("search_page")
+            )
+        search_page.search_entry.set_text(search_text)
+        search_page.search_entry.grab_focus_without_selecting()
+        search_page.search_entry.set_position(-1)
+        self.main_window.set_keep_above(True)
+        self.__present()
+
     def _key_press(self, _widget, event):
         """
         Keypress handler, to allow closing the menu with an ESC key and to fix
@@ -427,17 +515,17 @@ class AppMenu(Gtk.Application):
         The function that performs actual widget realization and setup. Should
         be only called once, in the main instance of this application.
         """
+        # UI files and icons are loaded from the resource bundle, if
+        # installed
+        register_resources()
+
         # build the frontend
         self.builder = Gtk.Builder()
 
         self.fav_app_list = self.builder.get_object("fav_app_list")
         self.sys_tools_list = self.builder.get_object("sys_tools_list")
 
-        glade_path = (
-            importlib.resources.files("qubes_menu") / "qubes-menu.glade"
-        )
-        with importlib.resources.as_file(glade_path) as path:
-            self.builder.add_from_file(str(path))
+        add_ui_file(self.builder, "qubes_menu", "qubes-menu.glade")
 
         self.main_window = self.builder.get_object("main_window")
         self.layer_shell = GtkLayerShell.is_supported()
@@ -449,32 +537,24 @@ class AppMenu(Gtk.Application):
         self.add_window(self.main_window)
         self.desktop_file_manager = DesktopFileManager(self.qapp)
         self.vm_manager = VMManager(self.qapp, self.dispatcher)
+        self.usage_store = UsageStore()
+        self.recent_searches = RecentList(
+            get_state_path("recent_searches.json")
+        )
+        self.recent_apps = RecentList(get_state_path("recent_apps.json"))
+        self.state_files = [
+            self.usage_store,
+            self.recent_searches,
+            self.recent_apps,
+        ]
+        self.connect("app-started", self._record_app_usage)
 
-        self.handlers = {
-            "search_page": SearchPage(
-                self.vm_manager, self.builder, self.desktop_file_manager
-            ),
-            "app_page": AppPage(
-                self.vm_manager, self.builder, self.desktop_file_manager
-            ),
-            "favorites_page": FavoritesPage(
-                self.qapp,
-                self.builder,
-                self.desktop_file_manager,
-                self.dispatcher,
-                self.vm_manager,
-            ),
-            "settings_page": SettingsPage(
-                self.qapp,
-                self.builder,
-                self.desktop_file_manager,
-                self.dispatcher,
-            ),
-        }
         self.power_button = self.builder.get_object("power_button")
         self.power_button.connect("clicked", self._do_power_button)
         self.main_notebook.connect("switch-page", self._handle_page_switch)
         self.connect("shutdown", self.do_shutdown)
+        self.connect("shutdown", self._save_state)
+        self.connect("shutdown", self._log_icon_cache_stats)
 
         self.main_window.add_events(Gdk.EventMask.KEY_PRESS_MASK)
         self.main_window.connect("key_press_event", self._key_pressed)
@@ -485,6 +565,8 @@ class AppMenu(Gtk.Application):
         )
 
         self.load_settings()
+        # other pages are built when first switched to
+        self.get_page(self.initial_page)
 
         # monitor for settings changes
         for feature in [
@@ -492,6 +574,8 @@ class AppMenu(Gtk.Application):
             SORT_RUNNING_FEATURE,
             POSITION_FEATURE,
             DISABLE_RECENT_FEATURE,
+            FUZZY_SEARCH_FEATURE,
+            SEARCH_RESULTS_FEATURE,
         ]:
             self.dispatcher.add_handler(
                 "domain-feature-set:" + feature, self._update_settings
@@ -504,24 +588,79 @@ class AppMenu(Gtk.Application):
             GtkLayerShell.init_for_window(self.main_window)
             GtkLayerShell.set_exclusive_zone(self.main_window, 0)
 
+    def get_page(self, page_name: str) -> MenuPage:
+        """
+        Get handler of the given page, first building the page if it was
+        not shown yet: every page has its own glade file, and populating
+        a page creates widgets for all its apps or qubes.
+        """
+        handler = self.handlers.get(page_name)
+        if handler:
+            return handler
+        assert self.builder
+
+        page_widget = self.builder.get_object(page_name)
+        if page_widget is None:
+            add_ui_file(
+                self.builder, "qubes_menu", get_page_glade_name(page_name)
+            )
+            page_widget = self.builder.get_object(page_name)
+        if page_widget.get_parent() is None:
+            # pages need to be in the menu window already when built, to
+            # find the application
+            placeholder: Gtk.Box = self.builder.get_object(
+                page_name + "_placeholder"
+            )
+            placeholder.pack_start(page_widget, True, True, 0)
+
+        handler = self._create_page(page_name)
+        self._apply_settings(handler)
+        handler.initialize_page()
+        # only a completely built page is registered, so that failed builds
+        # are retried
+        self.handlers[page_name] = handler
+        return handler
+
+    def _create_page(self, page_name: str) -> MenuPage:
+        assert self.vm_manager
+        assert self.desktop_file_manager
+        if page_name == "search_page":
+            return SearchPage(
+                self.vm_manager,
+                self.builder,
+                self.desktop_file_manager,
+                self.usage_store,
+                self.recent_searches,
+                self.recent_apps,
+            )
+        if page_name == "app_page":
+            return AppPage(
+                self.vm_manager, self.builder, self.desktop_file_manager
+            )
+        if page_name == "favorites_page":
+            return FavoritesPage(
+                self.qapp,
+                self.builder,
+                self.desktop_file_manager,
+                self.dispatcher,
+                self.vm_manager,
+            )
+        if page_name == "settings_page":
+            return SettingsPage(
+                self.qapp,
+                self.builder,
+                self.desktop_file_manager,
+                self.dispatcher,
+            )
+        raise ValueError(f"Unknown page: {page_name}")
+
     def load_style(self, *_args):
         """Load appropriate CSS stylesheet and associated properties."""
-        light_ref = (
-            importlib.resources.files("qubes_menu") / "qubes-menu-light.css"
+        load_theme(
+            self.main_window,
+            light_theme_name="qubes-menu-light.css",
+            dark_theme_name="qubes-menu-dark.css",
         )
-        dark_ref = (
-            importlib.resources.files("qubes_menu") / "qubes-menu-dark.css"
-        )
-
-        with (
-            importlib.resources.as_file(light_ref) as light_path,
-            importlib.resources.as_file(dark_ref) as dark_path,
-        ):
-            load_theme(
-                self.main_window,
-                light_theme_path=str(light_path),
-                dark_theme_path=str(dark_path),
-            )
 
         label = Gtk.Label()
         style_context: Gtk.StyleContext = label.get_style_context()
@@ -535,6 +674,7 @@ class AppMenu(Gtk.Application):
             f'<span background="{self._rgba_color_to_hex(bg_color)}" '
             f'color="{self._rgba_color_to_hex(fg_color)}">'
         )
+        self.highlight_colors = (bg_color, fg_color)
 
     def load_settings(self):
         """Load settings from dom0 features."""
@@ -551,6 +691,23 @@ class AppMenu(Gtk.Application):
         self.sort_running = bool(
             local_vm.features.get(SORT_RUNNING_FEATURE, False)
         )
+        if self.disable_recent and self.usage_store:
+            # do not keep any history of used apps
+            self.usage_store.clear()
+        if self.desktop_file_manager:
+            self.desktop_file_manager.search_index.fuzzy = bool(
+                local_vm.features.get(FUZZY_SEARCH_FEATURE, False)
+            )
+
+        try:
+            search_results = int(
+                local_vm.features.get(SEARCH_RESULTS_FEATURE, "")
+            )
+        except ValueError:
+            search_results = 0
+        if search_results <= 0:
+            search_results = SearchPage.RESULTS_TO_SHOW
+        self.search_results_limit = search_results
 
         position = local_vm.features.get(POSITION_FEATURE, "mouse")
         if position not in POSITION_LIST:
@@ -561,9 +718,46 @@ class AppMenu(Gtk.Application):
         self.appmenu_position = position
 
         for handler in self.handlers.values():
-            handler.set_sorting_order(self.sort_running)
-            if isinstance(handler, SearchPage):
-                handler.enable_recent(not self.disable_recent)
+            self._apply_settings(handler)
+
+    def _apply_settings(self, handler: MenuPage):
+        """Apply current settings to a page."""
+        handler.set_sorting_order(self.sort_running)
+        if isinstance(handler, SearchPage):
+            handler.enable_recent(not self.disable_recent)
+            handler.set_results_limit(self.search_results_limit)
+
+    def _record_app_usage(self, _application, app_path: str):
+        if self.disable_recent:
+            return
+        if self.usage_store:
+            self.usage_store.record_launch(app_path)
+        search_page = self.handlers.get("search_page")
+        if isinstance(search_page, SearchPage):
+            search_page.recent_apps_manager.add_new_recent_app(self, app_path)
+        elif self.recent_apps is not None:
+            # shown once the search page is built
+            self.recent_apps.add(app_path)
+            while len(self.recent_apps) > RecentAppsManager.APPS_TO_KEEP:
+                self.recent_apps.pop_oldest()
+
+    def _save_state(self, *_args):
+        for state_file in self.state_files:
+            state_file.flush()
+
+    @staticmethod
+    def _log_icon_cache_stats(*_args):
+        stats = icon_cache.get_stats()
+        logger.debug(
+            "Icon cache: %d hits, %d misses (hit rate %.2f), %d evictions, "
+            "%d icons, %d bytes",
+            stats["hits"],
+            stats["misses"],
+            stats["hit_rate"],
+            stats["evictions"],
+            stats["icons"],
+            stats["bytes"],
+        )
 
     def _update_settings(self, vm, _event, **_kwargs):
         if not str(vm) == self.qapp.local_name:
@@ -583,7 +777,7 @@ class AppMenu(Gtk.Application):
             Gdk.keyval_to_unicode(event_key.keyval) > 32
             or event_key.keyval == Gdk.KEY_BackSpace
         ):
-            search_page = self.handlers.get("search_page")
+            search_page = self.get_page("search_page")
             if not isinstance(search_page, SearchPage):
                 return False
 
@@ -597,11 +791,13 @@ class AppMenu(Gtk.Application):
 
         return False
 
-    def _handle_page_switch(self, _widget, page, _page_num):
+    def _handle_page_switch(self, _widget, page, page_num):
         """
         On page switch some things need to happen, mostly cleaning any old
-        selections/menu options highlighted.
+        selections/menu options highlighted. Pages not shown before are
+        built first.
         """
+        self.get_page(PAGE_LIST[page_num])
         page_handler = self.handlers.get(page.get_name())
         if page_handler:
             page_handler.initialize_page()
@@ -612,9 +808,9 @@ class AppMenu(Gtk.Application):
         return none.
         """
         assert self.main_notebook
-        current_page_handler = self.handlers[
+        current_page_handler = self.handlers.get(
             PAGE_LIST[self.main_notebook.get_current_page()]
-        ]
+        )
         if hasattr(current_page_handler, "get_selected_vm"):
             return current_page_handler.get_selected_vm()
         return None
@@ -37,12 +37,21 @@ INITIAL_PAGE_FEATURE = "menu-initial-page"
 SORT_RUNNING_FEATURE = "menu-sort-running"
 POSITION_FEATURE = "menu-position"
 DISABLE_RECENT_FEATURE = "menu-disable-recent"
+FUZZY_SEARCH_FEATURE = "menu-fuzzy-search"
+SEARCH_RESULTS_FEATURE = "menu-search-results"
 
 FAVORITES_FEATURE = "menu-favorites"
 DISPOSABLE_PREFIX = "@disp:"
+DISP_TEXT = "New disposable qube from "
 
 RESTART_PARAM_LONG = "restart"
 RESTART_PARAM_SHORT = "r"
 
 # Timeout for activation change when hovering over a menu item, in microseconds
 HOVER_TIMEOUT = 15
+
+# D-Bus name of the menu application, and the object and interface used to
+# launch apps without showing the menu
+APP_MENU_BUS_NAME = "org.qubesos.appmenu"
+LAUNCHER_PATH = "/org/qubesos/appmenu/Launcher"
+LAUNCHER_INTERFACE = "org.qubesos.appmenu.Launcher"
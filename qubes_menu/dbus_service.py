@@ -0,0 +1,109 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Objects exported by the running menu on its D-Bus connection.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+import gi
+
+gi.require_version("Gio", "2.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gio, GLib
+
+logger = logging.getLogger("qubes-appmenu")
+
+
+class DBusObject:
+    """
+    Base class for an object with a single interface, exported on a D-Bus
+    connection. Subclasses provide introspection XML and a mapping of
+    D-Bus methods to their own methods. Methods may raise ValueError for
+    incorrect arguments; any other exception is reported to the caller
+    as a generic failure.
+    """
+
+    # introspection XML, with a single interface
+    INTROSPECTION_XML = ""
+    # object path to export the object at
+    OBJECT_PATH = ""
+    # D-Bus method name: (name of own method, signature of the returned
+    # tuple or None if the method returns nothing)
+    METHODS: Dict[str, Tuple[str, Optional[str]]] = {}
+
+    def __init__(self):
+        self.node_info = Gio.DBusNodeInfo.new_for_xml(self.INTROSPECTION_XML)
+        self.connection: Optional[Gio.DBusConnection] = None
+        self.registration_id = 0
+
+    def register(self, connection: Gio.DBusConnection):
+        """Export the object on a D-Bus connection."""
+        self.connection = connection
+        self.registration_id = connection.register_object(
+            self.OBJECT_PATH,
+            self.node_info.interfaces[0],
+            self._handle_method_call,
+            None,
+            None,
+        )
+
+    def unregister(self):
+        """Stop exporting the object."""
+        if self.connection and self.registration_id:
+            self.connection.unregister_object(self.registration_id)
+        self.connection = None
+        self.registration_id = 0
+
+    def _handle_method_call(
+        self,
+        _connection,
+        _sender,
+        _object_path,
+        _interface_name,
+        method_name: str,
+        parameters: GLib.Variant,
+        invocation: Gio.DBusMethodInvocation,
+    ):
+        # pylint: disable=too-many-arguments
+        if method_name not in self.METHODS:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.UnknownMethod",
+                f"Unknown method: {method_name}",
+            )
+            return
+        function_name, signature = self.METHODS[method_name]
+        try:
+            result = getattr(self, function_name)(*parameters.unpack())
+        except ValueError as ex:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.InvalidArgs", str(ex)
+            )
+            return
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception("D-Bus call %s failed", method_name)
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.Failed", str(ex)
+            )
+            return
+        if signature:
+            invocation.return_value(GLib.Variant(signature, (result,)))
+        else:
+            invocation.return_value(None)
@@ -25,20 +25,34 @@ import pyinotify
 import logging
 import asyncio
 import os
+import re
 import shlex
+import weakref
 import xdg.DesktopEntry
 import xdg.BaseDirectory
 import xdg.Menu
 from pathlib import PosixPath, Path
-from typing import Optional, List, Union, Dict, Callable
+from typing import Optional, List, Union, Dict, Callable, Iterable
 import qubesadmin
 import qubesadmin.vm
 import qubesadmin.events
 
 from . import constants
+from .search_index import SearchIndex, fold_text
 
 logger = logging.getLogger("qubes-appmenu")
 
+# weights of search words from different .desktop file fields; matches of
+# words with lower weight are ranked lower in search results
+NAME_WEIGHT = 1.0
+KEYWORDS_WEIGHT = 1.0
+GENERIC_NAME_WEIGHT = 0.8
+EXEC_WEIGHT = 0.7
+CATEGORIES_WEIGHT = 0.6
+COMMENT_WEIGHT = 0.5
+# shorter words from comments (like "a" or "of") are not searchable
+COMMENT_MIN_WORD_LENGTH = 3
+
 
 def exec_parse(desktop_entry: xdg.DesktopEntry.DesktopEntry):
     """
@@ -75,12 +89,24 @@ class ApplicationInfo:
         self.app_name: Optional[str] = None
         self.sort_name: Optional[str] = None
         self.vm: Optional[qubesadmin.vm.QubesVM] = None
+        # display data shared by all rows representing this file, computed
+        # once per load instead of separately by every page
+        self.vm_name: str = "dom0"
+        self.vm_label: str = ""
+        self.qube_sort_name: str = ""
         self.entry_name: Optional[str] = None
         self.exec: List[str] = []
         self.disposable: bool = False
         self.categories = []
-        self.entries: List = []
+        self.generic_name: Optional[str] = None
+        self.comment: Optional[str] = None
+        # name of the executable or, for qube apps, of the started app
+        self.exec_name: Optional[str] = None
+        # menu widgets representing this file; weak, so that rows removed
+        # from their lists are not kept alive (and updated) forever
+        self.entries: weakref.WeakSet = weakref.WeakSet()
         self.keywords: List[str] = []
+        self.search_words: Dict[str, float] = {}
 
     def load_data(self, entry):
         """Fill own data with information from xdg.DesktopEntry provided."""
@@ -104,10 +130,101 @@ class ApplicationInfo:
 
         self.categories = entry.getCategories()
         self.keywords = entry.getKeywords()
+        self.generic_name = entry.getGenericName() or None
+        if self.generic_name and self.vm:
+            self.generic_name = self.generic_name.split(": ", 1)[-1]
+        self.comment = entry.getComment() or None
+        self.exec_name = self._get_exec_name()
+        self.search_words = self._get_search_words()
+
+        self.vm_name = self.vm.name if self.vm else "dom0"
+        if self.disposable:
+            self.vm_label = constants.DISP_TEXT + str(self.vm)
+        elif self.vm:
+            self.vm_label = str(self.vm)
+        else:
+            self.vm_label = str(self.qapp.local_name)
+        self.qube_sort_name = (
+            (self.vm.name if self.vm else "") + " | " + self.app_name
+        )
 
-        for menu_entry in self.entries:
+        for menu_entry in list(self.entries):
             menu_entry.update_contents()
 
+    def _get_exec_name(self) -> Optional[str]:
+        """Name of the executed program; for apps started in qubes, name
+        of the app started by the qubes.StartApp service."""
+        for arg in self.exec:
+            if arg.startswith("qubes.StartApp+"):
+                return arg.split("+", 1)[1]
+        if self.exec and not self.vm:
+            return os.path.basename(self.exec[0])
+        return None
+
+    def _get_search_words(self) -> Dict[str, float]:
+        """Words that can be used to find this application, with their
+        weights; words are folded (see fold_text)."""
+        # search uses partial matching in search words, those being:
+        # application name
+        # vm name
+        # disposable parent name if applicable
+        # "new disposable qube from" if applicable
+        # desktop file keywords if applicable
+        # generic name, comment, categories and executable name, with
+        # lower weights
+        search_words: Dict[str, float] = {}
+
+        def add_words(words: Iterable[str], weight: float):
+            for word in words:
+                if search_words.get(word, 0) < weight:
+                    search_words[word] = weight
+
+        if self.vm:
+            add_words(
+                fold_text(self.vm.name).replace("_", "-").split("-"),
+                NAME_WEIGHT,
+            )
+        else:
+            add_words(["dom0"], NAME_WEIGHT)
+
+        if self.disposable:
+            add_words(_split_words(constants.DISP_TEXT), NAME_WEIGHT)
+
+        if self.app_name:
+            add_words(_split_words(self.app_name), NAME_WEIGHT)
+
+        if self.keywords:
+            add_words((fold_text(k) for k in self.keywords), KEYWORDS_WEIGHT)
+
+        if self.generic_name:
+            add_words(_split_words(self.generic_name), GENERIC_NAME_WEIGHT)
+
+        if self.exec_name:
+            exec_name = fold_text(self.exec_name)
+            add_words([exec_name], EXEC_WEIGHT)
+            add_words(re.split(r"[-_.]", exec_name), EXEC_WEIGHT)
+
+        add_words(
+            (
+                fold_text(category)
+                for category in self.categories
+                if not category.startswith("X-")
+            ),
+            CATEGORIES_WEIGHT,
+        )
+
+        if self.comment:
+            add_words(
+                (
+                    word
+                    for word in _split_words(self.comment)
+                    if len(word) >= COMMENT_MIN_WORD_LENGTH
+                ),
+                COMMENT_WEIGHT,
+            )
+        search_words.pop("", None)
+        return search_words
+
     def get_command_for_vm(self, vm=None):
         """Get execution command for a specified VM. We're not using contents
         of an Exec field directly because freshly-minted DispVMs don't have
@@ -136,6 +253,11 @@ class ApplicationInfo:
         return "X-Qubes-VM" in self.categories
 
 
+def _split_words(text: str) -> List[str]:
+    """Split text into folded search words, like search text is."""
+    return fold_text(text).replace("_", " ").replace("-", " ").split()
+
+
 class DesktopFileManager:
     """
     Class that loads, caches and observes changes in .desktop files.
@@ -190,6 +312,7 @@ class DesktopFileManager:
         self.notifier = None
         self.watches = []
         self._callbacks: List[Callable] = []
+        self._remove_callbacks: List[Callable] = []
 
         # directories used by Qubes menu tools, not necessarily all possible
         # XDG directories
@@ -198,6 +321,11 @@ class DesktopFileManager:
         ).split(":")
 
         self.app_entries: Dict[Path, ApplicationInfo] = {}
+        # .desktop file name: ApplicationInfo; if there are more files with
+        # the same name, the first loaded one
+        self._app_entries_by_name: Dict[str, ApplicationInfo] = {}
+        # search words of all loaded applications
+        self.search_index = SearchIndex()
 
         for directory in self.desktop_dirs:
             if not os.path.exists(directory):
@@ -221,6 +349,13 @@ class DesktopFileManager:
         for info in self.app_entries.values():
             func(info)
 
+    def register_remove_callback(self, func):
+        """
+        Register callbacks to be executed on removed ApplicationInfos (after
+        they are no longer available), for example to update list models.
+        """
+        self._remove_callbacks.append(func)
+
     def get_app_infos(self):
         """Get all available ApplicationInfos. Needed for initial loading
         of favorites."""
@@ -230,24 +365,31 @@ class DesktopFileManager:
         """
         Get an app_info by name of the .desktop file
         """
-        for path, app_entry in self.app_entries.items():
-            if path.name == name:
-                return app_entry
-        return None
+        return self._app_entries_by_name.get(name)
 
     def remove_file(self, path: Union[str, Path]):
         """Remove a file provided by path from local cache. Also removes
         all child menu entries."""
         if isinstance(path, str):
             path = Path(path)
-        app_info = self.app_entries.get(path)
+        app_info = self.app_entries.pop(path, None)
 
         if app_info:
-            for child in app_info.entries:
+            if self._app_entries_by_name.get(path.name) is app_info:
+                del self._app_entries_by_name[path.name]
+                for other_path, other_info in self.app_entries.items():
+                    if other_path.name == path.name:
+                        self._app_entries_by_name[path.name] = other_info
+                        break
+            self.search_index.remove(app_info)
+            for func in self._remove_callbacks:
+                func(app_info)
+            for child in list(app_info.entries):
                 parent = child.get_parent()
-                parent.remove(child)
-                parent.invalidate_filter()
-            del self.app_entries[path]
+                if parent:
+                    parent.remove(child)
+                    parent.invalidate_filter()
+            app_info.entries.clear()
 
     def load_file(self, path: Union[str, Path]):
         """
@@ -282,9 +424,11 @@ class DesktopFileManager:
             new_entry = True
             app_info = ApplicationInfo(self.qapp, path)
             self.app_entries[path] = app_info
+            self._app_entries_by_name.setdefault(path.name, app_info)
         else:
             new_entry = False
         app_info.load_data(entry)
+        self.search_index.add(app_info, app_info.search_words)
 
         if new_entry:
             for func in self._callbacks:
@@ -170,7 +170,7 @@ class FavoritesPage(MenuPage):
                 vm = None
             for child in self.app_list.get_children():
                 if str(child.app_info.vm) == str(vm):
-                    child.app_info.entries.remove(child)
+                    child.app_info.entries.discard(child)
                     self.app_list.remove(child)
             self.app_list.invalidate_sort()
         except Exception as ex:  # pylint: disable=broad-except
@@ -216,24 +216,15 @@ class FavoritesPage(MenuPage):
         self.app_list.invalidate_sort()
 
     def _favorites_sort(self, x: FavoritesAppEntry, y: FavoritesAppEntry):
-        sort_name_x = x.app_info.app_name or ""
-        sort_name_y = y.app_info.app_name or ""
-
         if self.sort_qubes is not None:
-            sort_name_x = (
-                (x.app_info.vm.name if x.app_info.vm else "")
-                + " | "
-                + sort_name_x
-            )
-            sort_name_y = (
-                (y.app_info.vm.name if y.app_info.vm else "")
-                + " | "
-                + sort_name_y
-            )
+            sort_name_x = x.app_info.qube_sort_name
+            sort_name_y = y.app_info.qube_sort_name
             if self.sort_qubes:
                 return sort_name_x > sort_name_y
             return sort_name_x < sort_name_y
 
+        sort_name_x = x.app_info.app_name or ""
+        sort_name_y = y.app_info.app_name or ""
         if self.sort_names:
             return sort_name_x > sort_name_y
         return sort_name_x < sort_name_y
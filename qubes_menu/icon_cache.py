@@ -0,0 +1,454 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Loading of icons: in-memory cache of loaded icons shared by all menu
+widgets, and decoding of icons in background threads.
+"""
+import hashlib
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GdkPixbuf, GLib
+
+# at most this many bytes of pixel data are kept in the cache
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+# number of threads decoding icons in background
+DECODE_THREADS = 2
+# at most this many bytes of rasterized icons are kept on disk
+MAX_DISK_CACHE_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger("qubes-appmenu")
+
+
+def get_cache_path(name: str) -> Path:
+    """Path of a menu cache file or directory, in XDG cache directory."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+        "~/.cache"
+    )
+    return Path(cache_home) / "qubes-appmenu" / name
+
+
+_blank_icons: Dict[Tuple[int, int], GdkPixbuf.Pixbuf] = {}
+
+
+def get_blank_icon(width: int, height: int) -> GdkPixbuf.Pixbuf:
+    """Transparent icon of a given size, used for missing icons and as
+    a placeholder for icons being loaded."""
+    pixbuf = _blank_icons.get((width, height))
+    if pixbuf is None:
+        pixbuf = GdkPixbuf.Pixbuf.new(
+            GdkPixbuf.Colorspace.RGB, True, 8, width, height
+        )
+        pixbuf.fill(0x000)
+        _blank_icons[(width, height)] = pixbuf
+    return pixbuf
+
+
+def find_icon_file(
+    icon_theme: Gtk.IconTheme, icon_name, size: int
+) -> Optional[str]:
+    """Path of the file of an icon given by path or name in icon theme;
+    None if there is no such file."""
+    if not icon_name:
+        return None
+    if os.path.isabs(icon_name):
+        return icon_name if os.path.isfile(icon_name) else None
+    icon_info = icon_theme.lookup_icon(
+        icon_name, size, Gtk.IconLookupFlags.FORCE_SIZE
+    )
+    path = icon_info.get_filename() if icon_info else None
+    # icons from resources (see resources.py) have a resource path instead
+    if path and not os.path.isfile(path):
+        return None
+    return path
+
+
+def decode_icon_file(
+    path: str,
+    width: int,
+    height: int,
+    disk_cache: Optional["DiskIconCache"] = None,
+) -> GdkPixbuf.Pixbuf:
+    """Decode and scale an icon file, using rasterized icons from disk
+    cache if possible. Raises GLib.Error if the file cannot be loaded.
+    Safe to call from background threads."""
+    if disk_cache:
+        pixbuf = disk_cache.load(path, width, height)
+        if pixbuf is not None:
+            return pixbuf
+    pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(path, width, height)
+    if disk_cache:
+        disk_cache.store(path, width, height, pixbuf)
+    return pixbuf
+
+
+def load_pixbuf(
+    icon_theme: Gtk.IconTheme,
+    icon_name,
+    width: int,
+    height: int,
+    disk_cache: Optional["DiskIconCache"] = None,
+) -> Optional[GdkPixbuf.Pixbuf]:
+    """Load icon from a path or from icon theme, without caching in memory;
+    None if it cannot be found."""
+    path = find_icon_file(icon_theme, icon_name, width)
+    try:
+        if path is not None:
+            return decode_icon_file(path, width, height, disk_cache)
+        # icons without files, like icons built into GTK
+        return icon_theme.load_icon(
+            icon_name, width, Gtk.IconLookupFlags.FORCE_SIZE
+        )
+    except (TypeError, GLib.Error):
+        return None
+
+
+def get_file_mtime(icon_name: Optional[str]) -> Optional[int]:
+    """Modification time of an icon given by path, None for icons from
+    icon theme (or missing files)."""
+    if not icon_name or not os.path.isabs(icon_name):
+        return None
+    try:
+        return os.stat(icon_name).st_mtime_ns
+    except OSError:
+        return None
+
+
+class IconCache:
+    """
+    LRU cache of icon pixbufs, bounded by size of their pixel data. Icons
+    loaded from files are reloaded when the file changes; all icons are
+    forgotten when the icon theme changes. Cached pixbufs are shared, so
+    they must not be modified.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        # key: (pixbuf, mtime of the source file or None)
+        self._entries: OrderedDict[
+            Hashable, Tuple[GdkPixbuf.Pixbuf, Optional[int]]
+        ] = OrderedDict()
+        self._size = 0
+        self._icon_theme: Optional[Gtk.IconTheme] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def watch_icon_theme(self, icon_theme: Gtk.IconTheme):
+        """Clear the cache whenever the icon theme changes."""
+        if self._icon_theme is icon_theme:
+            return
+        self._icon_theme = icon_theme
+        icon_theme.connect("changed", lambda *_args: self.clear())
+
+    def get(
+        self, key: Hashable, icon_name: Optional[str] = None
+    ) -> Optional[GdkPixbuf.Pixbuf]:
+        """
+        Get a cached icon.
+        :param key: cache key
+        :param icon_name: icon name or path, used to check if the file
+        changed since the icon was loaded
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            pixbuf, mtime = entry
+            if mtime is None or mtime == get_file_mtime(icon_name):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pixbuf
+            self._remove(key)
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        key: Hashable,
+        pixbuf: GdkPixbuf.Pixbuf,
+        mtime: Optional[int] = None,
+    ):
+        """
+        Add an icon to the cache, evicting least recently used icons if
+        needed.
+        :param mtime: modification time of the source file, as returned by
+        get_file_mtime before loading the icon
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (pixbuf, mtime)
+        self._size += pixbuf.get_byte_length()
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        pixbuf, _ = self._entries.pop(key)
+        self._size -= pixbuf.get_byte_length()
+
+    def clear(self):
+        """Forget all icons."""
+        self._entries.clear()
+        self._size = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """Cache statistics: hits, misses, hit rate, evictions, number of
+        cached icons and their size in bytes."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "icons": len(self._entries),
+            "bytes": self._size,
+        }
+
+
+class IconLoader:
+    """
+    Shows icons in Gtk.Images, decoding icons missing from the cache in
+    background threads; images show a blank placeholder until then. Icon
+    files are found in the icon theme on the main thread (icon theme is
+    not thread-safe), only decoding and scaling is done in the background.
+    Many images waiting for the same icon share a single decode.
+    """
+
+    def __init__(
+        self, cache: IconCache, disk_cache: Optional["DiskIconCache"] = None
+    ):
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=DECODE_THREADS, thread_name_prefix="qubes-menu-icons"
+        )
+        # key: images waiting for the icon
+        self._pending: Dict[Hashable, List[weakref.ref]] = {}
+        # image: key of the icon last requested for it, until it is shown
+        self._requested: weakref.WeakKeyDictionary = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def set_icon(
+        self,
+        image: Gtk.Image,
+        icon_theme: Gtk.IconTheme,
+        icon_name,
+        width: int,
+        height: int,
+    ):
+        """Show an icon in an image, now if it is cached, or once it is
+        decoded."""
+        key = (icon_name, width, height)
+        pixbuf = self.cache.get(key, icon_name)
+        if pixbuf is None:
+            path = find_icon_file(icon_theme, icon_name, width)
+            if path is not None:
+                self._request(image, key, path)
+                return
+            # not a file (or no such icon): load it right away
+            pixbuf = load_pixbuf(
+                icon_theme, icon_name, width, height, self.disk_cache
+            )
+            if pixbuf is not None:
+                self.cache.put(key, pixbuf)
+            else:
+                pixbuf = get_blank_icon(width, height)
+        self._requested.pop(image, None)
+        image.set_from_pixbuf(pixbuf)
+
+    def _request(self, image: Gtk.Image, key: Hashable, path: str):
+        self._requested[image] = key
+        if image.get_pixbuf() is None:
+            image.set_from_pixbuf(get_blank_icon(key[1], key[2]))
+        if key in self._pending:
+            self._pending[key].append(weakref.ref(image))
+            return
+        self._pending[key] = [weakref.ref(image)]
+        self._executor.submit(
+            self._decode, key, path, get_file_mtime(key[0])
+        )
+
+    def _decode(self, key: Hashable, path: str, mtime: Optional[int]):
+        """Runs in a background thread."""
+        pixbuf = None
+        try:
+            pixbuf = decode_icon_file(path, key[1], key[2], self.disk_cache)
+        except GLib.Error:
+            # not a valid image, shown as a blank icon
+            pass
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to decode icon %s", path)
+        finally:
+            # images waiting for the icon must be released even on failure
+            GLib.idle_add(self._decoded, key, pixbuf, mtime)
+
+    def _decoded(
+        self, key: Hashable, pixbuf: Optional[GdkPixbuf.Pixbuf], mtime
+    ):
+        if pixbuf is not None:
+            self.cache.put(key, pixbuf, mtime)
+        else:
+            pixbuf = get_blank_icon(key[1], key[2])
+        for image_ref in self._pending.pop(key, []):
+            image = image_ref()
+            # skip images that wait for another icon now
+            if image is not None and self._requested.get(image) == key:
+                del self._requested[image]
+                image.set_from_pixbuf(pixbuf)
+        return GLib.SOURCE_REMOVE
+
+    def is_loading(self) -> bool:
+        """Check if any icons are being decoded."""
+        return bool(self._pending)
+
+
+class DiskIconCache:
+    """
+    Icons rasterized at given sizes, kept as PNG files in XDG cache
+    directory between restarts of the menu. Only SVG icons are cached, as
+    decoding other formats is about as fast as reading the cached file.
+    Files are named after a hash of source path, its modification time and
+    icon size, so changed icons are never read from the cache. When the
+    cache grows too big, least recently used files are removed. Safe to use
+    from many threads.
+    """
+
+    SOURCE_SUFFIXES = (".svg", ".svgz")
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = MAX_DISK_CACHE_BYTES,
+    ):
+        """
+        :param path: cache directory; if not provided, a directory in XDG
+        cache directory is used
+        """
+        self.path = path or get_cache_path("icons")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # total size of cached files, computed on first write
+        self._size: Optional[int] = None
+
+    def _get_file_path(
+        self, source: str, width: int, height: int
+    ) -> Optional[Path]:
+        """Path of the cached file for an icon; None if the icon should not
+        be cached."""
+        if not source.endswith(self.SOURCE_SUFFIXES):
+            return None
+        try:
+            mtime = os.stat(source).st_mtime_ns
+        except OSError:
+            return None
+        key = f"{source}\0{mtime}\0{width}x{height}"
+        digest = hashlib.sha256(key.encode("utf-8", "surrogateescape"))
+        return self.path / (digest.hexdigest() + ".png")
+
+    def load(
+        self, source: str, width: int, height: int
+    ) -> Optional[GdkPixbuf.Pixbuf]:
+        """Load a cached icon; None if it is not cached."""
+        file_path = self._get_file_path(source, width, height)
+        if file_path is None:
+            return None
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file(str(file_path))
+            # mark as recently used
+            os.utime(file_path)
+        except (GLib.Error, OSError):
+            return None
+        return pixbuf
+
+    def store(
+        self, source: str, width: int, height: int, pixbuf: GdkPixbuf.Pixbuf
+    ):
+        """Add an icon to the cache; errors are only logged."""
+        file_path = self._get_file_path(source, width, height)
+        if file_path is None:
+            return
+        temp_path = file_path.with_name(
+            f"{file_path.name}.{threading.get_ident()}.tmp"
+        )
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            pixbuf.savev(str(temp_path), "png", [], [])
+            os.replace(temp_path, file_path)
+            file_size = file_path.stat().st_size
+        except (GLib.Error, OSError) as ex:
+            logger.warning("Cannot cache icon %s: %s", source, ex)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._get_total_size()
+            else:
+                self._size += file_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _get_files(self) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".png"):
+                    try:
+                        files.append((entry.path, entry.stat()))
+                    except OSError:
+                        pass
+        return files
+
+    def _get_total_size(self) -> int:
+        try:
+            return sum(stat.st_size for _, stat in self._get_files())
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """Remove least recently used files, until the cache takes at most
+        3/4 of allowed size, so that it is not cleaned on every write."""
+        try:
+            files = sorted(self._get_files(), key=lambda f: f[1].st_mtime)
+        except OSError:
+            return
+        self._size = sum(stat.st_size for _, stat in files)
+        for file_path, stat in files:
+            if self._size <= self.max_bytes * 3 // 4:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            self._size -= stat.st_size
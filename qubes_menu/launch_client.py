@@ -0,0 +1,91 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Start an app through the running menu, without showing the menu. Apps are
+identified by .desktop file names, for example:
+
+    qubes-app-menu-launch org.qubes-os.vm._personal.firefox.desktop
+    qubes-app-menu-launch --qube work org.qubes-os.vm._work.firefox.desktop
+
+Only Gio is used, so that starting it is fast.
+"""
+import argparse
+import sys
+
+import gi
+
+gi.require_version("Gio", "2.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gio, GLib
+
+from .constants import APP_MENU_BUS_NAME, LAUNCHER_INTERFACE, LAUNCHER_PATH
+
+# how long to wait for the menu, in milliseconds; if the menu is not running,
+# it is started by D-Bus activation and has to load all .desktop files
+CALL_TIMEOUT = 30000
+
+
+def launch_app(app_id: str, qube: str = ""):
+    """Ask the menu to start an app; raises GLib.Error on failure."""
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    connection.call_sync(
+        APP_MENU_BUS_NAME,
+        LAUNCHER_PATH,
+        LAUNCHER_INTERFACE,
+        "LaunchApp",
+        GLib.Variant("(ss)", (app_id, qube)),
+        None,
+        Gio.DBusCallFlags.NONE,
+        CALL_TIMEOUT,
+        None,
+    )
+
+
+def main(args=None):
+    """
+    Start an app from the command line
+    """
+    parser = argparse.ArgumentParser(
+        description="Start an application through the Qubes App Menu"
+    )
+    parser.add_argument(
+        "--qube",
+        "-q",
+        default="",
+        help="qube to start the application in; by default, the "
+        "application's own qube",
+    )
+    parser.add_argument(
+        "app_id", help="name of the .desktop file of the application"
+    )
+    parsed_args = parser.parse_args(args)
+
+    try:
+        launch_app(parsed_args.app_id, parsed_args.qube)
+    except GLib.Error as ex:
+        print(
+            f"Cannot start {parsed_args.app_id}: {ex.message}", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+UI files (glade and CSS) and menu icons, from a compiled GResource bundle.
+The bundle (qubes-menu.gresource, see qubes-menu.gresource.xml) is
+memory-mapped, so nothing has to be read and extracted from package files;
+it is built when packaging, and if it is not there (like when running from
+the source tree), package files are used. Package files are also used if
+QUBES_MENU_NO_GRESOURCE environment variable is set, for example to try out
+changes to UI files without rebuilding the bundle.
+"""
+import importlib.resources
+import logging
+import os
+from typing import Optional
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gio, GLib, Gtk
+
+logger = logging.getLogger("qubes-appmenu")
+
+RESOURCE_FILE = "qubes-menu.gresource"
+RESOURCE_PREFIX = "/org/qubesos/appmenu"
+# menu icons, in hicolor theme layout (scalable/apps/qappmenu-*.svg)
+ICONS_PATH = RESOURCE_PREFIX + "/icons"
+
+_resource: Optional[Gio.Resource] = None
+_loaded = False
+
+
+def register_resources(path: Optional[str] = None) -> bool:
+    """
+    Register the resource bundle, only the first time it is called.
+    :param path: path of the bundle; by default, the one installed with
+    qubes_menu package
+    :return: False if there is no bundle and package files are used
+    """
+    global _resource, _loaded  # pylint: disable=global-statement
+    if _loaded:
+        return _resource is not None
+    _loaded = True
+    if os.environ.get("QUBES_MENU_NO_GRESOURCE"):
+        return False
+    try:
+        if path is None:
+            bundle_ref = importlib.resources.files("qubes_menu") / RESOURCE_FILE
+            with importlib.resources.as_file(bundle_ref) as file_path:
+                _resource = Gio.Resource.load(str(file_path))
+        else:
+            _resource = Gio.Resource.load(path)
+    except GLib.Error as ex:
+        logger.debug("Resource bundle not loaded: %s", ex.message)
+        return False
+    Gio.resources_register(_resource)
+    Gtk.IconTheme.get_default().add_resource_path(ICONS_PATH)
+    return True
+
+
+def unregister_resources():
+    """Stop using the resource bundle; icons already added to the icon
+    theme stay there."""
+    global _resource, _loaded  # pylint: disable=global-statement
+    if _resource is not None:
+        Gio.resources_unregister(_resource)
+    _resource = None
+    _loaded = False
+
+
+def get_resource_path(package: str, name: str) -> Optional[str]:
+    """Path of a package file in the resource bundle; None if there is no
+    bundle or the file is not in it."""
+    if not register_resources():
+        return None
+    path = f"{RESOURCE_PREFIX}/{package}/{name}"
+    try:
+        Gio.resources_get_info(path, Gio.ResourceLookupFlags.NONE)
+    except GLib.Error:
+        return None
+    return path
+
+
+def add_ui_file(builder: Gtk.Builder, package: str, name: str):
+    """Load a glade file into a builder."""
+    resource_path = get_resource_path(package, name)
+    if resource_path:
+        builder.add_from_resource(resource_path)
+        return
+    file_ref = importlib.resources.files(package) / name
+    with importlib.resources.as_file(file_ref) as path:
+        builder.add_from_file(str(path))
+
+
+def load_css(package: str, name: str) -> Gtk.CssProvider:
+    """Load a CSS file (and any files it imports) into a new provider."""
+    provider = Gtk.CssProvider()
+    resource_path = get_resource_path(package, name)
+    if resource_path:
+        provider.load_from_resource(resource_path)
+        return provider
+    file_ref = importlib.resources.files(package) / name
+    with importlib.resources.as_file(file_ref) as path:
+        provider.load_from_path(str(path))
+    return provider
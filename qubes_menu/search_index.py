@@ -0,0 +1,466 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Search index for the App Menu: all known search words kept in a sorted array,
+each with a list of entries it belongs to.
+"""
+
+import bisect
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+# match ranks, the same as returned by utils.text_search
+PREFIX_MATCH = 1.0
+SUBSTRING_MATCH = 0.5
+# best possible rank of a fuzzy (misspelled) match; always below exact matches
+FUZZY_MATCH = 0.25
+
+# shorter search words are never matched fuzzily
+FUZZY_MIN_LENGTH = 3
+# time, in seconds, a single search (for all its words) can spend on fuzzy
+# matching
+FUZZY_TIME_BUDGET = 0.005
+
+# how many recent search results are kept
+RESULT_CACHE_SIZE = 32
+
+# separates tokens in the joined string used for substring searches; cannot
+# appear in search words, as those are split on whitespace
+_SEPARATOR = "\n"
+
+# checked during search; if it returns True, search is abandoned
+CancelCheck = Optional[Callable[[], bool]]
+
+
+class SearchCancelled(Exception):
+    """Search was abandoned, as its results are no longer needed."""
+
+
+def _check_cancelled(is_cancelled: CancelCheck):
+    if is_cancelled and is_cancelled():
+        raise SearchCancelled
+
+
+def fold_text(text: str) -> str:
+    """
+    Fold text for searching: compatibility characters are decomposed
+    (e.g. ligatures), diacritics removed and case folded, so that for
+    example "Paramètres" and "parametres" are the same. Both search words
+    of entries and searched words have to be folded.
+    """
+    if text.isascii():
+        return text.lower()
+    return "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    ).casefold()
+
+
+class SearchIndex:
+    """
+    Index of search words of all entries (e.g. ApplicationInfo objects).
+    Prefix matches are found by binary search in the sorted token array,
+    substring matches by a single scan of all distinct tokens; the cost of
+    a query does not depend on the number of entries sharing a token.
+    Each search word of an entry can have a weight, by which rank of
+    its matches is multiplied. Words are compared as they are, so they
+    should be already folded with fold_text.
+    """
+
+    def __init__(self):
+        # entry: its tokens with their weights
+        self._entry_tokens: Dict[Hashable, Dict[str, float]] = {}
+        # token: entries it belongs to, with its weight in each of them
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._tokens: List[str] = []
+
+        # all tokens joined together, with start offset of each token;
+        # rebuilt lazily after the tokens change
+        self._joined_tokens: str = ""
+        self._token_offsets: List[int] = []
+        self._joined_dirty = False
+
+        # trigram: all tokens containing it; used to find fuzzy match candidates
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._fuzzy = False
+        self.fuzzy_time_budget = FUZZY_TIME_BUDGET
+
+        # increased on every change, can be used to invalidate search results
+        self.version = 0
+
+        # recent search words: results; valid only for the index version
+        # they were found in
+        self._result_cache: OrderedDict[
+            Tuple[str, ...], Dict[Hashable, float]
+        ] = OrderedDict()
+        self._result_cache_version = 0
+
+        self._snapshot: Optional["SearchIndex"] = None
+
+    @property
+    def fuzzy(self) -> bool:
+        """Should words also match tokens with a few typos in them."""
+        return self._fuzzy
+
+    @fuzzy.setter
+    def fuzzy(self, value: bool):
+        if self._fuzzy != value:
+            self._fuzzy = value
+            self.version += 1
+
+    def __len__(self):
+        return len(self._entry_tokens)
+
+    def __contains__(self, key):
+        return key in self._entry_tokens
+
+    def add(
+        self, key: Hashable, words: Union[Iterable[str], Mapping[str, float]]
+    ):
+        """Add an entry with given search words to the index; if the entry
+        is already known, its search words are replaced. Words can be
+        provided with their weights, as a word: weight mapping; otherwise
+        all words have the weight of 1."""
+        if isinstance(words, Mapping):
+            weighted_words = words.items()
+        else:
+            weighted_words = ((word, 1.0) for word in words)
+        tokens: Dict[str, float] = {}
+        for word, weight in weighted_words:
+            if word and tokens.get(word, 0) < weight:
+                tokens[word] = weight
+        if self._entry_tokens.get(key) == tokens:
+            return
+        self.remove(key)
+        self._entry_tokens[key] = tokens
+        for token, weight in tokens.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+                for trigram in _get_trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+                self._joined_dirty = True
+            posting[key] = weight
+        self.version += 1
+
+    def remove(self, key: Hashable):
+        """Remove an entry from the index. Unknown entries are ignored."""
+        tokens = self._entry_tokens.pop(key, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            posting = self._postings[token]
+            del posting[key]
+            if not posting:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+                for trigram in _get_trigrams(token):
+                    trigram_tokens = self._trigrams[trigram]
+                    trigram_tokens.discard(token)
+                    if not trigram_tokens:
+                        del self._trigrams[trigram]
+                self._joined_dirty = True
+        self.version += 1
+
+    def snapshot(self) -> "SearchIndex":
+        """
+        Copy of the current state of the index, safe to search in another
+        thread while this one changes; the same copy is returned until
+        the index changes. A snapshot must only be searched by a single
+        thread at a time.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+        self._update_joined_tokens()
+        snapshot = SearchIndex()
+        snapshot._entry_tokens = dict(self._entry_tokens)
+        snapshot._postings = {
+            token: dict(keys) for token, keys in self._postings.items()
+        }
+        snapshot._tokens = list(self._tokens)
+        snapshot._joined_tokens = self._joined_tokens
+        snapshot._token_offsets = list(self._token_offsets)
+        snapshot._trigrams = {
+            trigram: set(tokens) for trigram, tokens in self._trigrams.items()
+        }
+        snapshot._fuzzy = self._fuzzy
+        snapshot.fuzzy_time_budget = self.fuzzy_time_budget
+        snapshot.version = snapshot._result_cache_version = self.version
+        self._snapshot = snapshot
+        return snapshot
+
+    def search(
+        self, search_words: List[str], is_cancelled: CancelCheck = None
+    ) -> Dict[Hashable, float]:
+        """
+        Find all entries matching all provided (already parsed) search words.
+        Returns a dictionary of entry: match rank; the higher the rank,
+        the better the match. The dictionary can be shared with later
+        searches and must not be modified.
+        If is_cancelled is provided and returns True during the search,
+        SearchCancelled is raised.
+        """
+        if not search_words:
+            return {}
+
+        if self._result_cache_version != self.version:
+            self._result_cache.clear()
+            self._result_cache_version = self.version
+
+        query = tuple(search_words)
+        result = self._result_cache.get(query)
+        if result is not None:
+            self._result_cache.move_to_end(query)
+            return result
+
+        candidates = self._find_narrowing_candidates(query)
+        if candidates is not None:
+            result = self._rank_entries(candidates, query, is_cancelled)
+        else:
+            # fuzzy matching of all words shares a single time budget
+            deadline = time.monotonic() + self.fuzzy_time_budget
+            result = self._search_index(query, is_cancelled, deadline)
+
+        self._result_cache[query] = result
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return result
+
+    def _find_narrowing_candidates(
+        self, query: Tuple[str, ...]
+    ) -> Optional[Dict[Hashable, float]]:
+        """
+        If the query only narrows down a recent one (for example, when
+        the user typed another letter), all its results are among results
+        of the recent query; return those, if checking them is going to be
+        cheaper than searching the whole index. Fuzzy matching is not
+        narrowed, as longer words can allow more typos.
+        """
+        if self._fuzzy:
+            return None
+        for cached_query in reversed(self._result_cache):
+            if len(cached_query) > len(query):
+                continue
+            if all(
+                old_word in new_word
+                for old_word, new_word in zip(cached_query, query)
+            ):
+                candidates = self._result_cache[cached_query]
+                if len(candidates) < len(self._tokens):
+                    return candidates
+                return None
+        return None
+
+    def _rank_entries(
+        self,
+        keys: Iterable[Hashable],
+        query: Tuple[str, ...],
+        is_cancelled: CancelCheck,
+    ) -> Dict[Hashable, float]:
+        """Check provided entries one by one against the query."""
+        result: Dict[Hashable, float] = {}
+        for i, key in enumerate(keys):
+            if i % 256 == 0:
+                _check_cancelled(is_cancelled)
+            tokens = self._entry_tokens[key]
+            rank = 1.0
+            for word in query:
+                word_rank = 0.0
+                for token, weight in tokens.items():
+                    if token.startswith(word):
+                        token_rank = PREFIX_MATCH * weight
+                    elif word in token:
+                        token_rank = SUBSTRING_MATCH * weight
+                    else:
+                        continue
+                    if token_rank > word_rank:
+                        word_rank = token_rank
+                rank *= word_rank
+                if not rank:
+                    break
+            if rank:
+                result[key] = rank
+        return result
+
+    def _search_index(
+        self,
+        query: Tuple[str, ...],
+        is_cancelled: CancelCheck,
+        deadline: Optional[float] = None,
+    ) -> Dict[Hashable, float]:
+        """Search for the query in all tokens; fuzzy matching stops at
+        deadline (see time.monotonic)."""
+        result: Dict[Hashable, float] = {}
+        for i, word in enumerate(query):
+            _check_cancelled(is_cancelled)
+            word_result = self._match_word(word, is_cancelled, deadline)
+            if i == 0:
+                result = word_result
+            else:
+                result = {
+                    key: rank * word_result[key]
+                    for key, rank in result.items()
+                    if key in word_result
+                }
+            if not result:
+                break
+        return result
+
+    def _match_word(
+        self,
+        word: str,
+        is_cancelled: CancelCheck = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[Hashable, float]:
+        """Best match rank of a single search word for all entries it
+        matches, taking weights of matched tokens into account."""
+        result: Dict[Hashable, float] = {}
+        tokens = self._match_tokens(word, is_cancelled, deadline)
+        for token, rank in tokens.items():
+            for key, weight in self._postings[token].items():
+                if result.get(key, 0) < rank * weight:
+                    result[key] = rank * weight
+        return result
+
+    def _match_tokens(
+        self,
+        word: str,
+        is_cancelled: CancelCheck = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """All tokens that contain the word, with their match rank."""
+        matches: Dict[str, float] = {}
+        if not word:
+            return matches
+
+        i = bisect.bisect_left(self._tokens, word)
+        while i < len(self._tokens) and self._tokens[i].startswith(word):
+            matches[self._tokens[i]] = PREFIX_MATCH
+            i += 1
+
+        self._update_joined_tokens()
+        position = self._joined_tokens.find(word)
+        while position >= 0:
+            token_index = bisect.bisect_right(self._token_offsets, position) - 1
+            token = self._tokens[token_index]
+            matches.setdefault(token, SUBSTRING_MATCH)
+            next_token_start = self._token_offsets[token_index] + len(token) + 1
+            position = self._joined_tokens.find(word, next_token_start)
+
+        if self._fuzzy and deadline is not None:
+            fuzzy_matches = self._match_fuzzy(word, deadline, is_cancelled)
+            for token, rank in fuzzy_matches.items():
+                matches.setdefault(token, rank)
+
+        return matches
+
+    def _match_fuzzy(
+        self, word: str, deadline: float, is_cancelled: CancelCheck = None
+    ) -> Dict[str, float]:
+        """Tokens that start with something close to the word, ranked by
+        edit distance. Candidates are tokens sharing enough trigrams with the
+        word, checked in order of most shared trigrams until the deadline
+        (see time.monotonic)."""
+        if len(word) < FUZZY_MIN_LENGTH:
+            return {}
+        max_distance = 1 if len(word) < 6 else 2
+
+        shared: Dict[str, int] = {}
+        for trigram in _get_trigrams(word):
+            if time.monotonic() > deadline:
+                return {}
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        # a single edit changes at most three trigrams
+        min_shared = max(1, len(_get_trigrams(word)) - 3 * max_distance)
+        candidates = [
+            token for token, count in shared.items() if count >= min_shared
+        ]
+        if time.monotonic() > deadline:
+            return {}
+
+        matches: Dict[str, float] = {}
+        for token in sorted(candidates, key=shared.get, reverse=True):
+            if time.monotonic() > deadline:
+                break
+            _check_cancelled(is_cancelled)
+            distance = prefix_edit_distance(word, token, max_distance)
+            if distance is not None:
+                matches[token] = FUZZY_MATCH / (1 + distance)
+        return matches
+
+    def _update_joined_tokens(self):
+        if not self._joined_dirty:
+            return
+        self._joined_tokens = _SEPARATOR.join(self._tokens)
+        self._token_offsets = []
+        offset = 0
+        for token in self._tokens:
+            self._token_offsets.append(offset)
+            offset += len(token) + 1
+        self._joined_dirty = False
+
+
+def _get_trigrams(text: str) -> Set[str]:
+    # padding at start makes short words and first letters count more
+    text = _SEPARATOR * 2 + text
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def prefix_edit_distance(
+    word: str, text: str, max_distance: int
+) -> Optional[int]:
+    """
+    Smallest Levenshtein distance between the word and any prefix of the
+    text, so that incomplete words also match; None if it is larger than
+    max_distance.
+    """
+    previous_row = list(range(len(text) + 1))
+    for i, word_char in enumerate(word, 1):
+        current_row = [i]
+        for j, text_char in enumerate(text, 1):
+            current_row.append(
+                min(
+                    previous_row[j] + 1,
+                    current_row[j - 1] + 1,
+                    previous_row[j - 1] + (word_char != text_char),
+                )
+            )
+        if min(current_row) > max_distance:
+            return None
+        previous_row = current_row
+    distance = min(previous_row)
+    return distance if distance <= max_distance else None
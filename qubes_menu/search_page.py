@@ -19,10 +19,14 @@
 # with this program; if not, see <http://www.gnu.org/licenses/>.
 """Search page for App Menu"""
 
+import heapq
+import logging
 import subprocess
-from typing import Dict, Optional, Set, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Union
 
-from .desktop_file_manager import DesktopFileManager
+from .desktop_file_manager import ApplicationInfo, DesktopFileManager
+from .search_index import SearchIndex, SearchCancelled
 from .custom_widgets import (
     SearchVMRow,
     AnyVMRow,
@@ -33,12 +37,16 @@ from .custom_widgets import (
 from .app_widgets import SearchAppEntry
 from .vm_manager import VMEntry, VMManager
 from .page_handler import MenuPage
-from .utils import load_icon, parse_search
+from .usage_store import UsageStore
+from .state_file import RecentList
+from .utils import load_icon, parse_search, ListItem, update_list_store
 
 import gi
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, GLib, Gio
+
+logger = logging.getLogger("qubes-appmenu")
 
 
 class RecentSearchRow(Gtk.ListBoxRow):
@@ -66,6 +74,31 @@ class RecentSearchRow(Gtk.ListBoxRow):
         self.show_all()
 
 
+# value of the app list model item that is shown as ShowMoreRow
+SHOW_MORE = "show-more"
+
+
+class ShowMoreRow(Gtk.ListBoxRow):
+    """
+    Gtk.ListBoxRow at the end of search results, shown when not all results
+    fit; activating it shows more.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.event_box = HoverEventBox(focus_widget=self)
+        self.add(self.event_box)
+
+        self.label = Gtk.Label(xalign=0)
+        self.event_box.add(self.label)
+        self.get_style_context().add_class("app_entry")
+        self.show_all()
+
+    def set_hidden_count(self, count: int):
+        """Update the number of results that are not shown."""
+        self.label.set_text(f"Show {count} more results...")
+
+
 class RecentSearchManager:
     """Class for managing the list of recent searches."""
 
@@ -77,25 +110,38 @@ class RecentSearchManager:
         search_box: Gtk.SearchEntry,
         enabled: bool,
         other_widgets: list[Gtk.ListBox],
+        history: Optional[RecentList] = None,
     ):
+        """
+        :param history: recent searches, possibly persisted; if not
+        provided, they are kept only in memory
+        """
         self.recent_enabled = enabled
         self.recent_list_box = recent_list
         self.search_box = search_box
+        self.history = history if history is not None else RecentList()
         self.recent_searches: Dict[str, RecentSearchRow] = {}
         self.other_widgets = other_widgets
         self.recent_list_box.connect("row-activated", self._row_clicked)
         self.recent_list_box.connect("row-selected", self._deselect_others)
+        if self.recent_enabled:
+            self._restore_history()
 
     def _deselect_others(self, *_args):
         for widget in self.other_widgets:
             widget.select_row(None)
 
     def set_recent_enabled(self, state):
-        """Set whether recent searches should be stored or not."""
+        """Set whether recent searches should be stored or not. Disabling
+        also removes stored searches."""
         self.recent_enabled = state
         self.recent_searches.clear()
         for child in self.recent_list_box.get_children():
             self.recent_list_box.remove(child)
+        if state:
+            self._restore_history()
+        else:
+            self.history.clear()
 
         label = Gtk.Label()
         label.get_style_context().add_class("placeholder")
@@ -112,6 +158,12 @@ class RecentSearchManager:
 
         self.recent_list_box.set_placeholder(label)
 
+    def _restore_history(self):
+        for text in self.history.get_values()[: self.SEARCH_VALUES_TO_KEEP]:
+            row = RecentSearchRow(text)
+            self.recent_list_box.add(row)
+            self.recent_searches[text] = row
+
     def add_new_recent_search(self, text: str):
         """Add new recent search entry"""
         if not self.recent_enabled:
@@ -119,6 +171,7 @@ class RecentSearchManager:
         if not text:
             return
 
+        self.history.add(text)
         if text in self.recent_searches:
             old_row = self.recent_searches[text]
             # move to top of the list
@@ -126,15 +179,15 @@ class RecentSearchManager:
             self.recent_list_box.insert(old_row, 0)
             return
 
-        if len(self.recent_searches) == self.SEARCH_VALUES_TO_KEEP + 1:
-            last_row: RecentSearchRow = self.recent_list_box.get_children()[-1]
-            del self.recent_searches[last_row.search_text]
-            self.recent_list_box.remove(last_row)
-
         row = RecentSearchRow(text)
         self.recent_list_box.insert(row, 0)
         self.recent_searches[text] = row
 
+        while len(self.history) > self.SEARCH_VALUES_TO_KEEP:
+            last_row = self.recent_searches.pop(self.history.pop_oldest(), None)
+            if last_row:
+                self.recent_list_box.remove(last_row)
+
     def _row_clicked(self, _widget, row: RecentSearchRow):
         self._deselect_others()
         self.recent_list_box.select_row(None)
@@ -153,31 +206,42 @@ class RecentAppsManager:
         vm_manager: VMManager,
         enabled: bool,
         other_widgets: list[Gtk.ListBox],
+        history: Optional[RecentList] = None,
     ):
+        """
+        :param history: names of .desktop files of recently run apps,
+        possibly persisted; if not provided, they are kept only in memory
+        """
         self.recent_enabled = enabled
         self.recent_list_box = recent_list
         self.desktop_file_manager = desktop_file_manager
         self.vm_manager = vm_manager
-        self.recent_apps: list[SearchAppEntry] = []
+        self.history = history if history is not None else RecentList()
+        # .desktop file name: its row
+        self.recent_apps: Dict[str, SearchAppEntry] = {}
         self.recent_list_box.connect("row-activated", self._row_clicked)
-        application = self.recent_list_box.get_toplevel().get_application()
-        if application:
-            # this is a workaround for tests: without Gtk.Application.run,
-            # this object does not exist
-            application.connect("app-started", self.add_new_recent_app)
+        # started apps are passed to add_new_recent_app by the application
         self.other_widgets = other_widgets
         self.recent_list_box.connect("row-selected", self._deselect_others)
+        desktop_file_manager.register_remove_callback(self._app_info_removed)
+        if self.recent_enabled:
+            self._restore_history()
 
     def _deselect_others(self, *_args):
         for widget in self.other_widgets:
             widget.select_row(None)
 
     def set_recent_enabled(self, state):
-        """Set whether recent apps  should be stored or not."""
+        """Set whether recent apps should be stored or not. Disabling also
+        removes stored apps."""
         self.recent_enabled = state
+        for child in self.recent_apps.values():
+            self._remove_row(child)
         self.recent_apps.clear()
-        for child in self.recent_list_box.get_children():
-            self.recent_list_box.remove(child)
+        if state:
+            self._restore_history()
+        else:
+            self.history.clear()
 
         label = Gtk.Label()
         label.get_style_context().add_class("placeholder")
@@ -194,29 +258,49 @@ class RecentAppsManager:
 
         self.recent_list_box.set_placeholder(label)
 
+    def _restore_history(self):
+        for app_path in self.history.get_values()[: self.APPS_TO_KEEP]:
+            # apps that are not available (any more) are skipped
+            app_info = self.desktop_file_manager.get_app_info_by_name(app_path)
+            if app_info:
+                new_entry = SearchAppEntry(app_info, self.vm_manager)
+                self.recent_apps[app_path] = new_entry
+                self.recent_list_box.add(new_entry)
+
+    def _remove_row(self, row: SearchAppEntry):
+        if row.get_parent():
+            self.recent_list_box.remove(row)
+        row.app_info.entries.discard(row)
+
+    def _app_info_removed(self, app_info: ApplicationInfo):
+        # the row itself is removed by the desktop file manager
+        self.recent_apps.pop(app_info.file_path.name, None)
+
     def add_new_recent_app(self, _widget, app_path: str):
         """Add new "recent" record, based on .desktop file path given as string"""
         if not self.recent_enabled:
             return
 
         # only add if not exists, if exists: bump to top and return
-        for app_entry in self.recent_apps:
-            if app_entry.app_info.file_path.name == app_path:
-                self.recent_list_box.remove(app_entry)
-                self.recent_list_box.insert(app_entry, 0)
-                return
+        app_entry = self.recent_apps.get(app_path)
+        if app_entry:
+            self.history.add(app_path)
+            self.recent_list_box.remove(app_entry)
+            self.recent_list_box.insert(app_entry, 0)
+            return
 
         app_info = self.desktop_file_manager.get_app_info_by_name(app_path)
         if not app_info:
             return
+        self.history.add(app_path)
         new_entry = SearchAppEntry(app_info, self.vm_manager)
-        self.recent_apps.append(new_entry)
+        self.recent_apps[app_path] = new_entry
         self.recent_list_box.insert(new_entry, 0)
 
-        if len(self.recent_apps) == self.APPS_TO_KEEP + 1:
-            last_row: SearchAppEntry = self.recent_list_box.get_children()[-1]
-            self.recent_apps.pop(0)
-            self.recent_list_box.remove(last_row)
+        while len(self.history) > self.APPS_TO_KEEP:
+            last_row = self.recent_apps.pop(self.history.pop_oldest(), None)
+            if last_row:
+                self._remove_row(last_row)
 
     def _row_clicked(self, _widget, row: SearchAppEntry):
         self._deselect_others()
@@ -230,19 +314,33 @@ class SearchPage(MenuPage):
     Helper class for managing the Search menu page.
     """
 
+    # how many best search results are shown at first, and how many more
+    # are shown with each click of "show more"
+    RESULTS_TO_SHOW = 50
+
     def __init__(
         self,
         vm_manager: VMManager,
         builder: Gtk.Builder,
         desktop_file_manager: DesktopFileManager,
+        usage_store: Optional[UsageStore] = None,
+        recent_searches: Optional[RecentList] = None,
+        recent_apps: Optional[RecentList] = None,
     ):
         """
         :param vm_manager: VM Manager object
         :param builder: Gtk.Builder with loaded glade object
         :param desktop_file_manager: Desktop File Manager object
+        :param usage_store: store of app usage, used to show frequently
+        and recently used apps first; optional
+        :param recent_searches: recent search texts to show and keep
+        adding to; optional
+        :param recent_apps: .desktop file names of recently run apps to show
+        and keep adding to; optional
         """
         self.vm_manager = vm_manager
         self.desktop_file_manager = desktop_file_manager
+        self.usage_store = usage_store
 
         self.page_widget: Gtk.Grid = builder.get_object("search_page")
 
@@ -256,23 +354,47 @@ class SearchPage(MenuPage):
         self.selected_vm_row: Optional[SearchVMRow] = None
         self.filtered_vms: Set[str] = set()
 
+        # results of the last query to desktop_file_manager's search index;
+        # search text is parsed and searched only once after it changes
+        self._search_text: Optional[str] = None
+        self._search_index_version: Optional[int] = None
+        self._search_words: List[str] = []
+        self._search_results: Dict[ApplicationInfo, float] = {}
+
+        # searching is done in a background thread; every change of search
+        # text increases generation, which cancels any older searches
+        self._search_generation = 0
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="qubes-menu-search"
+        )
+
+        # only best results are shown (see RESULTS_TO_SHOW)
+        self.results_limit = self.RESULTS_TO_SHOW
+        self._shown_results_limit = self.results_limit
+        self._shown_results: List[ApplicationInfo] = []
+        self._hidden_results_count = 0
+        # what shown results were chosen from: search results, selected qube
+        # and the limit
+        self._shown_results_source: Optional[tuple] = None
+
         self.main_notebook = builder.get_object("main_notebook")
 
         self.search_entry.connect("search-changed", self._do_search)
         self.search_entry.connect("key-press-event", self._search_key_press)
 
-        desktop_file_manager.register_callback(self._app_info_callback)
-
-        self.app_list.set_filter_func(self._is_app_fitting)
+        # app list contains rows only for shown results, in order
+        self.app_model = Gio.ListStore.new(ListItem)
+        self.app_list.bind_model(self.app_model, self._create_app_row)
         self.app_list.connect("row-activated", self._app_clicked)
 
+        desktop_file_manager.register_callback(self._app_info_callback)
+        desktop_file_manager.register_remove_callback(self._app_info_callback)
+
         self.vm_list.add(AnyVMRow())
         vm_manager.register_new_vm_callback(self._vm_callback)
         self.vm_list.set_filter_func(self._is_vm_fitting)
 
-        self.app_list.set_sort_func(self._sort_apps)
         self.vm_list.set_sort_func(self._sort_vms)
-        self.app_list.invalidate_sort()
         self.vm_list.invalidate_sort()
 
         self.recent_list: Gtk.ListBox = builder.get_object("search_recent_list")
@@ -294,6 +416,7 @@ class SearchPage(MenuPage):
             self.search_entry,
             self.recent_enabled,
             [self.recent_app_list],
+            recent_searches,
         )
         self.recent_apps_manager = RecentAppsManager(
             self.recent_app_list,
@@ -301,6 +424,7 @@ class SearchPage(MenuPage):
             self.vm_manager,
             self.recent_enabled,
             [self.recent_list],
+            recent_apps,
         )
 
         self.vm_list.connect("row-selected", self._selection_changed)
@@ -324,6 +448,10 @@ class SearchPage(MenuPage):
             button.connect("clicked", self._run_settings)
 
     def _app_clicked(self, _widget, row):
+        if isinstance(row, ShowMoreRow):
+            self._shown_results_limit += self.results_limit
+            self._update_app_model()
+            return
         self.recent_search_manager.add_new_recent_search(
             self.search_entry.get_text()
         )
@@ -337,12 +465,19 @@ class SearchPage(MenuPage):
         subprocess.Popen(["qubes-appmenu-settings"], stdin=subprocess.DEVNULL)
         widget.get_toplevel().get_application().hide_menu()
 
-    def _app_info_callback(self, app_info):
+    def _app_info_callback(self, _app_info):
         """
-        Callback to be performed on all newly loaded ApplicationInfo instances.
+        Callback to be performed on all newly loaded and removed
+        ApplicationInfo instances.
         """
-        entry = SearchAppEntry(app_info, self.vm_manager)
-        self.app_list.add(entry)
+        if self._search_text:
+            self._update_app_model()
+
+    def _create_app_row(self, item: ListItem) -> Gtk.ListBoxRow:
+        """Create a row for an item of the app list model."""
+        if item.value == SHOW_MORE:
+            return ShowMoreRow()
+        return SearchAppEntry(item.value, self.vm_manager)
 
     def _vm_callback(self, vm_entry: VMEntry):
         """
@@ -351,12 +486,72 @@ class SearchPage(MenuPage):
         if vm_entry:
             vm_row = SearchVMRow(vm_entry)
             vm_row.show_all()
-            vm_entry.entries.append(vm_row)
+            vm_entry.entries.add(vm_row)
             self.vm_list.add(vm_row)
             self.vm_list.invalidate_filter()
             self.vm_list.invalidate_sort()
 
     def _do_search(self, *_args):
+        """Search for current search text. Results are shown once they are
+        found in a background thread; if the text changes in the meantime,
+        the search is abandoned."""
+        self._search_generation += 1
+        self._shown_results_limit = self.results_limit
+        search_text = self.search_entry.get_text()
+        if not search_text:
+            self._show_search_results()
+            return
+        self._search_executor.submit(
+            self._search_in_background,
+            self.desktop_file_manager.search_index.snapshot(),
+            search_text,
+            self._search_generation,
+        )
+
+    def _search_in_background(
+        self, snapshot: SearchIndex, search_text: str, generation: int
+    ):
+        """Runs in a background thread: search a snapshot of the search
+        index and pass the results to the main thread."""
+        search_words = parse_search(search_text)
+        try:
+            results = snapshot.search(
+                search_words,
+                is_cancelled=lambda: generation != self._search_generation,
+            )
+        except SearchCancelled:
+            return
+        except Exception:  # pylint: disable=broad-except
+            # nothing waits for the result of this thread, so the error
+            # would be lost otherwise
+            logger.exception("Failed to search for %r", search_text)
+            return
+        GLib.idle_add(
+            self._apply_search_results,
+            generation,
+            search_text,
+            search_words,
+            snapshot.version,
+            results,
+        )
+
+    def _apply_search_results(
+        self,
+        generation: int,
+        search_text: str,
+        search_words: List[str],
+        index_version: int,
+        results: Dict[ApplicationInfo, float],
+    ):
+        if generation == self._search_generation:
+            self._search_text = search_text
+            self._search_words = search_words
+            self._search_index_version = index_version
+            self._search_results = results
+            self._show_search_results()
+        return GLib.SOURCE_REMOVE
+
+    def _show_search_results(self):
         has_search = bool(self.search_entry.get_text())
         self.app_view.set_visible(has_search)
         self.recent_box.set_visible(not has_search)
@@ -416,31 +611,88 @@ class SearchPage(MenuPage):
                 return 1
         return vmentry.sort_order > other_entry.sort_order
 
-    def _sort_apps(self, appentry: SearchAppEntry, other_entry: SearchAppEntry):
-        """
-        # word is delineated by space and - and _
-        Sorting algorithm prefers searched words being found at the start
-        of a word.
-        """
-        search_words = parse_search(self.search_entry.get_text())
-        result_1 = appentry.find_text(search_words)
-        result_2 = other_entry.find_text(search_words)
-        if result_1 > result_2:
-            return -1
-        if result_1 < result_2:
-            return 1
-        return 0
+    def _update_search_results(self):
+        """Query the search index, if search text or the index changed
+        since the last query. Usually results from the background search
+        are already there, but lists can be filtered before they arrive
+        (for example when a new application is added)."""
+        search_text = self.search_entry.get_text()
+        index = self.desktop_file_manager.search_index
+        if (
+            search_text == self._search_text
+            and index.version == self._search_index_version
+        ):
+            return
+        self._search_text = search_text
+        self._search_index_version = index.version
+        self._search_words = parse_search(search_text)
+        self._search_results = index.search(self._search_words)
+
+    def _update_shown_results(self):
+        """Choose best search results to be shown, among results from
+        the selected qube, if any."""
+        self._update_search_results()
+        selected_vm = (
+            self.selected_vm_row.vm_name if self.selected_vm_row else None
+        )
+        usage_version = self.usage_store.version if self.usage_store else None
+        source = (
+            self._search_results,
+            selected_vm,
+            self._shown_results_limit,
+            usage_version,
+        )
+        old_source = self._shown_results_source
+        if (
+            old_source
+            and old_source[0] is source[0]
+            and old_source[1:] == source[1:]
+        ):
+            return
+        self._shown_results_source = source
+
+        results = self._search_results
+        if selected_vm:
+            results = {
+                app_info: rank
+                for app_info, rank in results.items()
+                if app_info.vm_name == selected_vm
+            }
+        if self.usage_store and self.usage_store.usage:
+            results = self._add_usage_to_ranks(results)
+        # best results first; heap selection is faster than sorting all
+        # results, if only some of them are going to be shown
+        if len(results) > self._shown_results_limit:
+            self._shown_results = heapq.nlargest(
+                self._shown_results_limit, results, key=results.get
+            )
+        else:
+            self._shown_results = sorted(results, key=results.get, reverse=True)
+        self._hidden_results_count = len(results) - len(self._shown_results)
+
+    def _add_usage_to_ranks(
+        self, results: Dict[ApplicationInfo, float]
+    ) -> Dict[ApplicationInfo, float]:
+        """Rank frequently and recently used apps higher."""
+        return self.usage_store.add_usage_to_ranks(
+            results, lambda app_info: app_info.file_path.name
+        )
 
-    def _is_app_fitting(self, appentry: SearchAppEntry):
-        """Show only apps matching the current search text and, if
-        qube is selected, matching a selected qube."""
-        if self.selected_vm_row:
-            if appentry.vm_name != self.selected_vm_row.vm_name:
-                return False
+    def _update_app_model(self):
+        """Show best search results in the app list. Rows are created only
+        for results that were not shown before, and only shown rows are
+        highlighted."""
+        self._update_shown_results()
+        values: List[Union[ApplicationInfo, str]] = list(self._shown_results)
+        if self._hidden_results_count:
+            values.append(SHOW_MORE)
+        update_list_store(self.app_model, values)
 
-        search_words = parse_search(self.search_entry.get_text())
-        found_result = appentry.find_text(search_words)
-        return found_result > 0
+        for row in self.app_list.get_children():
+            if isinstance(row, SearchAppEntry):
+                row.highlight(self._search_words)
+            elif isinstance(row, ShowMoreRow):
+                row.set_hidden_count(self._hidden_results_count)
 
     def _is_vm_fitting(self, vmrow: Union[SearchVMRow, AnyVMRow]):
         """Show all vms where a matching app was found, and show
@@ -456,14 +708,12 @@ class SearchPage(MenuPage):
         # refactored
         self.vm_list.select_row(self.vm_list.get_row_at_index(0))
 
-        self.filtered_vms.clear()
+        self._update_app_model()
 
-        self.app_list.invalidate_filter()
-        self.app_list.invalidate_sort()
-
-        for child in self.app_list.get_children():
-            if child.get_mapped():
-                self.filtered_vms.add(child.vm_name)
+        # qubes with any matching apps, including those not shown
+        self.filtered_vms = {
+            app_info.vm_name for app_info in self._search_results
+        }
 
         self.vm_list.invalidate_filter()
         self.vm_list.invalidate_sort()
@@ -528,9 +778,15 @@ class SearchPage(MenuPage):
             self.control_list.show()
             self.control_list.update_visibility(row.vm_entry, apps_tab=False)
             self.control_list.unselect_all()
-        self.app_list.invalidate_filter()
+        self._update_app_model()
         self.app_list.select_row(None)
 
+    def set_results_limit(self, limit: int):
+        """Set how many best search results are shown at first."""
+        self.results_limit = limit
+        self._shown_results_limit = limit
+        self._update_app_model()
+
     def set_sorting_order(self, sort_running: bool = False):
         self.sort_running = sort_running
         self.vm_list.invalidate_sort()
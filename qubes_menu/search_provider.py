@@ -0,0 +1,190 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+D-Bus search provider, answering searches of other programs (like desktop
+shells or launchers) from the search index of the running menu. The
+interface has the shape of GNOME Shell's org.gnome.Shell.SearchProvider2.
+"""
+import heapq
+import logging
+import os
+from typing import Dict, List
+
+from .desktop_file_manager import ApplicationInfo
+from .dbus_service import DBusObject
+from .utils import parse_search
+
+import gi
+
+gi.require_version("Gio", "2.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gio, GLib
+
+logger = logging.getLogger("qubes-appmenu")
+
+SEARCH_PROVIDER_INTERFACE = "org.gnome.Shell.SearchProvider2"
+SEARCH_PROVIDER_PATH = "/org/qubesos/appmenu/SearchProvider"
+
+SEARCH_PROVIDER_XML = f"""
+<node>
+  <interface name="{SEARCH_PROVIDER_INTERFACE}">
+    <method name="GetInitialResultSet">
+      <arg type="as" name="terms" direction="in"/>
+      <arg type="as" name="results" direction="out"/>
+    </method>
+    <method name="GetSubsearchResultSet">
+      <arg type="as" name="previous_results" direction="in"/>
+      <arg type="as" name="terms" direction="in"/>
+      <arg type="as" name="results" direction="out"/>
+    </method>
+    <method name="GetResultMetas">
+      <arg type="as" name="identifiers" direction="in"/>
+      <arg type="aa{{sv}}" name="metas" direction="out"/>
+    </method>
+    <method name="ActivateResult">
+      <arg type="s" name="identifier" direction="in"/>
+      <arg type="as" name="terms" direction="in"/>
+      <arg type="u" name="timestamp" direction="in"/>
+    </method>
+    <method name="LaunchSearch">
+      <arg type="as" name="terms" direction="in"/>
+      <arg type="u" name="timestamp" direction="in"/>
+    </method>
+  </interface>
+</node>
+"""
+
+# at most this many best results are returned
+MAX_RESULTS = 50
+
+
+def _get_result_id(app_info: ApplicationInfo) -> str:
+    return app_info.file_path.name
+
+
+class SearchProvider(DBusObject):
+    """
+    Search provider exported on the D-Bus connection of the menu
+    application. Results are identified by .desktop file names and are
+    found in the in-memory search index, ranked the same way as on the
+    search page, so no files are read when answering.
+    """
+
+    INTROSPECTION_XML = SEARCH_PROVIDER_XML
+    OBJECT_PATH = SEARCH_PROVIDER_PATH
+    METHODS = {
+        "GetInitialResultSet": ("get_initial_result_set", "(as)"),
+        "GetSubsearchResultSet": ("get_subsearch_result_set", "(as)"),
+        "GetResultMetas": ("get_result_metas", "(aa{sv})"),
+        "ActivateResult": ("activate_result", None),
+        "LaunchSearch": ("launch_search", None),
+    }
+
+    def __init__(self, app):
+        """
+        :param app: AppMenu; its desktop_file_manager and usage_store are
+        used once the menu is set up, before that no results are returned
+        """
+        super().__init__()
+        self.app = app
+
+    def _search(self, terms: List[str]) -> Dict[ApplicationInfo, float]:
+        desktop_file_manager = self.app.desktop_file_manager
+        if not desktop_file_manager:
+            return {}
+        search_words = parse_search(" ".join(terms))
+        if not search_words:
+            return {}
+        results = desktop_file_manager.search_index.search(search_words)
+        usage_store = self.app.usage_store
+        if usage_store and usage_store.usage:
+            results = usage_store.add_usage_to_ranks(results, _get_result_id)
+        return results
+
+    @staticmethod
+    def _best_results(results: Dict[ApplicationInfo, float]) -> List[str]:
+        best_results = heapq.nlargest(MAX_RESULTS, results, key=results.get)
+        return [_get_result_id(app_info) for app_info in best_results]
+
+    def get_initial_result_set(self, terms: List[str]) -> List[str]:
+        """Identifiers of best results for search terms."""
+        return self._best_results(self._search(terms))
+
+    def get_subsearch_result_set(
+        self, previous_results: List[str], terms: List[str]
+    ) -> List[str]:
+        """Identifiers of best results for refined search terms, among
+        previous results."""
+        previous = set(previous_results)
+        results = {
+            app_info: rank
+            for app_info, rank in self._search(terms).items()
+            if _get_result_id(app_info) in previous
+        }
+        return self._best_results(results)
+
+    def get_result_metas(
+        self, identifiers: List[str]
+    ) -> List[Dict[str, GLib.Variant]]:
+        """Names, qubes and icons of results; unknown identifiers are
+        skipped."""
+        desktop_file_manager = self.app.desktop_file_manager
+        if not desktop_file_manager:
+            return []
+        metas = []
+        for identifier in identifiers:
+            app_info = desktop_file_manager.get_app_info_by_name(identifier)
+            if not app_info:
+                continue
+            meta = {
+                "id": GLib.Variant("s", identifier),
+                "name": GLib.Variant("s", str(app_info.app_name)),
+                "description": GLib.Variant("s", app_info.vm_label),
+                "qube": GLib.Variant("s", app_info.vm_name),
+            }
+            if app_info.app_icon:
+                meta["gicon"] = GLib.Variant(
+                    "s", self._get_icon_string(app_info.app_icon)
+                )
+            metas.append(meta)
+        return metas
+
+    @staticmethod
+    def _get_icon_string(icon: str) -> str:
+        """Serialized GIcon, for an icon name or path."""
+        if os.path.isabs(icon):
+            return Gio.FileIcon.new(Gio.File.new_for_path(icon)).to_string()
+        return Gio.ThemedIcon.new(icon).to_string()
+
+    def activate_result(self, identifier: str, _terms, _timestamp):
+        """Start the app of a result, in its own qube."""
+        if not self.app.desktop_file_manager:
+            return
+        app_info = self.app.desktop_file_manager.get_app_info_by_name(
+            identifier
+        )
+        if not app_info:
+            logger.warning("Search provider: unknown app %s", identifier)
+            return
+        self.app.launch_app(app_info)
+
+    def launch_search(self, terms: List[str], _timestamp):
+        """Show the menu with search terms on the search page."""
+        self.app.show_search(" ".join(terms))
@@ -0,0 +1,235 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Menu state (like recent searches) kept between restarts of the menu, in
+JSON files in XDG state directory.
+"""
+import abc
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import gi
+
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
+logger = logging.getLogger("qubes-appmenu")
+
+# changes are written to disk this many seconds after the last change
+SAVE_DELAY = 2
+
+
+def get_state_path(file_name: str) -> Path:
+    """Path of a menu state file, in XDG state directory."""
+    state_home = os.environ.get("XDG_STATE_HOME") or os.path.expanduser(
+        "~/.local/state"
+    )
+    return Path(state_home) / "qubes-appmenu" / file_name
+
+
+class StateFile(abc.ABC):
+    """
+    Base class for state kept in a JSON file. Subclasses provide their data
+    with _dump_data and restore it in _load_data. Changes (see
+    _schedule_save) are written to disk in a background thread, a short
+    time after the last change, by atomically replacing the file. Without
+    a path, state is only kept in memory.
+    """
+
+    # files with other versions are ignored
+    FILE_VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        # increased on every change
+        self.version = 0
+        self._save_source: Optional[int] = None
+        self._write_lock = threading.Lock()
+        # writes of data older than this are abandoned, so that a write
+        # still waiting in the background does not undo clear() or a newer
+        # write (like the one on shutdown)
+        self._min_write_version = 0
+
+    def load(self):
+        """Load state from disk, if the file exists and is correct."""
+        data = None
+        if self.path:
+            try:
+                with open(self.path, encoding="utf-8") as file:
+                    data = json.load(file)
+                if data.get("version") != self.FILE_VERSION:
+                    raise ValueError(f"unknown version: {data.get('version')}")
+                self._load_data(data)
+                self.version += 1
+                return
+            except FileNotFoundError:
+                pass
+            except (
+                OSError,
+                ValueError,
+                TypeError,
+                KeyError,
+                AttributeError,
+            ) as ex:
+                logger.warning("Cannot load %s: %s", self.path, ex)
+        self._load_data(None)
+        self.version += 1
+
+    @abc.abstractmethod
+    def _load_data(self, data: Optional[Dict[str, Any]]):
+        """Restore state from data read from the file; None means there
+        is no (correct) file. Raise ValueError, TypeError or KeyError if
+        the data is incorrect."""
+
+    @abc.abstractmethod
+    def _dump_data(self) -> Dict[str, Any]:
+        """Current state, to be written to the file."""
+
+    def clear(self):
+        """Forget all state and remove the file."""
+        self._cancel_save()
+        self._load_data(None)
+        self.version += 1
+        with self._write_lock:
+            self._min_write_version = self.version
+            if not self.path:
+                return
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as ex:
+                logger.warning("Cannot remove %s: %s", self.path, ex)
+
+    def save(self):
+        """Write state to disk now."""
+        self._cancel_save()
+        if self.path:
+            self._write(self._serialize(), self.version)
+
+    def flush(self):
+        """Write any pending changes to disk now."""
+        if self._save_source is not None:
+            self.save()
+
+    def _schedule_save(self):
+        """Mark state as changed; it will be written a bit later, so that
+        many changes lead to a single write."""
+        self.version += 1
+        if not self.path:
+            return
+        self._cancel_save()
+        self._save_source = GLib.timeout_add_seconds(
+            SAVE_DELAY, self._save_in_background
+        )
+
+    def _cancel_save(self):
+        if self._save_source is not None:
+            GLib.source_remove(self._save_source)
+            self._save_source = None
+
+    def _save_in_background(self):
+        self._save_source = None
+        data = self._serialize()
+        threading.Thread(
+            target=self._write,
+            args=(data, self.version),
+            name="qubes-menu-state",
+        ).start()
+        return GLib.SOURCE_REMOVE
+
+    def _serialize(self) -> str:
+        data = self._dump_data()
+        data["version"] = self.FILE_VERSION
+        return json.dumps(data)
+
+    def _write(self, data: str, version: int):
+        """Atomically replace the file with provided contents."""
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with self._write_lock:
+            if version < self._min_write_version:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as file:
+                    file.write(data)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as ex:
+                logger.warning("Cannot save %s: %s", self.path, ex)
+                return
+            self._min_write_version = version
+
+
+class RecentList(StateFile):
+    """
+    Recently used values (like search texts), without duplicates and
+    ordered from the least recently used. All operations are O(1);
+    the owner decides how many values to keep (see pop_oldest).
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path)
+        self._values: OrderedDict[str, None] = OrderedDict()
+        self.load()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._values
+
+    def get_values(self) -> List[str]:
+        """All values, the most recently used first."""
+        return list(reversed(self._values))
+
+    def add(self, value: str):
+        """Add a value as the most recently used one."""
+        self._values[value] = None
+        self._values.move_to_end(value)
+        self._schedule_save()
+
+    def remove(self, value: str):
+        """Remove a value; unknown values are ignored."""
+        if self._values.pop(value, False) is None:
+            self._schedule_save()
+
+    def pop_oldest(self) -> str:
+        """Remove and return the least recently used value."""
+        value, _ = self._values.popitem(last=False)
+        self._schedule_save()
+        return value
+
+    def _load_data(self, data: Optional[Dict[str, Any]]):
+        self._values = OrderedDict()
+        if data:
+            for value in data["values"]:
+                if not isinstance(value, str):
+                    raise TypeError(f"incorrect value: {value!r}")
+                self._values[value] = None
+
+    def _dump_data(self) -> Dict[str, Any]:
+        return {"values": list(self._values)}
@@ -30,6 +30,20 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk
 
+from .. import utils
+
+
+@pytest.fixture(autouse=True)
+def isolated_icon_cache(tmp_path, monkeypatch):
+    """Keep icons rasterized by tests out of the real user cache"""
+    cache_home = tmp_path / "xdg-cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    # the shared disk cache is created on import, before this fixture runs
+    monkeypatch.setattr(
+        utils.disk_icon_cache, "path", cache_home / "qubes-appmenu" / "icons"
+    )
+    monkeypatch.setattr(utils.disk_icon_cache, "_size", None)
+
 
 @pytest.fixture
 def test_qapp():
@@ -38,12 +52,29 @@ def test_qapp():
 
 @pytest.fixture
 def test_builder():
-    """Gtk builder with correct menu glade file"""
+    """Gtk builder with correct menu glade files, with all pages"""
     builder = Gtk.Builder()
 
-    glade_path = importlib.resources.files("qubes_menu") / "qubes-menu.glade"
-    with importlib.resources.as_file(glade_path) as path:
-        builder.add_from_file(str(path))
+    for glade_name in [
+        "qubes-menu.glade",
+        "qubes-menu-search-page.glade",
+        "qubes-menu-app-page.glade",
+        "qubes-menu-favorites-page.glade",
+        "qubes-menu-settings-page.glade",
+    ]:
+        glade_path = importlib.resources.files("qubes_menu") / glade_name
+        with importlib.resources.as_file(glade_path) as path:
+            builder.add_from_file(str(path))
+
+    # pages are in the menu window, as in AppMenu.get_page
+    for page_name in [
+        "search_page",
+        "app_page",
+        "favorites_page",
+        "settings_page",
+    ]:
+        placeholder = builder.get_object(page_name + "_placeholder")
+        placeholder.pack_start(builder.get_object(page_name), True, True, 0)
 
     return builder
 
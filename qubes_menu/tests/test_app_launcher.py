@@ -0,0 +1,158 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+import pytest
+
+from ..desktop_file_manager import DesktopFileManager
+from ..app_launcher import AppLauncher
+from ..launch_client import main as launch_main
+from qubesadmin.tests.mock_app import MockQube
+
+import gi
+
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
+
+def _get_launcher(test_qapp, test_desktop_file_path):
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+    app = mock.Mock()
+    app.qapp = test_qapp
+    app.desktop_file_manager = desktop_file_manager
+    app.launch_app.return_value = True
+    return AppLauncher(app)
+
+
+def test_launch_app(test_qapp, test_desktop_file_path):
+    launcher = _get_launcher(test_qapp, test_desktop_file_path)
+    app_info = launcher.app.desktop_file_manager.get_app_info_by_name(
+        "test1.desktop"
+    )
+
+    launcher.launch_app("test1.desktop", "")
+    launcher.app.launch_app.assert_called_with(app_info, None)
+
+    launcher.launch_app("test1.desktop", "test-vm")
+    launcher.app.launch_app.assert_called_with(
+        app_info, test_qapp.domains["test-vm"]
+    )
+
+    with pytest.raises(ValueError):
+        launcher.launch_app("unknown.desktop", "")
+    with pytest.raises(ValueError):
+        launcher.launch_app("test1.desktop", "no-such-qube")
+
+    launcher.app.launch_app.return_value = False
+    with pytest.raises(ValueError):
+        launcher.launch_app("test1.desktop", "test-vm")
+
+
+def test_launch_app_other_qube(test_qapp, test_desktop_file_path):
+    test_qapp._qubes["disp1233"] = MockQube(
+        name="disp1233",
+        qapp=test_qapp,
+        klass="DispVM",
+        template="test-vm",
+        auto_cleanup=True,
+    )
+    test_qapp.update_vm_calls()
+    launcher = _get_launcher(test_qapp, test_desktop_file_path)
+
+    # dom0 apps are never started in qubes
+    with pytest.raises(ValueError):
+        launcher.launch_app("test3.desktop", "test-vm")
+    # apps of other qubes neither
+    with pytest.raises(ValueError):
+        launcher.launch_app("test1.desktop", "test-red")
+    with pytest.raises(ValueError):
+        launcher.launch_app("test2.desktop", "disp1233")
+    launcher.app.launch_app.assert_not_called()
+
+    # but apps of a disposable template can be started in its disposables
+    launcher.launch_app("test1.desktop", "disp1233")
+    launcher.app.launch_app.assert_called_once_with(
+        launcher.app.desktop_file_manager.get_app_info_by_name(
+            "test1.desktop"
+        ),
+        test_qapp.domains["disp1233"],
+    )
+
+
+def test_launch_app_dbus_call(test_qapp, test_desktop_file_path):
+    launcher = _get_launcher(test_qapp, test_desktop_file_path)
+    invocation = mock.Mock()
+
+    launcher._handle_method_call(
+        None,
+        None,
+        None,
+        None,
+        "LaunchApp",
+        GLib.Variant("(ss)", ("test2.desktop", "")),
+        invocation,
+    )
+    invocation.return_value.assert_called_once_with(None)
+    assert launcher.app.launch_app.call_count == 1
+
+    launcher._handle_method_call(
+        None,
+        None,
+        None,
+        None,
+        "LaunchApp",
+        GLib.Variant("(ss)", ("unknown.desktop", "")),
+        invocation,
+    )
+    invocation.return_dbus_error.assert_called_once()
+    assert (
+        invocation.return_dbus_error.call_args[0][0]
+        == "org.freedesktop.DBus.Error.InvalidArgs"
+    )
+
+    # menu not set up yet
+    launcher.app.desktop_file_manager = None
+    invocation.reset_mock()
+    launcher._handle_method_call(
+        None,
+        None,
+        None,
+        None,
+        "LaunchApp",
+        GLib.Variant("(ss)", ("test2.desktop", "")),
+        invocation,
+    )
+    assert (
+        invocation.return_dbus_error.call_args[0][0]
+        == "org.freedesktop.DBus.Error.Failed"
+    )
+
+
+def test_launch_client(capsys):
+    with mock.patch("qubes_menu.launch_client.launch_app") as mock_launch:
+        assert launch_main(["--qube", "work", "firefox.desktop"]) == 0
+        mock_launch.assert_called_once_with("firefox.desktop", "work")
+
+        mock_launch.side_effect = GLib.Error("Unknown application")
+        assert launch_main(["firefox.desktop"]) == 1
+        assert "Unknown application" in capsys.readouterr().err
@@ -164,3 +164,43 @@ def test_settings_app_page(test_desktop_file_path, test_qapp, test_builder):
 
     for row in settings_page.app_list.get_children():
         assert not row.app_info.vm
+
+
+def test_app_page_app_list(test_desktop_file_path, test_qapp, test_builder):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    app_page = AppPage(vm_manager, test_builder, desktop_file_manager)
+    app_page.toggle_buttons.apps_toggle.set_active(True)
+
+    # no rows exist before a qube is selected
+    assert not app_page.app_list.get_children()
+
+    app_page.vm_list.select_row(
+        [
+            row
+            for row in app_page.vm_list.get_children()
+            if row.vm_name == "test-vm"
+        ][0]
+    )
+    rows = app_page.app_list.get_children()
+    assert [row.app_info.app_name for row in rows] == ["XTerm"]
+
+    app_page.vm_list.select_row(
+        [
+            row
+            for row in app_page.vm_list.get_children()
+            if row.vm_name == "test-red"
+        ][0]
+    )
+    rows = app_page.app_list.get_children()
+    assert [row.app_info.app_name for row in rows] == ["Firefox"]
+
+    # removed apps disappear from the list
+    desktop_file_manager.remove_file(test_desktop_file_path / "test2.desktop")
+    assert not app_page.app_list.get_children()
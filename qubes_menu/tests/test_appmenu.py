@@ -17,7 +17,12 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+import pytest
+
 from ..appmenu import AppMenu
+from ..search_page import SearchPage
 from qubesadmin.tests.mock_app import (
     MockQubesComplete,
     MockDispatcher,
@@ -35,6 +40,7 @@ def test_app_menu_conffeatures():
     qapp._qubes["dom0"].features["menu-sort-running"] = "1"
     qapp._qubes["dom0"].features["menu-position"] = ""
     qapp._qubes["dom0"].features["menu-disable-recent"] = "1"
+    qapp._qubes["dom0"].features["menu-fuzzy-search"] = "1"
     qapp.update_vm_calls()
 
     dispatcher = MockDispatcher(qapp)
@@ -47,6 +53,7 @@ def test_app_menu_conffeatures():
     assert app_menu.sort_running
     assert app_menu.appmenu_position == "mouse"
     assert app_menu.disable_recent == True
+    assert app_menu.desktop_file_manager.search_index.fuzzy
 
 
 def test_app_menu_conffeatures_default():
@@ -76,6 +83,7 @@ def test_app_menu_conffeatures_default():
     assert not app_menu.sort_running
     assert app_menu.appmenu_position == "mouse"
     assert not app_menu.disable_recent
+    assert not app_menu.desktop_file_manager.search_index.fuzzy
 
 
 def test_appmenu_options():
@@ -152,3 +160,58 @@ def test_appmenu_positioning():
         app_menu.main_window.get_screen().get_height()
         - app_menu.main_window.get_size().height,
     )
+
+
+def test_appmenu_lazy_pages():
+    qapp = MockQubesComplete()
+    qapp._qubes["dom0"].features["menu-initial-page"] = "favorites_page"
+    qapp._qubes["dom0"].features["menu-sort-running"] = "1"
+    qapp.update_vm_calls()
+
+    dispatcher = MockDispatcher(qapp)
+    app_menu = AppMenu(qapp, dispatcher)
+
+    app_menu.perform_setup()
+
+    # only the initial page is built at start
+    assert list(app_menu.handlers) == ["favorites_page"]
+
+    # other pages are built when switched to, with current settings
+    app_menu.main_notebook.set_current_page(1)
+    assert set(app_menu.handlers) == {"favorites_page", "app_page"}
+    app_page = app_menu.handlers["app_page"]
+    assert app_page.sort_running
+    assert app_page.page_widget.get_parent() is app_menu.builder.get_object(
+        "app_page_placeholder"
+    )
+    assert app_menu.get_page("app_page") is app_page
+
+
+def test_appmenu_lazy_search_page(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    qapp = MockQubesComplete()
+    qapp._qubes["dom0"].features["menu-initial-page"] = "favorites_page"
+    qapp.update_vm_calls()
+
+    dispatcher = MockDispatcher(qapp)
+    app_menu = AppMenu(qapp, dispatcher)
+
+    app_menu.perform_setup()
+    assert "search_page" not in app_menu.handlers
+
+    # apps started before the search page is built are still recent
+    app_menu.emit("app-started", "test1.desktop")
+    assert app_menu.recent_apps.get_values() == ["test1.desktop"]
+
+    # a failed build is not registered, and can be retried
+    with mock.patch.object(
+        SearchPage, "initialize_page", side_effect=RuntimeError("failed")
+    ):
+        with pytest.raises(RuntimeError):
+            app_menu.get_page("search_page")
+    assert "search_page" not in app_menu.handlers
+
+    search_page = app_menu.get_page("search_page")
+    assert app_menu.handlers["search_page"] is search_page
+    assert search_page.page_widget.get_toplevel() is app_menu.main_window
+    assert search_page.recent_apps_manager.history is app_menu.recent_apps
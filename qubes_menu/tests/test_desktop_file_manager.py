@@ -18,14 +18,32 @@
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
 
+import gc
+import tracemalloc
+
 import pytest
 from xdg.DesktopEntry import DesktopEntry
-from ..desktop_file_manager import ApplicationInfo, DesktopFileManager
+from ..app_widgets import BaseAppEntry
+from ..desktop_file_manager import (
+    ApplicationInfo,
+    DesktopFileManager,
+    NAME_WEIGHT,
+    GENERIC_NAME_WEIGHT,
+    EXEC_WEIGHT,
+    CATEGORIES_WEIGHT,
+    COMMENT_WEIGHT,
+)
 from ..settings_page import SettingsPage
+from ..constants import DISP_TEXT
 from qubesadmin.tests import TestVM
 from unittest.mock import Mock
 import asyncio
 
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+
 from .conftest import asyncio_wrap
 
 correct_bytes = b"""
@@ -121,6 +139,9 @@ def test_appinfo_correct_file(tmp_path, test_qapp):
     assert str(app_info.vm) == str(TestVM("test-vm"))
     assert app_info.app_icon == "/tmp/test.png"
     assert app_info.vm_icon == "appvm-green"
+    assert app_info.vm_name == "test-vm"
+    assert app_info.vm_label == "test-vm"
+    assert app_info.qube_sort_name == "test-vm | XTerm"
 
     assert (
         app_info.entry_name == "XTerm" or app_info.entry_name == "test.desktop"
@@ -178,6 +199,8 @@ def test_file_dvmtemplate(tmp_path, test_qapp):
     assert app_info.app_icon == "/test/firefox.png"
     assert app_info.vm_icon == "templatevm-green"
     assert app_info.disposable
+    assert app_info.vm_name == "default-dvm"
+    assert app_info.vm_label == DISP_TEXT + "default-dvm"
     assert app_info.is_qubes_specific()
     assert app_info.get_command_for_vm("default-dvm") == [
         "qvm-run",
@@ -210,6 +233,9 @@ def test_appinfo_local(tmp_path, test_qapp):
     assert app_info_non_qubes.vm is None
     assert app_info_qubes.vm_icon is None
     assert app_info_non_qubes.vm_icon is None
+    assert app_info_qubes.vm_name == "dom0"
+    assert app_info_qubes.vm_label == str(test_qapp.local_name)
+    assert app_info_qubes.qube_sort_name == " | Backup Qubes"
 
     assert app_info_qubes.app_icon == "qubes-manager"
     assert app_info_non_qubes.app_icon == "xfce4-power-manager-settings"
@@ -230,6 +256,38 @@ def test_appinfo_local(tmp_path, test_qapp):
     ]
 
 
+def test_appinfo_search_words(tmp_path, test_qapp):
+    file_path = tmp_path / "test.desktop"
+    file_path.write_bytes(correct_bytes)
+    local_file_path = tmp_path / "test2.desktop"
+    local_file_path.write_bytes(correct_local_non_qubes)
+
+    app_info = ApplicationInfo(test_qapp, file_path)
+    app_info.load_data(DesktopEntry(file_path))
+    local_app_info = ApplicationInfo(test_qapp, local_file_path)
+    local_app_info.load_data(DesktopEntry(local_file_path))
+
+    assert app_info.generic_name == "Terminal"
+    assert app_info.exec_name == "xterm"
+    assert local_app_info.exec_name == "xfce4-power-manager-settings"
+
+    search_words = app_info.search_words
+    # name and qube name are the most important
+    assert search_words["xterm"] == NAME_WEIGHT
+    assert search_words["test"] == NAME_WEIGHT
+    assert search_words["terminal"] == GENERIC_NAME_WEIGHT
+    assert search_words["terminalemulator"] == CATEGORIES_WEIGHT
+    assert search_words["emulator"] == COMMENT_WEIGHT
+    # vendor categories and short words from comments are not searchable
+    assert "x-qubes-vm" not in search_words
+    assert "the" not in search_words
+    assert "x" not in search_words
+
+    search_words = local_app_info.search_words
+    assert search_words["xfce4-power-manager-settings"] == EXEC_WEIGHT
+    assert search_words["settings"] == EXEC_WEIGHT
+
+
 def test_file_qubes_virtual(tmp_path, test_qapp):
     qubes_virtual = b"""
 [Desktop Entry]
@@ -317,7 +375,7 @@ async def test_file_manager(tmp_path, test_qapp):
     def add_entry(en):
         m = Mock()
         entry_list.append(m)
-        en.entries.append(m)
+        en.entries.add(m)
 
     dfm.register_callback(add_entry)
 
@@ -379,3 +437,40 @@ def test_filter_system(tmp_path, test_qapp):
     assert not SettingsPage._filter_qubes_tools(row_other)
     assert not SettingsPage._filter_system_settings(row_other)
     assert SettingsPage._filter_other(row_other)
+
+
+def test_entries_released_under_churn(tmp_path, test_qapp):
+    file_path = tmp_path / "test.desktop"
+    file_path.write_bytes(correct_bytes)
+    app_info = ApplicationInfo(test_qapp, file_path)
+    app_info.load_data(DesktopEntry(file_path))
+
+    app_list = Gtk.ListBox()
+
+    def churn(count):
+        for _ in range(count):
+            entry = BaseAppEntry(app_info)
+            app_list.add(entry)
+            app_list.remove(entry)
+            del entry
+        gc.collect()
+
+    # warm up any caches before measuring
+    churn(50)
+    assert len(app_info.entries) == 0
+
+    tracemalloc.start()
+    try:
+        churn(100)
+        baseline, _ = tracemalloc.get_traced_memory()
+        churn(1000)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # dead rows are pruned and no longer receive updates
+    assert len(app_info.entries) == 0
+    app_info.load_data(DesktopEntry(file_path))
+
+    # ten times more rows created should not mean more memory retained
+    assert current - baseline < 64 * 1024
@@ -22,6 +22,11 @@ from ..app_widgets import BaseAppEntry, FavoritesAppEntry
 from ..desktop_file_manager import ApplicationInfo
 from unittest.mock import Mock, patch
 
+import gi
+
+gi.require_version("Gdk", "3.0")
+from gi.repository import Gdk
+
 
 def test_add_to_favorites(tmp_path, test_qapp):
     app_info = ApplicationInfo(test_qapp, tmp_path)
@@ -156,3 +161,29 @@ def test_add_to_favorites_dom0(tmp_path, test_qapp):
     second_base_entry.menu._add_to_favorites()
     fav_entry._remove_from_favorites()
     assert vm.features.get("menu-favorites") == "org.second.app"
+
+
+def test_lazy_menu_and_drag_source(tmp_path, test_qapp):
+    app_info = ApplicationInfo(test_qapp, tmp_path)
+    app_info.vm = test_qapp.domains["test-vm"]
+    app_info.app_name = "Test App"
+    app_info.entry_name = "org.test.app"
+    app_info.app_icon = None
+    app_info.vm_icon = None
+
+    fav_entry = FavoritesAppEntry(app_info, Mock())
+    assert fav_entry._menu is None
+    assert fav_entry.drag_source_get_target_list() is None
+
+    # left click makes the row draggable, but does not create the menu
+    event = Gdk.Event.new(Gdk.EventType.BUTTON_PRESS)
+    event.button = 1
+    fav_entry.event_box.emit("button-press-event", event)
+    assert fav_entry.drag_source_get_target_list() is not None
+    assert fav_entry._menu is None
+
+    # the menu is created once and has the remove option
+    menu = fav_entry.menu
+    assert fav_entry.menu is menu
+    labels = [item.get_label() for item in menu.get_children()]
+    assert labels == ["Add to favorites", "Remove from favorites"]
@@ -0,0 +1,255 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+import os
+import time
+from unittest import mock
+
+from ..icon_cache import (
+    DiskIconCache,
+    IconCache,
+    IconLoader,
+    decode_icon_file,
+    get_file_mtime,
+)
+from .. import utils
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GdkPixbuf, GLib
+
+
+def _make_pixbuf(size: int, color: int = 0xFF0000FF) -> GdkPixbuf.Pixbuf:
+    pixbuf = GdkPixbuf.Pixbuf.new(
+        GdkPixbuf.Colorspace.RGB, True, 8, size, size
+    )
+    pixbuf.fill(color)
+    return pixbuf
+
+
+def test_icon_cache_lru():
+    pixbuf = _make_pixbuf(16)
+    cache = IconCache(max_bytes=pixbuf.get_byte_length() * 2)
+
+    cache.put("a", pixbuf)
+    cache.put("b", _make_pixbuf(16))
+    assert cache.get("a") is pixbuf
+    # "b" is the least recently used one
+    cache.put("c", _make_pixbuf(16))
+    assert cache.get("b") is None
+    assert cache.get("a") is pixbuf
+    assert len(cache) == 2
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["bytes"] == pixbuf.get_byte_length() * 2
+
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_icon_cache_file_change(tmp_path):
+    path = str(tmp_path / "icon.png")
+    _make_pixbuf(16).savev(path, "png", [], [])
+    cache = IconCache()
+
+    pixbuf = _make_pixbuf(16)
+    cache.put(path, pixbuf, get_file_mtime(path))
+    assert cache.get(path, path) is pixbuf
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert cache.get(path, path) is None
+
+    # icons from the theme are not checked
+    assert get_file_mtime("firefox") is None
+
+
+def test_icon_cache_theme_change():
+    cache = IconCache()
+    icon_theme = Gtk.IconTheme()
+    cache.watch_icon_theme(icon_theme)
+    cache.put("a", _make_pixbuf(16))
+    icon_theme.emit("changed")
+    assert cache.get("a") is None
+
+
+def test_load_icon_cached(tmp_path):
+    path = str(tmp_path / "icon.png")
+    _make_pixbuf(48).savev(path, "png", [], [])
+
+    with mock.patch.object(utils, "icon_cache", IconCache()):
+        icon = utils.load_icon(path, None, 24)
+        assert icon.get_width() == 24
+        assert utils.load_icon(path, None, 24) is icon
+        assert utils.load_icon(path, None, 32) is not icon
+
+        # missing icons are not cached, they may appear later
+        missing = str(tmp_path / "missing.png")
+        assert utils.load_icon(missing, None, 24).get_width() == 24
+        _make_pixbuf(48).savev(missing, "png", [], [])
+        assert utils.load_icon(missing, None, 24).get_pixels() == (
+            icon.get_pixels()
+        )
+        assert utils.icon_cache.get_stats()["hits"] == 1
+
+
+def _wait_for_icons(loader: IconLoader):
+    deadline = time.monotonic() + 5
+    while loader.is_loading() and time.monotonic() < deadline:
+        GLib.MainContext.default().iteration(False)
+    assert not loader.is_loading()
+
+
+def test_icon_loader(tmp_path):
+    path = str(tmp_path / "icon.png")
+    _make_pixbuf(48).savev(path, "png", [], [])
+    icon_theme = Gtk.IconTheme.get_default()
+    cache = IconCache()
+    loader = IconLoader(cache)
+
+    images = [Gtk.Image() for _ in range(3)]
+    with mock.patch.object(
+        GdkPixbuf.Pixbuf,
+        "new_from_file_at_size",
+        wraps=GdkPixbuf.Pixbuf.new_from_file_at_size,
+    ) as mock_decode:
+        for image in images:
+            loader.set_icon(image, icon_theme, path, 24, 24)
+            # placeholder until the icon is decoded
+            assert image.get_pixbuf().get_width() == 24
+        assert loader.is_loading()
+        _wait_for_icons(loader)
+        # one decode for all images
+        mock_decode.assert_called_once()
+
+    pixbuf = cache.get((path, 24, 24), path)
+    assert pixbuf is not None
+    for image in images:
+        assert image.get_pixbuf() is pixbuf
+
+    # cached icons are shown right away
+    image = Gtk.Image()
+    loader.set_icon(image, icon_theme, path, 24, 24)
+    assert not loader.is_loading()
+    assert image.get_pixbuf() is pixbuf
+
+
+def test_icon_loader_changed_request(tmp_path):
+    path = str(tmp_path / "icon.png")
+    other_path = str(tmp_path / "other.png")
+    _make_pixbuf(48).savev(path, "png", [], [])
+    _make_pixbuf(48, 0x00FF00FF).savev(other_path, "png", [], [])
+    icon_theme = Gtk.IconTheme.get_default()
+    loader = IconLoader(IconCache())
+
+    # only the last requested icon is shown
+    image = Gtk.Image()
+    loader.set_icon(image, icon_theme, path, 24, 24)
+    loader.set_icon(image, icon_theme, other_path, 24, 24)
+    _wait_for_icons(loader)
+    assert image.get_pixbuf() is loader.cache.get((other_path, 24, 24))
+
+    # missing icons are shown as blank right away
+    loader.set_icon(image, icon_theme, str(tmp_path / "missing.png"), 24, 24)
+    assert not loader.is_loading()
+    assert image.get_pixbuf().get_width() == 24
+
+
+def test_icon_loader_decode_error(tmp_path):
+    path = str(tmp_path / "icon.png")
+    _make_pixbuf(48).savev(path, "png", [], [])
+    icon_theme = Gtk.IconTheme.get_default()
+    loader = IconLoader(IconCache())
+
+    # unexpected errors still release waiting images, with a blank icon
+    image = Gtk.Image()
+    with mock.patch(
+        "qubes_menu.icon_cache.decode_icon_file",
+        side_effect=RuntimeError("broken decoder"),
+    ):
+        loader.set_icon(image, icon_theme, path, 24, 24)
+        _wait_for_icons(loader)
+    assert image.get_pixbuf().get_width() == 24
+    assert loader.cache.get((path, 24, 24), path) is None
+
+
+SVG_ICON = b"""<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="48" height="48">
+  <rect width="48" height="48" fill="#ff0000"/>
+</svg>
+"""
+
+
+def test_disk_icon_cache(tmp_path):
+    svg_path = str(tmp_path / "icon.svg")
+    with open(svg_path, "wb") as file:
+        file.write(SVG_ICON)
+    disk_cache = DiskIconCache(tmp_path / "cache")
+
+    assert disk_cache.load(svg_path, 24, 24) is None
+    pixbuf = decode_icon_file(svg_path, 24, 24, disk_cache)
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+    with mock.patch.object(
+        GdkPixbuf.Pixbuf, "new_from_file_at_size"
+    ) as mock_decode:
+        cached = decode_icon_file(svg_path, 24, 24, disk_cache)
+        mock_decode.assert_not_called()
+    assert cached.get_width() == 24
+    assert cached.get_pixels() == pixbuf.get_pixels()
+
+    # other sizes and changed files are not read from the cache
+    assert disk_cache.load(svg_path, 32, 32) is None
+    stat = os.stat(svg_path)
+    os.utime(svg_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert disk_cache.load(svg_path, 24, 24) is None
+
+    # only SVG icons are cached
+    png_path = str(tmp_path / "icon.png")
+    pixbuf.savev(png_path, "png", [], [])
+    decode_icon_file(png_path, 24, 24, disk_cache)
+    assert disk_cache.load(png_path, 24, 24) is None
+
+
+def test_disk_icon_cache_eviction(tmp_path):
+    svg_path = str(tmp_path / "icon.svg")
+    with open(svg_path, "wb") as file:
+        file.write(SVG_ICON)
+    disk_cache = DiskIconCache(tmp_path / "cache")
+    decode_icon_file(svg_path, 16, 16, disk_cache)
+    file_size = os.path.getsize(
+        os.path.join(tmp_path / "cache", os.listdir(tmp_path / "cache")[0])
+    )
+    disk_cache.max_bytes = file_size * 4
+
+    for size in range(17, 24):
+        decode_icon_file(svg_path, size, size, disk_cache)
+        # make sure the order of use is visible in mtimes
+        time.sleep(0.01)
+    cached_files = os.listdir(tmp_path / "cache")
+    assert 0 < len(cached_files) <= 4
+    # most recently added icons are kept
+    assert disk_cache.load(svg_path, 23, 23) is not None
+    assert disk_cache.load(svg_path, 16, 16) is None
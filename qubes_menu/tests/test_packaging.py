@@ -0,0 +1,36 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parents[2]
+SPEC_FILE = ROOT / "rpm_spec" / "qubes-desktop-linux-menu.spec.in"
+
+
+@pytest.mark.parametrize("package", ["qubes_menu", "qubes_menu_settings"])
+def test_spec_lists_package_files(package):
+    spec = SPEC_FILE.read_text(encoding="utf-8")
+    for path in (ROOT / package).iterdir():
+        if path.suffix not in (".py", ".glade", ".css"):
+            continue
+        assert (
+            f"%{{python3_sitelib}}/{package}/{path.name}\n" in spec
+        ), f"{package}/{path.name} is missing from the RPM spec"
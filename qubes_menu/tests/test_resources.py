@@ -0,0 +1,89 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from .. import resources
+from ..icon_cache import load_pixbuf
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+
+ROOT = Path(__file__).parents[2]
+
+
+@pytest.fixture
+def no_resources():
+    resources.unregister_resources()
+    yield
+    resources.unregister_resources()
+
+
+def test_files_fallback(no_resources, monkeypatch):
+    monkeypatch.setenv("QUBES_MENU_NO_GRESOURCE", "1")
+    assert not resources.register_resources()
+    assert resources.get_resource_path("qubes_menu", "qubes-menu.glade") is None
+
+    builder = Gtk.Builder()
+    resources.add_ui_file(builder, "qubes_menu", "qubes-menu.glade")
+    assert builder.get_object("main_window")
+    assert resources.load_css("qubes_menu", "qubes-menu-dark.css")
+
+
+@pytest.mark.skipif(
+    not shutil.which("glib-compile-resources"),
+    reason="glib-compile-resources not available",
+)
+def test_resource_bundle(no_resources, tmp_path, monkeypatch):
+    monkeypatch.delenv("QUBES_MENU_NO_GRESOURCE", raising=False)
+    bundle_path = tmp_path / "qubes-menu.gresource"
+    subprocess.run(
+        [
+            "glib-compile-resources",
+            f"--sourcedir={ROOT}",
+            f"--target={bundle_path}",
+            str(ROOT / "qubes_menu" / "qubes-menu.gresource.xml"),
+        ],
+        check=True,
+    )
+    assert resources.register_resources(str(bundle_path))
+    # registered only once
+    assert resources.register_resources()
+
+    assert resources.get_resource_path("qubes_menu", "qubes-menu.glade")
+    assert resources.get_resource_path("qubes_menu", "missing.glade") is None
+
+    builder = Gtk.Builder()
+    resources.add_ui_file(builder, "qubes_menu", "qubes-menu.glade")
+    resources.add_ui_file(builder, "qubes_menu", "qubes-menu-app-page.glade")
+    assert builder.get_object("main_window")
+    assert builder.get_object("app_list")
+    assert resources.load_css("qubes_menu", "qubes-menu-light.css")
+    assert resources.load_css("qubes_menu_settings", "menu_settings.css")
+
+    # menu icons are found in the icon theme, even if not installed
+    icon_theme = Gtk.IconTheme.get_default()
+    assert icon_theme.has_icon("qappmenu-search")
+    assert load_pixbuf(icon_theme, "qappmenu-search", 24, 24).get_width() == 24
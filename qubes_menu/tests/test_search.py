@@ -17,12 +17,31 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
+import time
 from unittest import mock
 
 from ..desktop_file_manager import DesktopFileManager
 from ..vm_manager import VMManager
 from qubesadmin.tests.mock_app import MockDispatcher
-from ..search_page import SearchPage
+from ..search_page import SearchPage, ShowMoreRow
+from ..app_widgets import SearchAppEntry
+from ..usage_store import UsageStore
+from ..state_file import RecentList
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+
+
+def _get_found_entries(search_page):
+    """Show results for current search text and return rows of found apps."""
+    search_page._filter_lists()
+    return [
+        row
+        for row in search_page.app_list.get_children()
+        if isinstance(row, SearchAppEntry)
+    ]
 
 
 def test_search(test_desktop_file_path, test_qapp, test_builder):
@@ -39,103 +58,72 @@ def test_search(test_desktop_file_path, test_qapp, test_builder):
     assert search_page.search_entry.get_sensitive()
 
     # nothing should be visible
-    assert (
-        len(
-            [
-                row
-                for row in search_page.app_list.get_children()
-                if search_page._is_app_fitting(row)
-            ]
-        )
-        == 0
-    )
+    assert len(_get_found_entries(search_page)) == 0
 
     # try to find firefox
     search_page.search_entry.set_text("firefox")
 
-    found_entries = [
-        row
-        for row in search_page.app_list.get_children()
-        if search_page._is_app_fitting(row)
-    ]
+    found_entries = _get_found_entries(search_page)
     assert len(found_entries) == 1
     assert found_entries[0].app_info.app_name == "Firefox"
 
     search_page.search_entry.set_text("")
 
     # nothing should be visible
-    assert (
-        len(
-            [
-                row
-                for row in search_page.app_list.get_children()
-                if search_page._is_app_fitting(row)
-            ]
-        )
-        == 0
-    )
+    assert len(_get_found_entries(search_page)) == 0
 
     # check for no problems with caps
     search_page.search_entry.set_text("xTeRm")
 
-    found_entries = [
-        row
-        for row in search_page.app_list.get_children()
-        if search_page._is_app_fitting(row)
-    ]
+    found_entries = _get_found_entries(search_page)
     assert len(found_entries) == 1
     assert found_entries[0].app_info.app_name == "XTerm"
 
     search_page.search_entry.set_text("")
 
     # nothing should be visible
-    assert (
-        len(
-            [
-                row
-                for row in search_page.app_list.get_children()
-                if search_page._is_app_fitting(row)
-            ]
-        )
-        == 0
-    )
+    assert len(_get_found_entries(search_page)) == 0
 
     # try to use keywords in searching
     search_page.search_entry.set_text("dragons")
 
-    found_entries = [
-        row
-        for row in search_page.app_list.get_children()
-        if search_page._is_app_fitting(row)
-    ]
+    found_entries = _get_found_entries(search_page)
     assert len(found_entries) == 1
     assert found_entries[0].app_info.app_name == "Firefox"
 
     search_page.search_entry.set_text("")
 
     # nothing should be visible
-    assert (
-        len(
-            [
-                row
-                for row in search_page.app_list.get_children()
-                if search_page._is_app_fitting(row)
-            ]
-        )
-        == 0
-    )
+    assert len(_get_found_entries(search_page)) == 0
 
     # find a dom0 app
     search_page.search_entry.set_text("dom0")
 
-    found_entries = [
-        row
-        for row in search_page.app_list.get_children()
-        if search_page._is_app_fitting(row)
-    ]
+    found_entries = _get_found_entries(search_page)
+    assert len(found_entries) == 1
+    assert found_entries[0].app_info.app_name == "Xfce Appearance Settings"
+
+    # generic names, comments, categories and executable names are
+    # searched too
+    search_page.search_entry.set_text("browser")
+
+    found_entries = _get_found_entries(search_page)
+    assert len(found_entries) == 1
+    assert found_entries[0].app_info.app_name == "Firefox"
+
+    search_page.search_entry.set_text("xfce4-appearance")
+
+    found_entries = _get_found_entries(search_page)
     assert len(found_entries) == 1
     assert found_entries[0].app_info.app_name == "Xfce Appearance Settings"
 
+    # matches in those fields rank lower than in app names
+    search_page.search_entry.set_text("terminal")
+
+    found_entries = _get_found_entries(search_page)
+    assert len(found_entries) == 1
+    assert search_page._search_results[found_entries[0].app_info] < 1.0
+
 
 @mock.patch("gi.repository.Gtk.Application")
 def test_recent_searches(
@@ -158,19 +146,18 @@ def test_recent_searches(
     # find a dom0 app
     search_page.search_entry.set_text("dom0")
 
-    for row in search_page.app_list.get_children():
-        if search_page._is_app_fitting(row):
-            with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
-                row.get_toplevel(),
-                "get_application",
-                side_effect=mock_application,
-            ):
-                row.activate()
-                assert mock_run.call_count == 1
-                assert (
-                    mock.call().emit("app-started", "test3.desktop")
-                    in mock_application.mock_calls
-                )
+    for row in _get_found_entries(search_page):
+        with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
+            row.get_toplevel(),
+            "get_application",
+            side_effect=mock_application,
+        ):
+            row.activate()
+            assert mock_run.call_count == 1
+            assert (
+                mock.call().emit("app-started", "test3.desktop")
+                in mock_application.mock_calls
+            )
 
     # we are faking signals here
     search_page.recent_apps_manager.add_new_recent_app(None, "test3.desktop")
@@ -187,37 +174,35 @@ def test_recent_searches(
     search_page.search_entry.set_text("")
     search_page.search_entry.set_text("xTeRm")
 
-    for row in search_page.app_list.get_children():
-        if search_page._is_app_fitting(row):
-            with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
-                row.get_toplevel(),
-                "get_application",
-                side_effect=mock_application,
-            ):
-                row.activate()
-                assert mock_run.call_count == 1
-                assert (
-                    mock.call().emit("app-started", "test1.desktop")
-                    in mock_application.mock_calls
-                )
+    for row in _get_found_entries(search_page):
+        with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
+            row.get_toplevel(),
+            "get_application",
+            side_effect=mock_application,
+        ):
+            row.activate()
+            assert mock_run.call_count == 1
+            assert (
+                mock.call().emit("app-started", "test1.desktop")
+                in mock_application.mock_calls
+            )
 
     search_page.recent_apps_manager.add_new_recent_app(None, "test1.desktop")
     search_page.search_entry.set_text("")
     search_page.search_entry.set_text("dom0")
 
-    for row in search_page.app_list.get_children():
-        if search_page._is_app_fitting(row):
-            with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
-                row.get_toplevel(),
-                "get_application",
-                side_effect=mock_application,
-            ):
-                row.activate()
-                assert mock_run.call_count == 1
-                assert (
-                    mock.call().emit("app-started", "test3.desktop")
-                    in mock_application.mock_calls
-                )
+    for row in _get_found_entries(search_page):
+        with mock.patch("subprocess.Popen") as mock_run, mock.patch.object(
+            row.get_toplevel(),
+            "get_application",
+            side_effect=mock_application,
+        ):
+            row.activate()
+            assert mock_run.call_count == 1
+            assert (
+                mock.call().emit("app-started", "test3.desktop")
+                in mock_application.mock_calls
+            )
 
     search_page.recent_apps_manager.add_new_recent_app(None, "test3.desktop")
 
@@ -248,3 +233,193 @@ def test_recent_searches_max(test_desktop_file_path, test_qapp, test_builder):
     search_page.recent_apps_manager.add_new_recent_app(None, f"test3.desktop")
     search_page.recent_apps_manager.add_new_recent_app(None, f"test1.desktop")
     search_page.recent_apps_manager.add_new_recent_app(None, f"test2.desktop")
+
+    apps = [
+        row.app_info.entry_name
+        for row in search_page.recent_app_list.get_children()
+    ]
+    assert apps == ["test2.desktop"]
+
+
+def test_recent_persisted(
+    test_desktop_file_path, test_qapp, test_builder, tmp_path
+):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    searches_path = tmp_path / "recent_searches.json"
+    apps_path = tmp_path / "recent_apps.json"
+    recent_searches = RecentList(searches_path)
+    recent_searches.add("fire")
+    recent_searches.add("xterm")
+    recent_searches.save()
+    recent_apps = RecentList(apps_path)
+    recent_apps.add("test2.desktop")
+    recent_apps.add("removed.desktop")
+    recent_apps.add("test1.desktop")
+    recent_apps.save()
+
+    # history is restored at startup, skipping unavailable apps
+    search_page = SearchPage(
+        vm_manager,
+        test_builder,
+        desktop_file_manager,
+        recent_searches=RecentList(searches_path),
+        recent_apps=RecentList(apps_path),
+    )
+    texts = [row.search_text for row in search_page.recent_list.get_children()]
+    assert texts == ["xterm", "fire"]
+    apps = [
+        row.app_info.entry_name
+        for row in search_page.recent_app_list.get_children()
+    ]
+    assert apps == ["test1.desktop", "test2.desktop"]
+
+    search_page.recent_search_manager.add_new_recent_search("fire")
+    search_page.recent_apps_manager.add_new_recent_app(None, "test2.desktop")
+    search_page.recent_search_manager.history.flush()
+    search_page.recent_apps_manager.history.flush()
+    assert RecentList(searches_path).get_values() == ["fire", "xterm"]
+    assert RecentList(apps_path).get_values() == [
+        "test2.desktop",
+        "test1.desktop",
+        "removed.desktop",
+    ]
+
+    # disabling recent apps and searches removes stored history
+    search_page.enable_recent(False)
+    assert not searches_path.exists()
+    assert not apps_path.exists()
+    assert not search_page.recent_list.get_children()
+    assert not search_page.recent_app_list.get_children()
+
+
+def test_background_search(test_desktop_file_path, test_qapp, test_builder):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    search_page = SearchPage(vm_manager, test_builder, desktop_file_manager)
+
+    # older searches are abandoned, only results of the last one are shown
+    for text in ["x", "xt", "fire", "firefox"]:
+        search_page.search_entry.set_text(text)
+        search_page._do_search()
+
+    deadline = time.monotonic() + 5
+    while search_page._search_text != "firefox":
+        assert time.monotonic() < deadline, "search results never arrived"
+        Gtk.main_iteration_do(False)
+
+    assert [app_info.app_name for app_info in search_page._search_results] == [
+        "Firefox"
+    ]
+    found_entries = _get_found_entries(search_page)
+    assert len(found_entries) == 1
+    assert found_entries[0].app_info.app_name == "Firefox"
+
+
+def test_background_search_error(
+    test_desktop_file_path, test_qapp, test_builder, caplog
+):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    search_page = SearchPage(vm_manager, test_builder, desktop_file_manager)
+
+    # errors in the search thread are logged, and no results are shown
+    snapshot = mock.Mock()
+    snapshot.search.side_effect = RuntimeError("broken index")
+    with mock.patch("gi.repository.GLib.idle_add") as mock_idle_add:
+        search_page._search_in_background(
+            snapshot, "firefox", search_page._search_generation
+        )
+    assert not mock_idle_add.called
+    assert "broken index" in caplog.text
+
+
+def test_search_results_limit(test_desktop_file_path, test_qapp, test_builder):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    search_page = SearchPage(vm_manager, test_builder, desktop_file_manager)
+    search_page.set_results_limit(1)
+
+    search_page.search_entry.set_text("test")
+
+    found_entries = _get_found_entries(search_page)
+    assert len(found_entries) == 1
+    rows = search_page.app_list.get_children()
+    assert len(rows) == 2
+    show_more_row = rows[-1]
+    assert isinstance(show_more_row, ShowMoreRow)
+    # qubes of all found apps are listed, not only of shown apps
+    assert search_page.filtered_vms == {"test-vm", "test-red"}
+
+    search_page._app_clicked(None, show_more_row)
+
+    # the row of the first result is kept
+    rows = search_page.app_list.get_children()
+    assert len(rows) == 2
+    assert rows[0] is found_entries[0]
+    assert all(isinstance(row, SearchAppEntry) for row in rows)
+
+    # new search starts with the limit again
+    search_page.search_entry.set_text("tes")
+    search_page._do_search()
+    assert search_page._shown_results_limit == 1
+
+
+def test_search_usage_ranking(
+    test_desktop_file_path, test_qapp, test_builder, tmp_path
+):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    usage_store = UsageStore(tmp_path / "usage.json")
+    search_page = SearchPage(
+        vm_manager, test_builder, desktop_file_manager, usage_store
+    )
+
+    # both apps match equally well, the used one should be first
+    search_page.search_entry.set_text("test")
+    for app_name in ["test1.desktop", "test2.desktop"]:
+        usage_store.record_launch(app_name)
+        usage_store.record_launch(app_name)
+        found_entries = _get_found_entries(search_page)
+        assert len(found_entries) == 2
+        assert found_entries[0].app_info.file_path.name == app_name
+        usage_store.clear()
+
+    # usage does not make a worse match better than a good one
+    for _ in range(100):
+        usage_store.record_launch("test1.desktop")
+    test1 = desktop_file_manager.get_app_info_by_name("test1.desktop")
+    test2 = desktop_file_manager.get_app_info_by_name("test2.desktop")
+    ranks = search_page._add_usage_to_ranks({test1: 0.5, test2: 1.0})
+    assert ranks[test2] == 1.0
+    assert 0.5 < ranks[test1] < 1.0
@@ -0,0 +1,264 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from ..search_index import (
+    SearchIndex,
+    PREFIX_MATCH,
+    SUBSTRING_MATCH,
+    FUZZY_MATCH,
+    SearchCancelled,
+    prefix_edit_distance,
+    fold_text,
+)
+
+import pytest
+
+
+def test_search_index():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+    index.add("xterm", ["test", "blue", "xterm"])
+    index.add("settings", ["dom0", "qubes", "settings"])
+
+    assert len(index) == 3
+    assert "xterm" in index
+
+    assert index.search([]) == {}
+    assert index.search(["zzz"]) == {}
+
+    assert index.search(["test"]) == {
+        "firefox": PREFIX_MATCH,
+        "xterm": PREFIX_MATCH,
+    }
+    assert index.search(["term"]) == {"xterm": SUBSTRING_MATCH}
+    # best match of each word counts
+    assert index.search(["r"]) == {
+        "firefox": PREFIX_MATCH,
+        "xterm": SUBSTRING_MATCH,
+    }
+
+    # all words have to match
+    assert index.search(["test", "fox"]) == {
+        "firefox": PREFIX_MATCH * SUBSTRING_MATCH
+    }
+    assert index.search(["test", "qubes"]) == {}
+
+
+def test_search_index_weights():
+    index = SearchIndex()
+    index.add("firefox", {"firefox": 1.0, "web": 0.5, "browser": 0.5})
+    index.add("browser", ["browser"])
+    index.add("settings", {"settings": 1.0, "browser": 0.2, "web": 0.2})
+
+    assert index.search(["browser"]) == {
+        "firefox": PREFIX_MATCH * 0.5,
+        "browser": PREFIX_MATCH,
+        "settings": PREFIX_MATCH * 0.2,
+    }
+    # best weighted match of each word counts
+    assert index.search(["b"]) == {
+        "firefox": PREFIX_MATCH * 0.5,
+        "browser": PREFIX_MATCH,
+        "settings": PREFIX_MATCH * 0.2,
+    }
+    assert index.search(["ings"]) == {"settings": SUBSTRING_MATCH}
+    # narrowed searches rank the same way
+    assert index.search(["web", "browse"]) == {
+        "firefox": PREFIX_MATCH * 0.5 * PREFIX_MATCH * 0.5,
+        "settings": PREFIX_MATCH * 0.2 * PREFIX_MATCH * 0.2,
+    }
+    assert index.search(["web", "browser"]) == {
+        "firefox": PREFIX_MATCH * 0.5 * PREFIX_MATCH * 0.5,
+        "settings": PREFIX_MATCH * 0.2 * PREFIX_MATCH * 0.2,
+    }
+
+    # changed weights are an update
+    version = index.version
+    index.add("firefox", {"firefox": 1.0, "web": 0.5, "browser": 0.5})
+    assert index.version == version
+    index.add("firefox", {"firefox": 1.0, "web": 0.5, "browser": 0.9})
+    assert index.version > version
+    assert index.search(["browser"])["firefox"] == PREFIX_MATCH * 0.9
+
+
+def test_search_index_update():
+    index = SearchIndex()
+    index.add("app", ["test", "red", "firefox"])
+    version = index.version
+
+    # same words do not change the index
+    index.add("app", ["test", "red", "firefox"])
+    assert index.version == version
+
+    index.add("app", ["test", "blue", "firefox"])
+    assert index.version > version
+    assert index.search(["red"]) == {}
+    assert index.search(["blue"]) == {"app": PREFIX_MATCH}
+
+    index.add("other", ["blue"])
+    index.remove("app")
+    assert "app" not in index
+    assert index.search(["fire"]) == {}
+    assert index.search(["blue"]) == {"other": PREFIX_MATCH}
+
+    # removing unknown entries is harmless
+    index.remove("app")
+    index.remove("other")
+    assert len(index) == 0
+    assert index.search(["blue"]) == {}
+
+
+def test_search_index_fuzzy():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+    index.add("thunderbird", ["work", "thunderbird"])
+    index.add("xterm", ["test", "blue", "xterm"])
+
+    assert index.search(["firfox"]) == {}
+
+    version = index.version
+    index.fuzzy = True
+    assert index.version > version
+
+    assert index.search(["firfox"]) == {"firefox": FUZZY_MATCH / 2}
+    assert index.search(["thundrbird"]) == {"thunderbird": FUZZY_MATCH / 2}
+    assert index.search(["xtrm"]) == {"xterm": FUZZY_MATCH / 2}
+    # exact and prefix matches stay ahead of fuzzy ones
+    assert index.search(["test"]) == {
+        "firefox": PREFIX_MATCH,
+        "xterm": PREFIX_MATCH,
+    }
+    # too different or too short
+    assert index.search(["zzzzzz"]) == {}
+    assert index.search(["wx"]) == {}
+
+    # no time to look for fuzzy matches
+    index.fuzzy_time_budget = -1
+    assert index.search(["firefx"]) == {}
+
+    index.remove("firefox")
+    index.fuzzy_time_budget = 1
+    assert index.search(["firfox"]) == {}
+
+
+def test_search_index_fuzzy_budget():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+    index.add("xterm", ["test", "blue", "xterm"])
+    index.fuzzy = True
+
+    # all words of a query share a single deadline
+    with mock.patch.object(
+        index, "_match_fuzzy", wraps=index._match_fuzzy
+    ) as mock_fuzzy:
+        index.search(["firfox", "tesst", "red"])
+    deadlines = {call[0][1] for call in mock_fuzzy.call_args_list}
+    assert mock_fuzzy.call_count == 3
+    assert len(deadlines) == 1
+
+
+def test_search_index_narrowing():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+    index.add("xterm", ["test", "blue", "xterm"])
+    index.add("settings", ["dom0", "qubes", "settings"])
+
+    assert index.search(["t"]) == {
+        "firefox": PREFIX_MATCH,
+        "xterm": PREFIX_MATCH,
+        "settings": SUBSTRING_MATCH,
+    }
+    # narrowed down from results of the previous search
+    assert index.search(["te"]) == {
+        "firefox": PREFIX_MATCH,
+        "xterm": PREFIX_MATCH,
+    }
+    assert index.search(["te", "x"]) == {
+        "firefox": PREFIX_MATCH * SUBSTRING_MATCH,
+        "xterm": PREFIX_MATCH * PREFIX_MATCH,
+    }
+    assert index.search(["te", "xt"]) == {"xterm": PREFIX_MATCH}
+
+    # cached results are the same object
+    result = index.search(["te"])
+    assert index.search(["te"]) is result
+
+    # and are forgotten when the index changes
+    index.add("terminal", ["dom0", "terminal"])
+    assert "terminal" in index.search(["te"])
+    assert index.search(["te", "xt"]) == {"xterm": PREFIX_MATCH}
+    index.remove("xterm")
+    assert index.search(["te", "xt"]) == {}
+
+
+def test_search_index_snapshot():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+
+    snapshot = index.snapshot()
+    assert index.snapshot() is snapshot
+    assert snapshot.search(["fire"]) == {"firefox": PREFIX_MATCH}
+
+    # snapshot does not change with the index
+    index.add("xterm", ["test", "blue", "xterm"])
+    index.remove("firefox")
+    assert snapshot.search(["fire"]) == {"firefox": PREFIX_MATCH}
+    assert snapshot.search(["xterm"]) == {}
+
+    new_snapshot = index.snapshot()
+    assert new_snapshot is not snapshot
+    assert new_snapshot.search(["fire"]) == {}
+    assert new_snapshot.search(["xterm"]) == {"xterm": PREFIX_MATCH}
+
+
+def test_search_index_cancel():
+    index = SearchIndex()
+    index.add("firefox", ["test", "red", "firefox"])
+
+    with pytest.raises(SearchCancelled):
+        index.search(["fire"], is_cancelled=lambda: True)
+
+    # cancelled search was not cached
+    assert index.search(["fire"], is_cancelled=lambda: False) == {
+        "firefox": PREFIX_MATCH
+    }
+
+
+def test_prefix_edit_distance():
+    assert prefix_edit_distance("fire", "firefox", 2) == 0
+    assert prefix_edit_distance("firfox", "firefox", 2) == 1
+    assert prefix_edit_distance("frefx", "firefox", 2) == 2
+    assert prefix_edit_distance("frefx", "firefox", 1) is None
+    assert prefix_edit_distance("xterm", "firefox", 2) is None
+
+
+def test_fold_text():
+    assert fold_text("XTerm") == "xterm"
+    assert fold_text("Paramètres") == "parametres"
+    assert fold_text("Parame\u0301tres") == "parametres"
+    assert fold_text("Übersetzer") == "ubersetzer"
+    assert fold_text("Zażółć gęślą jaźń") == "zazołc gesla jazn"
+    assert fold_text("Straße") == "strasse"
+    # compatibility characters are decomposed
+    assert fold_text("ﬁle") == "file"
+    # folding is idempotent
+    assert fold_text(fold_text("Ǆemal")) == fold_text("Ǆemal") == "dzemal"
+
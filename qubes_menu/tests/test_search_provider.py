@@ -0,0 +1,118 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+from ..desktop_file_manager import DesktopFileManager
+from ..search_provider import SearchProvider
+from ..usage_store import UsageStore
+from ..constants import DISP_TEXT
+
+import gi
+
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
+
+def _get_provider(test_qapp, test_desktop_file_path, tmp_path):
+    with mock.patch.object(
+        DesktopFileManager, "desktop_dirs", [test_desktop_file_path]
+    ):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+    app = mock.Mock()
+    app.desktop_file_manager = desktop_file_manager
+    app.usage_store = UsageStore(tmp_path / "usage.json")
+    return SearchProvider(app)
+
+
+def test_provider_results(test_qapp, test_desktop_file_path, tmp_path):
+    provider = _get_provider(test_qapp, test_desktop_file_path, tmp_path)
+
+    assert provider.get_initial_result_set(["xterm"]) == ["test1.desktop"]
+    assert provider.get_initial_result_set(["TEST", "red"]) == [
+        "test2.desktop"
+    ]
+    assert provider.get_initial_result_set([]) == []
+    assert provider.get_initial_result_set(["nonexistent"]) == []
+
+    # equally good results are ordered by usage
+    provider.app.usage_store.record_launch("test2.desktop")
+    assert provider.get_initial_result_set(["test"])[:2] == [
+        "test2.desktop",
+        "test1.desktop",
+    ]
+
+    assert provider.get_subsearch_result_set(
+        ["test1.desktop"], ["test"]
+    ) == ["test1.desktop"]
+    assert (
+        provider.get_subsearch_result_set(["test1.desktop"], ["firefox"]) == []
+    )
+
+
+def test_provider_not_set_up():
+    app = mock.Mock()
+    app.desktop_file_manager = None
+    app.usage_store = None
+    provider = SearchProvider(app)
+
+    assert provider.get_initial_result_set(["xterm"]) == []
+    assert provider.get_result_metas(["test1.desktop"]) == []
+
+
+def test_provider_metas(test_qapp, test_desktop_file_path, tmp_path):
+    provider = _get_provider(test_qapp, test_desktop_file_path, tmp_path)
+
+    metas = provider.get_result_metas(
+        ["test1.desktop", "unknown.desktop", "test3.desktop"]
+    )
+    assert len(metas) == 2
+    assert metas[0]["id"].unpack() == "test1.desktop"
+    assert metas[0]["name"].unpack() == "XTerm"
+    assert metas[0]["qube"].unpack() == "test-vm"
+    assert metas[0]["description"].unpack() == "test-vm"
+    assert "/tmp/test.png" in metas[0]["gicon"].unpack()
+    assert metas[1]["qube"].unpack() == "dom0"
+
+    # result metas can be sent over D-Bus
+    GLib.Variant("(aa{sv})", (metas,))
+
+    app_info = provider.app.desktop_file_manager.get_app_info_by_name(
+        "test1.desktop"
+    )
+    app_info.disposable = True
+    metas = provider.get_result_metas(["test1.desktop"])
+    assert metas[0]["description"].unpack() == DISP_TEXT + "test-vm"
+
+
+def test_provider_activate(test_qapp, test_desktop_file_path, tmp_path):
+    provider = _get_provider(test_qapp, test_desktop_file_path, tmp_path)
+
+    provider.activate_result("test1.desktop", ["xterm"], 0)
+    provider.app.launch_app.assert_called_once_with(
+        provider.app.desktop_file_manager.get_app_info_by_name(
+            "test1.desktop"
+        )
+    )
+
+    provider.activate_result("unknown.desktop", ["xterm"], 0)
+    assert provider.app.launch_app.call_count == 1
+
+    provider.launch_search(["fire", "fox"], 0)
+    provider.app.show_search.assert_called_once_with("fire fox")
@@ -0,0 +1,199 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+import gc
+import os
+from unittest import mock
+
+from qubesadmin.tests.mock_app import MockDispatcher, MockQube
+
+from ..appmenu import AppMenu
+from ..desktop_file_manager import DesktopFileManager
+from ..constants import FAVORITES_FEATURE
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GObject
+
+# The soak test exercises a complete menu for a long time and checks that it
+# does not keep growing. By default it is only a short smoke check, run with
+# the rest of the tests; for a real soak run, increase the number of rounds
+# and of menu open/hide cycles per round with environment variables.
+ROUNDS = int(os.environ.get("QUBES_MENU_SOAK_ROUNDS", "1"))
+TOGGLES_PER_ROUND = int(os.environ.get("QUBES_MENU_SOAK_TOGGLES", "20"))
+
+# allowed growth between the first measured round and the last one
+GOBJECT_TOLERANCE = 50
+PYOBJECT_TOLERANCE = 5000
+RSS_TOLERANCE = 16 * 1024 * 1024
+
+SEARCHES = ["f", "fi", "fire", "firefox", "xterm", "dom0", "test red", "zzz"]
+
+REWRITTEN_ENTRY = """
+[Desktop Entry]
+Version=1.0
+Type=Application
+Terminal=false
+X-Qubes-VmName=test-vm
+Icon=/tmp/test.png
+Name=test-vm: XTerm {number}
+Categories=System;TerminalEmulator;X-Qubes-VM;
+Exec=qvm-run -q -a --service -- test-vm qubes.StartApp+xterm
+"""
+
+
+def _process_events():
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def _get_rss():
+    """Resident set size in bytes, or None if not available."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _take_sample():
+    gc.collect()
+    objects = gc.get_objects()
+    return {
+        "gobjects": sum(1 for o in objects if isinstance(o, GObject.Object)),
+        "pyobjects": len(objects),
+        "rss": _get_rss(),
+    }
+
+
+def _assert_bounded(samples, key, tolerance):
+    values = [sample[key] for sample in samples]
+    if None in values:
+        return
+    assert values[-1] - min(values) <= tolerance, (
+        f"{key} keeps growing: {values}"
+    )
+
+
+class SoakDriver:
+    """Drives a complete AppMenu through typical user and system actions."""
+
+    def __init__(self, qapp, desktop_file_path):
+        self.qapp = qapp
+        self.desktop_file_path = desktop_file_path
+        self.counter = 0
+
+        with mock.patch.object(
+            DesktopFileManager, "desktop_dirs", [desktop_file_path]
+        ):
+            self.app_menu = AppMenu(qapp, MockDispatcher(qapp))
+            self.app_menu.perform_setup()
+        self.app_menu.initialize_state()
+        self.app_menu.primary = True
+
+        self.search_page = self.app_menu.get_page("search_page")
+        self.favorites_page = self.app_menu.get_page("favorites_page")
+
+    def toggle_menu(self):
+        """Open or hide the menu, like the menu hotkey does."""
+        self.app_menu.do_activate()
+        _process_events()
+
+    def search(self, text):
+        """Type some text into the search bar."""
+        self.search_page.search_entry.set_text(text)
+        self.search_page._do_search()
+
+    def toggle_favorite(self):
+        """Add a favorite and remove it again."""
+        features = self.qapp._qubes["test-red"].features
+
+        features[FAVORITES_FEATURE] = "test2.desktop"
+        self.qapp.update_vm_calls()
+        self.favorites_page._feature_set(
+            "test-red", "domain-feature-set:" + FAVORITES_FEATURE, None
+        )
+
+        del features[FAVORITES_FEATURE]
+        self.qapp.update_vm_calls()
+        self.favorites_page._feature_deleted(
+            "test-red", "domain-feature-delete:" + FAVORITES_FEATURE, None
+        )
+
+    def add_and_remove_qube(self):
+        """Create a new qube and delete it."""
+        self.counter += 1
+        name = f"soak-{self.counter}"
+        self.qapp._qubes[name] = MockQube(name=name, qapp=self.qapp)
+        self.qapp.update_vm_calls()
+        self.qapp.domains.clear_cache()
+        self.app_menu.vm_manager._add_domain(None, "domain-add", vm=name)
+        self.favorites_page._domain_added(None, "domain-add", vm=name)
+
+        del self.qapp._qubes[name]
+        self.qapp.update_vm_calls()
+        self.qapp.domains.clear_cache()
+        self.app_menu.vm_manager._remove_domain(None, "domain-delete", vm=name)
+        self.favorites_page._domain_deleted(None, "domain-delete", vm=name)
+
+    def rewrite_desktop_files(self):
+        """Modify one desktop file and delete and recreate another."""
+        self.counter += 1
+        manager = self.app_menu.desktop_file_manager
+        modified = self.desktop_file_path / "test1.desktop"
+        modified.write_text(REWRITTEN_ENTRY.format(number=self.counter))
+        manager.load_file(modified)
+
+        recreated = self.desktop_file_path / "test2.desktop"
+        contents = recreated.read_bytes()
+        recreated.unlink()
+        manager.remove_file(recreated)
+        recreated.write_bytes(contents)
+        manager.load_file(recreated)
+
+    def run_round(self):
+        """One round of everything the menu goes through during a day."""
+        for i in range(TOGGLES_PER_ROUND):
+            self.toggle_menu()
+            if i % 10 == 0:
+                for text in SEARCHES:
+                    self.search(text)
+                self.app_menu.hide_menu()
+            if i % 20 == 0:
+                self.toggle_favorite()
+                self.add_and_remove_qube()
+                self.rewrite_desktop_files()
+        _process_events()
+
+
+def test_soak(test_desktop_file_path, test_qapp):
+    driver = SoakDriver(test_qapp, test_desktop_file_path)
+
+    # first round fills all caches and lazily created structures
+    driver.run_round()
+
+    samples = [_take_sample()]
+    for _ in range(ROUNDS):
+        driver.run_round()
+        samples.append(_take_sample())
+
+    _assert_bounded(samples, "gobjects", GOBJECT_TOLERANCE)
+    _assert_bounded(samples, "pyobjects", PYOBJECT_TOLERANCE)
+    _assert_bounded(samples, "rss", RSS_TOLERANCE)
@@ -0,0 +1,97 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+import json
+
+from ..state_file import RecentList, get_state_path
+
+
+def test_state_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    assert get_state_path("test.json") == tmp_path / "qubes-appmenu/test.json"
+
+
+def test_recent_list():
+    recent = RecentList()
+    assert len(recent) == 0
+    assert recent.get_values() == []
+
+    recent.add("a")
+    recent.add("b")
+    recent.add("c")
+    assert recent.get_values() == ["c", "b", "a"]
+
+    # adding again moves the value to the top, without duplicates
+    recent.add("a")
+    assert recent.get_values() == ["a", "c", "b"]
+    assert "b" in recent
+
+    assert recent.pop_oldest() == "b"
+    assert "b" not in recent
+    recent.remove("c")
+    recent.remove("unknown")
+    assert recent.get_values() == ["a"]
+
+    # without a path, nothing is saved
+    recent.save()
+    recent.clear()
+    assert len(recent) == 0
+
+
+def test_recent_list_persistence(tmp_path):
+    path = tmp_path / "state" / "recent.json"
+    recent = RecentList(path)
+    recent.add("firefox")
+    recent.add("xterm")
+    assert not path.exists()
+
+    # changes are saved with a delay, unless flushed
+    recent.flush()
+    assert path.exists()
+    assert RecentList(path).get_values() == ["xterm", "firefox"]
+
+    recent.clear()
+    assert not path.exists()
+    assert RecentList(path).get_values() == []
+
+
+def test_old_write_skipped(tmp_path):
+    path = tmp_path / "recent.json"
+    recent = RecentList(path)
+    recent.add("firefox")
+    old_data, old_version = recent._serialize(), recent.version
+    recent.add("xterm")
+    recent.flush()
+
+    # a background write of older data, finishing after the newer one,
+    # does not overwrite it
+    recent._write(old_data, old_version)
+    assert RecentList(path).get_values() == ["xterm", "firefox"]
+
+
+def test_recent_list_incorrect_file(tmp_path):
+    path = tmp_path / "recent.json"
+    path.write_text(json.dumps({"version": 1, "values": ["a", 1]}))
+    assert RecentList(path).get_values() == []
+
+    path.write_text(json.dumps({"version": 1000, "values": ["a"]}))
+    assert RecentList(path).get_values() == []
+
+    path.write_text(json.dumps({"version": 1, "values": ["a", "b"]}))
+    assert RecentList(path).get_values() == ["b", "a"]
@@ -0,0 +1,111 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from unittest import mock
+
+import pytest
+
+from .. import toggle_client
+
+import gi
+
+gi.require_version("Gio", "2.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gio, GLib
+
+
+@mock.patch("qubes_menu.appmenu.main")
+@mock.patch("qubes_menu.toggle_client.send_command_line")
+def test_toggle_running_menu(mock_send, mock_appmenu_main):
+    mock_send.return_value = True
+    with mock.patch("sys.argv", ["qubes-app-menu", "--page", "2"]):
+        assert toggle_client.main() == 0
+    mock_send.assert_called_once_with(["qubes-app-menu", "--page", "2"])
+    mock_appmenu_main.assert_not_called()
+
+
+@mock.patch("qubes_menu.appmenu.main")
+@mock.patch("qubes_menu.toggle_client.send_command_line")
+def test_toggle_start_menu(mock_send, mock_appmenu_main):
+    # menu not running
+    mock_send.return_value = False
+    with mock.patch("sys.argv", ["qubes-app-menu"]):
+        toggle_client.main()
+    mock_appmenu_main.assert_called_once()
+
+    # help is shown by the full application
+    mock_send.reset_mock()
+    mock_appmenu_main.reset_mock()
+    with mock.patch("sys.argv", ["qubes-app-menu", "--help"]):
+        toggle_client.main()
+    mock_send.assert_not_called()
+    mock_appmenu_main.assert_called_once()
+
+
+def test_send_command_line_not_running():
+    connection = mock.Mock()
+    connection.call_sync.side_effect = GLib.Error.new_literal(
+        Gio.DBusError.quark(),
+        "name has no owner",
+        Gio.DBusError.NAME_HAS_NO_OWNER,
+    )
+    with mock.patch.object(Gio, "bus_get_sync", return_value=connection):
+        assert not toggle_client.send_command_line(["qubes-app-menu"])
+
+    connection.call_sync.side_effect = None
+    with mock.patch.object(Gio, "bus_get_sync", return_value=connection):
+        assert toggle_client.send_command_line(["qubes-app-menu", "-k"])
+    parameters = connection.call_sync.call_args[0][4]
+    path, arguments, platform_data = parameters.unpack()
+    assert path == toggle_client.COMMAND_LINE_PATH
+    assert arguments == [b"qubes-app-menu\0"]
+    assert "cwd" in platform_data
+
+
+def test_send_command_line_options():
+    connection = mock.Mock()
+    with mock.patch.object(Gio, "bus_get_sync", return_value=connection):
+        assert toggle_client.send_command_line(
+            ["qubes-app-menu", "--page", "2", "-k"]
+        )
+    parameters = connection.call_sync.call_args[0][4]
+    # the running menu reads main options only from platform data, like
+    # Gio.ApplicationCommandLine.get_options_dict does
+    assert parameters.unpack()[1] == [b"qubes-app-menu\0"]
+    options = parameters.get_child_value(2).lookup_value("options", None)
+    options_dict = GLib.VariantDict.new(options)
+    assert options_dict.end().unpack() == {"page": 2, "keep-visible": True}
+
+    # grouped short options, and options with a value in the same argument
+    assert toggle_client.parse_options(["qubes-app-menu", "-kp1"])[0] == [
+        "qubes-app-menu"
+    ]
+    _, options = toggle_client.parse_options(
+        ["qubes-app-menu", "--page=1", "-b"]
+    )
+    assert {name: value.unpack() for name, value in options.items()} == {
+        "page": 1,
+        "background": True,
+    }
+
+    # invalid options are left to the full application to report
+    with pytest.raises(ValueError):
+        toggle_client.parse_options(["qubes-app-menu", "--page"])
+    with pytest.raises(ValueError):
+        toggle_client.parse_options(["qubes-app-menu", "-p", "first"])
@@ -0,0 +1,120 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+import json
+import time
+from unittest import mock
+
+from ..usage_store import UsageStore, HALF_LIFE, MAX_ENTRIES
+
+
+def test_usage_score(tmp_path):
+    store = UsageStore(tmp_path / "usage.json")
+    assert store.get_score("test1.desktop") == 0
+
+    store.record_launch("test1.desktop", now=1000)
+    store.record_launch("test1.desktop", now=1000)
+    store.record_launch("test2.desktop", now=1000)
+
+    assert store.get_score("test1.desktop", now=1000) == 2
+    assert store.get_score("test2.desktop", now=1000) == 1
+    # scores decay with time
+    assert store.get_score("test1.desktop", now=1000 + HALF_LIFE) == 1
+    # recent use counts more than old use
+    store.record_launch("test2.desktop", now=1000 + HALF_LIFE)
+    assert store.get_scores(now=1000 + HALF_LIFE) == {
+        "test1.desktop": 1,
+        "test2.desktop": 1.5,
+    }
+    assert store.usage["test2.desktop"].count == 2
+
+
+def test_usage_save_load(tmp_path):
+    path = tmp_path / "state" / "usage.json"
+    store = UsageStore(path)
+    now = time.time()
+    store.record_launch("test1.desktop", now=now)
+    assert not path.exists()
+
+    # changes are saved with a delay, unless flushed
+    store.flush()
+    assert path.exists()
+    assert not (tmp_path / "state" / "usage.json.tmp").exists()
+
+    loaded_store = UsageStore(path)
+    assert loaded_store.get_score("test1.desktop", now=now) == 1
+    assert loaded_store.usage["test1.desktop"].last_used == now
+
+    # nothing pending, nothing written
+    path.unlink()
+    loaded_store.flush()
+    assert not path.exists()
+
+
+def test_usage_save_in_background(tmp_path):
+    path = tmp_path / "usage.json"
+    store = UsageStore(path)
+    with mock.patch("threading.Thread") as mock_thread:
+        store.record_launch("test1.desktop")
+        store.record_launch("test2.desktop")
+        # many changes, only one write
+        store._save_in_background()
+        mock_thread.assert_called_once()
+        target = mock_thread.call_args.kwargs["target"]
+        args = mock_thread.call_args.kwargs["args"]
+    target(*args)
+    assert set(UsageStore(path).usage) == {"test1.desktop", "test2.desktop"}
+
+
+def test_usage_incorrect_file(tmp_path):
+    path = tmp_path / "usage.json"
+    path.write_text("not json")
+    assert not UsageStore(path).usage
+
+    path.write_text(json.dumps({"version": 1, "apps": {"test": {}}}))
+    assert not UsageStore(path).usage
+
+
+def test_usage_compact(tmp_path):
+    store = UsageStore(tmp_path / "usage.json")
+    store.record_launch("old.desktop", now=0)
+    for i in range(MAX_ENTRIES + 10):
+        store.record_launch(f"test{i}.desktop", now=100 * HALF_LIFE)
+    store.record_launch("test0.desktop", now=100 * HALF_LIFE)
+
+    store.compact(now=100 * HALF_LIFE)
+    assert len(store.usage) == MAX_ENTRIES
+    assert "old.desktop" not in store.usage
+    assert "test0.desktop" in store.usage
+
+
+def test_usage_clear(tmp_path):
+    path = tmp_path / "usage.json"
+    store = UsageStore(path)
+    store.record_launch("test1.desktop")
+    store.save()
+    old_data = store._serialize()
+
+    store.clear()
+    assert not path.exists()
+    assert not store.usage
+
+    # write started before clearing does not bring the data back
+    store._write(old_data, store.version - 1)
+    assert not path.exists()
@@ -17,12 +17,19 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
-from ..utils import highlight_words
+from ..utils import (
+    highlight_words,
+    highlight_labels,
+    find_highlight_intervals,
+    parse_search,
+    ListItem,
+    update_list_store,
+)
 
 import gi
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk
+from gi.repository import Gtk, Gdk, Gio
 
 
 def test_highlight_words():
@@ -73,3 +80,81 @@ def test_highlight_words():
         label_3.get_label()
         == "A shape with <span>lion</span> body and the head of a man"
     )
+
+
+def test_find_highlight_intervals():
+    text = "A shape with lion body and the head of a man"
+    assert find_highlight_intervals(text, ["sphinx"]) == []
+    assert find_highlight_intervals(text, ["body", "a s"]) == [(0, 3), (18, 22)]
+    # overlapping intervals are merged
+    assert find_highlight_intervals(text, ["on", "lion"]) == [(13, 17)]
+
+    # diacritics and case do not matter, intervals are in original text
+    text = "Paramètres du Bureau"
+    assert find_highlight_intervals(text, ["metre", "bureau"]) == [
+        (4, 9),
+        (14, 20),
+    ]
+    # removed combining characters are highlighted with their base character
+    text = "Parame\u0301tres"
+    assert find_highlight_intervals(text, ["parame"]) == [(0, 7)]
+    text = "Straße"
+    assert find_highlight_intervals(text, ["strasse"]) == [(0, 6)]
+
+
+def test_parse_search():
+    assert parse_search("") == []
+    assert parse_search("Gnome-Terminal  work_vm") == [
+        "gnome",
+        "terminal",
+        "work",
+        "vm",
+    ]
+    assert parse_search("ÜBERSETZER Paramètres") == [
+        "ubersetzer",
+        "parametres",
+    ]
+
+
+def test_highlight_labels():
+    colors = (Gdk.RGBA(1, 1, 0, 1), Gdk.RGBA(0, 0, 0, 1))
+
+    label_1 = Gtk.Label(label="Zażółć gęślą jaźń")
+    label_2 = Gtk.Label(label="sphinx of black quartz, judge my vow")
+
+    highlight_labels([label_1, label_2], ["gęślą"], colors)
+
+    # text is not changed, highlighting uses byte offsets into it
+    assert label_1.get_label() == "Zażółć gęślą jaźń"
+    attributes = label_1.get_attributes().get_attributes()
+    assert len(attributes) == 2
+    for attribute in attributes:
+        assert attribute.start_index == len("Zażółć ".encode())
+        assert attribute.end_index == len("Zażółć gęślą".encode())
+    assert label_2.get_attributes() is None
+
+    # old highlighting is removed
+    highlight_labels([label_1, label_2], ["quartz"], colors)
+    assert label_1.get_attributes() is None
+    assert label_2.get_attributes() is not None
+
+
+def test_update_list_store():
+    store = Gio.ListStore.new(ListItem)
+
+    def get_items():
+        return [store.get_item(i) for i in range(store.get_n_items())]
+
+    update_list_store(store, ["a", "b", "c", "d"])
+    assert [item.value for item in get_items()] == ["a", "b", "c", "d"]
+    old_items = get_items()
+
+    update_list_store(store, ["x", "b", "d", "e"])
+    new_items = get_items()
+    assert [item.value for item in new_items] == ["x", "b", "d", "e"]
+    # items of values that stayed are kept
+    assert new_items[1] is old_items[1]
+    assert new_items[2] is old_items[3]
+
+    update_list_store(store, [])
+    assert not get_items()
@@ -17,10 +17,15 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
+import gc
+from unittest import mock
 
+import pytest
 import qubesadmin
 import qubesadmin.events
-from ..vm_manager import VMManager
+import qubesadmin.exc
+from ..vm_manager import VMManager, VMEntry, DEFAULT_VM_ICON
+from ..app_widgets import VMIcon
 from ..application_page import VMTypeToggle
 from qubesadmin.tests.mock_app import Property
 
@@ -142,3 +147,67 @@ def test_filter(test_qapp):
     assert VMTypeToggle._filter_appvms(entry_dvm_template)
     assert VMTypeToggle._filter_templatevms(entry_dvm_template)
     assert not VMTypeToggle._filter_service(entry_dvm_template)
+
+
+def test_vm_entries_released(test_qapp):
+    dispatcher = qubesadmin.events.EventsDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    entry_test = vm_manager.load_vm_from_name("test-vm")
+    assert entry_test
+
+    kept_icon = VMIcon(entry_test)
+    for _ in range(500):
+        VMIcon(entry_test)
+    gc.collect()
+
+    # only the icon still referenced is left and gets updates
+    assert list(entry_test.entries) == [kept_icon]
+    entry_test.update_entries(update_label=True)
+
+
+def test_vm_entry_lazy(test_qapp):
+    entry = VMEntry(test_qapp.domains["test-vm"])
+
+    with pytest.raises(AttributeError):
+        entry.unexpected_attribute = True
+
+    assert entry.vm_icon_name == "appvm-green"
+
+    test_qapp._qubes["test-vm"].properties["icon"] = Property(
+        "appvm-red", "str", False
+    )
+    test_qapp._qubes["test-vm"].update_calls()
+
+    # cached until invalidated
+    assert entry.vm_icon_name == "appvm-green"
+    entry.invalidate("vm_icon_name")
+    assert entry.vm_icon_name == "appvm-red"
+
+
+def test_vm_entry_qubesd_errors():
+    error = qubesadmin.exc.QubesDaemonCommunicationError("qubesd is gone")
+    vm = mock.Mock()
+    vm.klass = "AppVM"
+    vm.get_power_state.side_effect = error
+    vm.is_networked.side_effect = error
+    vm.features.get.side_effect = error
+    vm.features.check_with_template.side_effect = error
+    type(vm).icon = mock.PropertyMock(side_effect=error)
+    type(vm).template_for_dispvms = mock.PropertyMock(side_effect=error)
+
+    # attributes loaded on first use fall back to defaults
+    entry = VMEntry(vm)
+    assert entry.power_state == "NA"
+    assert entry.vm_icon_name == DEFAULT_VM_ICON
+    assert not entry.has_network
+    assert not entry.is_dispvm_template
+    assert not entry.internal
+    assert not entry.service_vm
+    assert not entry.show_dispvm_template_in_apps
+    assert entry.show_in_apps
+
+    # already known values are not asked for again
+    vm.features.check_with_template.reset_mock()
+    assert VMEntry(vm, internal=True).internal
+    vm.features.check_with_template.assert_not_called()
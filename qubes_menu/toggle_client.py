@@ -0,0 +1,207 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Entry point of qubes-app-menu. If the menu is already running, its command
+line is passed to it over D-Bus, the same way Gtk.Application would do it,
+but using only Gio: importing GTK, qubesadmin etc. takes much longer than
+showing the menu itself. Only if the menu is not running, it is started in
+this process.
+"""
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import gi
+
+gi.require_version("Gio", "2.0")
+gi.require_version("GLib", "2.0")
+from gi.repository import Gio, GLib
+
+from .constants import APP_MENU_BUS_NAME
+
+APP_MENU_PATH = "/" + APP_MENU_BUS_NAME.replace(".", "/")
+# object path of the command line passed to the menu; the menu can use it
+# to print messages, but nothing is printed for options used to show it
+COMMAND_LINE_PATH = "/org/gtk/Application/CommandLine"
+
+# options that have to be handled locally, by full Gtk.Application
+LOCAL_OPTIONS = ("-h", "--help", "--help-all", "--help-gtk")
+
+# main options of the menu (see AppMenu._add_cli_options): long name, short
+# name and GVariant type of the value, "b" for options without a value
+MAIN_OPTIONS = [
+    ("keep-visible", "k", "b"),
+    ("page", "p", "i"),
+    ("background", "b", "b"),
+]
+
+# errors meaning that the menu is not running
+NOT_RUNNING_ERRORS = (
+    Gio.DBusError.SERVICE_UNKNOWN,
+    Gio.DBusError.NAME_HAS_NO_OWNER,
+)
+
+
+def _get_platform_data() -> Dict[str, GLib.Variant]:
+    """Platform data as sent by GApplication: working directory and
+    startup notification id, so that the menu window can get focus."""
+    platform_data = {
+        "cwd": GLib.Variant("ay", os.fsencode(os.getcwd()) + b"\0"),
+    }
+    for variable, key in (
+        ("DESKTOP_STARTUP_ID", "desktop-startup-id"),
+        ("XDG_ACTIVATION_TOKEN", "activation-token"),
+    ):
+        value = os.environ.get(variable)
+        if value:
+            platform_data[key] = GLib.Variant("s", value)
+    return platform_data
+
+
+def _parse_value(value_type: str, value: Optional[str]) -> GLib.Variant:
+    if value is None:
+        raise ValueError("Missing option value")
+    if value_type == "i":
+        return GLib.Variant("i", int(value))
+    return GLib.Variant(value_type, value)
+
+
+def parse_options(
+    arguments: List[str],
+) -> Tuple[List[str], Dict[str, GLib.Variant]]:
+    """
+    Parse main options of the menu, as GApplication does in the launching
+    process: the running menu reads them only from platform data.
+    :param arguments: full command line, with the program name
+    :return: remaining arguments and options, by long name
+    :raises ValueError: if an option value is missing or invalid
+    """
+    long_options = {name: value_type for name, _, value_type in MAIN_OPTIONS}
+    short_options = {
+        short: (name, value_type) for name, short, value_type in MAIN_OPTIONS
+    }
+    remaining = arguments[:1]
+    options: Dict[str, GLib.Variant] = {}
+    args = iter(arguments[1:])
+    for arg in args:
+        if arg == "--":
+            remaining.append(arg)
+            remaining.extend(args)
+            break
+        if arg.startswith("--"):
+            name, has_value, value = arg[2:].partition("=")
+            if name not in long_options:
+                remaining.append(arg)
+                continue
+            value_type = long_options[name]
+            if value_type == "b":
+                if has_value:
+                    raise ValueError(f"Option --{name} takes no value")
+                options[name] = GLib.Variant("b", True)
+            else:
+                if not has_value:
+                    value = next(args, None)
+                options[name] = _parse_value(value_type, value)
+        elif arg.startswith("-") and len(arg) > 1:
+            if arg[1] not in short_options:
+                remaining.append(arg)
+                continue
+            # short options can be grouped, like -kb or -p2
+            for i, short in enumerate(arg[1:], start=2):
+                if short not in short_options:
+                    raise ValueError(f"Unknown option -{short}")
+                name, value_type = short_options[short]
+                if value_type == "b":
+                    options[name] = GLib.Variant("b", True)
+                    continue
+                value = arg[i:] or next(args, None)
+                options[name] = _parse_value(value_type, value)
+                break
+        else:
+            remaining.append(arg)
+    return remaining, options
+
+
+def send_command_line(arguments: List[str]) -> bool:
+    """
+    Pass command line to the running menu.
+    :param arguments: full command line, with the program name
+    :return: False if the menu is not running
+    :raises ValueError: if the command line is invalid
+    """
+    arguments, options = parse_options(arguments)
+    platform_data = _get_platform_data()
+    platform_data["options"] = GLib.Variant("a{sv}", options)
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    try:
+        connection.call_sync(
+            APP_MENU_BUS_NAME,
+            APP_MENU_PATH,
+            "org.gtk.Application",
+            "CommandLine",
+            GLib.Variant(
+                "(oaaya{sv})",
+                (
+                    COMMAND_LINE_PATH,
+                    [os.fsencode(arg) + b"\0" for arg in arguments],
+                    platform_data,
+                ),
+            ),
+            GLib.VariantType.new("(i)"),
+            # do not start the menu through D-Bus activation, it would be
+            # started in the background and not shown
+            Gio.DBusCallFlags.NO_AUTO_START,
+            -1,
+            None,
+        )
+    except GLib.Error as ex:
+        if any(
+            ex.matches(Gio.DBusError.quark(), code)
+            for code in NOT_RUNNING_ERRORS
+        ):
+            return False
+        raise
+    return True
+
+
+def main():
+    """
+    Show or hide the running menu, or start the menu
+    """
+    if not any(arg in LOCAL_OPTIONS for arg in sys.argv[1:]):
+        try:
+            if send_command_line(sys.argv):
+                return 0
+        except GLib.Error as ex:
+            print(
+                f"Cannot pass command line to the menu: {ex.message}",
+                file=sys.stderr,
+            )
+        except ValueError:
+            # invalid command line, reported by the full application
+            pass
+    # pylint: disable=import-outside-toplevel
+    from .appmenu import main as appmenu_main
+
+    return appmenu_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
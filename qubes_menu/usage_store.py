@@ -0,0 +1,155 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2026 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+"""
+Persistent store of application usage (how often and how recently apps were
+started), used to rank search results by frecency.
+"""
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from .state_file import StateFile, get_state_path
+
+# usage score halves after this many seconds without starting the app
+HALF_LIFE = 14 * 24 * 60 * 60
+# apps with a lower score are forgotten on compaction
+MIN_SCORE = 0.01
+# at most this many apps are kept on compaction
+MAX_ENTRIES = 500
+# usage score at which an app gets half of the maximum bonus to its search
+# rank
+USAGE_SCORE_HALF_BONUS = 3.0
+
+T = TypeVar("T")
+
+
+class UsageEntry:
+    """Usage of a single application."""
+
+    def __init__(self, count: int = 0, last_used: float = 0, score: float = 0):
+        self.count = count
+        self.last_used = last_used
+        # score at the time of last use; it decays exponentially since then
+        self.score = score
+
+    def get_score(self, now: float) -> float:
+        """Score decayed to the given time."""
+        age = max(0.0, now - self.last_used)
+        return self.score * 0.5 ** (age / HALF_LIFE)
+
+
+class UsageStore(StateFile):
+    """
+    Launch counts and times of applications, by .desktop file name.
+    Old and rarely used apps are dropped when writing to disk.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        :param path: path of the usage file; if not provided, a file in
+        XDG state directory is used
+        """
+        super().__init__(path or get_state_path("usage.json"))
+        self.usage: Dict[str, UsageEntry] = {}
+        self.load()
+
+    def record_launch(self, app_name: str, now: Optional[float] = None):
+        """Record that an app, by .desktop file name, was started."""
+        now = time.time() if now is None else now
+        entry = self.usage.setdefault(app_name, UsageEntry())
+        entry.score = entry.get_score(now) + 1
+        entry.count += 1
+        entry.last_used = now
+        self._schedule_save()
+
+    def get_score(self, app_name: str, now: Optional[float] = None) -> float:
+        """Frecency score of an app: number of starts, with older starts
+        counting less and less; 0 for unknown apps."""
+        entry = self.usage.get(app_name)
+        if not entry:
+            return 0.0
+        return entry.get_score(time.time() if now is None else now)
+
+    def get_scores(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Frecency scores of all known apps."""
+        now = time.time() if now is None else now
+        return {
+            name: entry.get_score(now) for name, entry in self.usage.items()
+        }
+
+    def add_usage_to_ranks(
+        self, results: Dict[T, float], get_name: Callable[[T], str]
+    ) -> Dict[T, float]:
+        """Rank frequently and recently used apps higher. The usage bonus
+        is always less than double the rank, so that apps matching search
+        text better (for example by a prefix rather than a substring) are
+        still shown first.
+
+        :param results: search ranks of results
+        :param get_name: function returning .desktop file name of a result
+        """
+        scores = self.get_scores()
+        if not scores:
+            return results
+        ranked_results = {}
+        for result, rank in results.items():
+            score = scores.get(get_name(result))
+            if score:
+                rank *= 1 + score / (score + USAGE_SCORE_HALF_BONUS)
+            ranked_results[result] = rank
+        return ranked_results
+
+    def compact(self, now: Optional[float] = None):
+        """Forget apps that were not used for a long time, and keep at most
+        MAX_ENTRIES best scored apps."""
+        scores = self.get_scores(now)
+        names = sorted(
+            (name for name, score in scores.items() if score >= MIN_SCORE),
+            key=scores.get,
+            reverse=True,
+        )[:MAX_ENTRIES]
+        if len(names) != len(self.usage):
+            self.usage = {name: self.usage[name] for name in names}
+            self.version += 1
+
+    def _load_data(self, data: Optional[Dict[str, Any]]):
+        self.usage = {}
+        if data:
+            self.usage = {
+                name: UsageEntry(
+                    int(entry["count"]),
+                    float(entry["last_used"]),
+                    float(entry["score"]),
+                )
+                for name, entry in data["apps"].items()
+            }
+
+    def _dump_data(self) -> Dict[str, Any]:
+        self.compact()
+        return {
+            "apps": {
+                name: {
+                    "count": entry.count,
+                    "last_used": entry.last_used,
+                    "score": entry.score,
+                }
+                for name, entry in self.usage.items()
+            },
+        }
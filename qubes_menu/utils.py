@@ -21,14 +21,39 @@
 Miscellaneous Qubes Menu utility functions.
 """
 
-from typing import List, Optional
+import difflib
+from typing import Any, List, Optional, Tuple
 
 import gi
 
 import qubesadmin.vm
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, GdkPixbuf, GLib
+from gi.repository import Gtk, Gdk, GdkPixbuf, GLib, Gio, GObject, Pango
+
+from .search_index import fold_text
+from .icon_cache import (
+    DiskIconCache,
+    IconCache,
+    IconLoader,
+    get_blank_icon,
+    get_file_mtime,
+    load_pixbuf,
+)
+
+# icons loaded by load_icon and set_icon_async
+icon_cache = IconCache()
+disk_icon_cache = DiskIconCache()
+icon_loader = IconLoader(icon_cache, disk_icon_cache)
+
+
+def _get_icon_size(
+    size: Optional[Gtk.IconSize], pixel_size: Optional[int]
+) -> Tuple[int, int]:
+    if size:
+        _, width, height = Gtk.icon_size_lookup(size)
+        return width, height
+    return pixel_size, pixel_size
 
 
 def load_icon(
@@ -36,32 +61,44 @@ def load_icon(
     size: Optional[Gtk.IconSize] = Gtk.IconSize.LARGE_TOOLBAR,
     pixel_size: Optional[int] = None,
 ):
-    """Load icon from provided name, if available. If not, attempt to treat
-    provided name as a path. If icon not found in any of the above ways,
-    load a blank icon of specified size.
+    """Load icon from provided path or name in icon theme, if available.
+    If icon not found in any of the above ways, load a blank icon of
+    specified size. Icons are cached in memory and
+    SVG icons also on disk (see icon_cache), so returned pixbufs must not
+    be modified.
     Returns GdkPixbuf.Pixbuf
     """
-    if size:
-        _, width, height = Gtk.icon_size_lookup(size)
-    else:
-        width = pixel_size
-        height = pixel_size
-    try:
-        return GdkPixbuf.Pixbuf.new_from_file_at_size(icon_name, width, height)
-    except (GLib.Error, TypeError):
-        try:
-            # icon name is a path
-            image: GdkPixbuf.Pixbuf = Gtk.IconTheme.get_default().load_icon(
-                icon_name, width, Gtk.IconLookupFlags.FORCE_SIZE
-            )
-            return image
-        except (TypeError, GLib.Error):
-            # icon not found in any way
-            pixbuf: GdkPixbuf.Pixbuf = GdkPixbuf.Pixbuf.new(
-                GdkPixbuf.Colorspace.RGB, True, 8, width, height
-            )
-            pixbuf.fill(0x000)
-            return pixbuf
+    width, height = _get_icon_size(size, pixel_size)
+    icon_theme = Gtk.IconTheme.get_default()
+    icon_cache.watch_icon_theme(icon_theme)
+    key = (icon_name, width, height)
+    pixbuf = icon_cache.get(key, icon_name)
+    if pixbuf is not None:
+        return pixbuf
+    mtime = get_file_mtime(icon_name)
+    pixbuf = load_pixbuf(
+        icon_theme, icon_name, width, height, disk_icon_cache
+    )
+    if pixbuf is not None:
+        icon_cache.put(key, pixbuf, mtime)
+        return pixbuf
+    # icon not found in any way; not cached, as it may appear later
+    return get_blank_icon(width, height)
+
+
+def set_icon_async(
+    image: Gtk.Image,
+    icon_name,
+    size: Optional[Gtk.IconSize] = Gtk.IconSize.LARGE_TOOLBAR,
+    pixel_size: Optional[int] = None,
+):
+    """Show icon (as in load_icon) in a Gtk.Image. Icons that are not
+    cached yet are decoded in background, and the image is blank until
+    then."""
+    width, height = _get_icon_size(size, pixel_size)
+    icon_theme = Gtk.IconTheme.get_default()
+    icon_cache.watch_icon_theme(icon_theme)
+    icon_loader.set_icon(image, icon_theme, icon_name, width, height)
 
 
 def show_error(title, text):
@@ -78,9 +115,9 @@ def show_error(title, text):
 
 
 def parse_search(search_text: str) -> List[str]:
-    """Parse search text into separate words"""
+    """Parse search text into separate, folded words (see fold_text)"""
     search_words = (
-        search_text.lower().replace("-", " ").replace("_", " ").split(" ")
+        fold_text(search_text).replace("-", " ").replace("_", " ").split(" ")
     )
     return [w for w in search_words if w]
 
@@ -101,6 +138,59 @@ def text_search(search_word: str, text_words: List[str]):
     return 0
 
 
+def _fold_text_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Fold text like fold_text does; also return, for every character of
+    folded text, index of the character of text it comes from."""
+    if text.isascii():
+        return text.lower(), list(range(len(text)))
+    folded_chars = []
+    offsets = []
+    for i, char in enumerate(text):
+        folded_char = fold_text(char)
+        folded_chars.append(folded_char)
+        offsets.extend([i] * len(folded_char))
+    return "".join(folded_chars), offsets
+
+
+def find_highlight_intervals(
+    text: str, search_words: List[str]
+) -> List[Tuple[int, int]]:
+    """Find (start, end) intervals of text where search words occur,
+    ignoring case and diacritics, sorted and with overlapping intervals
+    merged."""
+    search_text, offsets = _fold_text_with_offsets(text)
+    found_intervals = []
+    for word in search_words:
+        # parsed search words are already folded, and folding them again
+        # is cheap
+        word = fold_text(word)
+        start = search_text.find(word)
+        if start < 0 or not word:
+            continue
+        end = start + len(word)
+        # up to the next character of folded text, so that any removed
+        # diacritics of the last character are highlighted too
+        text_end = offsets[end] if end < len(offsets) else len(text)
+        found_intervals.append(
+            (offsets[start], max(text_end, offsets[end - 1] + 1))
+        )
+
+    if not found_intervals:
+        return []
+
+    found_intervals.sort(key=lambda x: x[0])
+    result_intervals = [found_intervals[0]]
+    for interval in found_intervals[1:]:
+        if interval[0] <= result_intervals[-1][1]:
+            result_intervals[-1] = (
+                result_intervals[-1][0],
+                max(result_intervals[-1][1], interval[1]),
+            )
+        else:
+            result_intervals.append(interval)
+    return result_intervals
+
+
 def highlight_words(
     labels: List[Gtk.Label],
     search_words: List[str],
@@ -125,26 +215,10 @@ def highlight_words(
         text = label.get_text()
         # remove existing highlighting
         label.set_markup(GLib.markup_escape_text(text))
-        search_text = text.lower()
-        found_intervals = []
-        for word in search_words:
-            start = search_text.find(word)
-            if start >= 0:
-                found_intervals.append((start, start + len(word)))
-
-        if not found_intervals:
-            continue
+        result_intervals = find_highlight_intervals(text, search_words)
 
-        found_intervals.sort(key=lambda x: x[0])
-        result_intervals = [found_intervals[0]]
-        for interval in found_intervals[1:]:
-            if interval[0] <= result_intervals[-1][1]:
-                result_intervals[-1] = (
-                    result_intervals[-1][0],
-                    max(result_intervals[-1][1], interval[1]),
-                )
-            else:
-                result_intervals.append(interval)
+        if not result_intervals:
+            continue
 
         markup_list = []
         last_start = 0
@@ -159,6 +233,89 @@ def highlight_words(
         label.set_markup("".join(markup_list))
 
 
+def get_highlight_attributes(
+    text: str,
+    search_words: List[str],
+    hl_colors: Tuple[Gdk.RGBA, Gdk.RGBA],
+) -> Optional[Pango.AttrList]:
+    """Pango attributes highlighting search words in text with provided
+    (background, foreground) colors; None if there is nothing to highlight."""
+    result_intervals = find_highlight_intervals(text, search_words)
+    if not result_intervals:
+        return None
+
+    background, foreground = (
+        [int(c * 65535) for c in (color.red, color.green, color.blue)]
+        for color in hl_colors
+    )
+    attributes = Pango.AttrList()
+    for start, end in result_intervals:
+        # Pango indexes text by bytes of its UTF-8 representation
+        start_index = len(text[:start].encode())
+        end_index = start_index + len(text[start:end].encode())
+        for attribute in (
+            Pango.attr_background_new(*background),
+            Pango.attr_foreground_new(*foreground),
+        ):
+            attribute.start_index = start_index
+            attribute.end_index = end_index
+            attributes.insert(attribute)
+    return attributes
+
+
+def highlight_labels(
+    labels: List[Gtk.Label],
+    search_words: List[str],
+    hl_colors: Optional[Tuple[Gdk.RGBA, Gdk.RGBA]] = None,
+) -> bool:
+    """Highlight provided search_words in the provided labels. Unlike
+    highlight_words, this does not touch label text, and so does not need
+    to escape and parse it as markup.
+    Returns False if highlighting was not possible (yet)."""
+    if not labels:
+        return False
+
+    if not hl_colors:
+        # see highlight_words
+        try:
+            window = labels[0].get_ancestor(Gtk.Window)
+            hl_colors = window.get_application().highlight_colors
+        except AttributeError:
+            return False
+        if not hl_colors:
+            return False
+
+    for label in labels:
+        label.set_attributes(
+            get_highlight_attributes(label.get_text(), search_words, hl_colors)
+        )
+    return True
+
+
+class ListItem(GObject.Object):
+    """Any Python object, wrapped to be stored in a Gio.ListStore."""
+
+    def __init__(self, value: Any):
+        super().__init__()
+        self.value = value
+
+
+def update_list_store(store: Gio.ListStore, values: List[Any]) -> None:
+    """
+    Change contents of a Gio.ListStore of ListItems to given values, with
+    as few changes as possible: a Gtk.ListBox bound to the store creates rows
+    only for new values and keeps rows of values that stayed.
+    """
+    old_values = [
+        store.get_item(i).value for i in range(store.get_n_items())
+    ]
+    matcher = difflib.SequenceMatcher(None, old_values, values, autojunk=False)
+    # from the end, so that positions of the remaining changes stay correct
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag != "equal":
+            store.splice(i1, i2 - i1, [ListItem(v) for v in values[j1:j2]])
+
+
 def get_visible_child(widget: Gtk.Container, reverse=False):
     """
     Get a first (or last, if reverse=True) visible child of provided Container.
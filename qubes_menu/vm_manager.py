@@ -21,22 +21,71 @@
 Helper class that manages all events related to VMs.
 """
 
+import weakref
+
 import qubesadmin.events
 import qubesadmin.exc
 from qubesadmin.vm import QubesVM
-from typing import Optional, Dict, List, Callable
+from typing import Any, Optional, Dict, List, Callable
 
 from . import constants
 
 
+# marker for VMEntry attributes that were not loaded from the VM yet
+_NOT_LOADED = object()
+
+# errors of asking qubesd about a VM; attributes that cannot be loaded get
+# default values instead, as they are loaded from GTK callbacks and widgets
+QUBESD_ERRORS = (
+    qubesadmin.exc.QubesDaemonCommunicationError,
+    qubesadmin.exc.QubesDaemonAccessError,
+    qubesadmin.exc.QubesPropertyAccessError,
+)
+# icon of VMs whose label cannot be loaded
+DEFAULT_VM_ICON = "qappmenu-qube"
+
+
 class VMEntry:
     """
     A helper object containing information about a VM. Attempts to cache as
     much data as possible and update it on events, sending also information
     to all related menu entries to update themselves.
+    Most of the data is only loaded from the VM when first needed, as
+    not all of it is needed for all VMs (e.g. only VMs shown in the Apps tab
+    need to know whether they are networked).
     """
 
-    def __init__(self, vm: QubesVM):
+    __slots__ = (
+        "vm",
+        "vm_name",
+        "vm_klass",
+        "parent_vm",
+        "sort_name",
+        "entries",
+        "_internal",
+        "_servicevm",
+        "_is_dispvm_template",
+        "_has_network",
+        "_vm_icon_name",
+        "_power_state",
+        "_show_dispvm_template_in_apps",
+    )
+
+    # public name -> slot of attributes loaded on first use
+    _LAZY_ATTRIBUTES = {
+        "internal": "_internal",
+        "service_vm": "_servicevm",
+        "is_dispvm_template": "_is_dispvm_template",
+        "has_network": "_has_network",
+        "vm_icon_name": "_vm_icon_name",
+        "power_state": "_power_state",
+        "show_dispvm_template_in_apps": "_show_dispvm_template_in_apps",
+    }
+
+    def __init__(self, vm: QubesVM, internal: Optional[bool] = None):
+        """
+        :param internal: whether the VM is internal, if already known
+        """
         self.vm = vm
         self.vm_name = str(vm)
         self.vm_klass = vm.klass
@@ -51,27 +100,33 @@ class VMEntry:
             # the space here is to assure correct sorting for dispvm children
             self.sort_name = self.vm_name.lower() + " "
 
-        try:
-            self._internal = bool(
-                self.vm.features.check_with_template("internal", False)
-            )
-        except qubesadmin.exc.QubesDaemonAccessError:
-            self._internal = False
-        self._servicevm = bool(self.vm.features.get("servicevm", False))
-        self._is_dispvm_template = getattr(
-            self.vm, "template_for_dispvms", False
-        )
-        self._has_network = (
-            self.vm.is_networked() if vm.klass != "AdminVM" else False
-        )
-        self._vm_icon_name = getattr(
-            self.vm, "icon", getattr(self.vm.label, "icon", None)
-        )
-        self._power_state = self.vm.get_power_state()
-        self.show_dispvm_template_in_apps = bool(
-            vm.features.get("appmenus-dispvm", False)
-        )
-        self.entries: List = []
+        self.invalidate(*self._LAZY_ATTRIBUTES)
+        if internal is not None:
+            self._internal = internal
+        # menu widgets representing this VM; weak, so that widgets removed
+        # from their lists are not kept alive (and updated) forever
+        self.entries: weakref.WeakSet = weakref.WeakSet()
+
+    def invalidate(self, *attributes: str):
+        """
+        Forget cached values of provided attributes (given by their public
+        names, e.g. "has_network"); they will be loaded again from the VM
+        when next needed.
+        """
+        for attribute in attributes:
+            setattr(self, self._LAZY_ATTRIBUTES[attribute], _NOT_LOADED)
+
+    def _load(self, slot: str, loader: Callable[[], Any], default: Any) -> Any:
+        """Value of a lazily loaded attribute, loaded first if needed; if
+        qubesd cannot provide it, default is used."""
+        value = getattr(self, slot)
+        if value is _NOT_LOADED:
+            try:
+                value = loader()
+            except QUBESD_ERRORS:
+                value = default
+            setattr(self, slot, value)
+        return value
 
     def update_entries(
         self,
@@ -87,7 +142,7 @@ class VMEntry:
         :param update_has_network: did networking state change?
         :param update_type: did type change?
         """
-        for entry in self.entries:
+        for entry in list(self.entries):
             entry.update_contents(
                 update_power_state,
                 update_label,
@@ -101,7 +156,7 @@ class VMEntry:
         Property representing VM's current power state; updated based on events,
         not on get_power_state method to avoid slowdowns.
         """
-        return self._power_state
+        return self._load("_power_state", self.vm.get_power_state, "NA")
 
     @power_state.setter
     def power_state(self, new_value):
@@ -113,18 +168,29 @@ class VMEntry:
         """
         Name of VM's icon.
         """
-        return self._vm_icon_name
+        return self._load(
+            "_vm_icon_name",
+            lambda: getattr(
+                self.vm, "icon", getattr(self.vm.label, "icon", None)
+            ),
+            DEFAULT_VM_ICON,
+        )
 
     @vm_icon_name.setter
     def vm_icon_name(self, _new_value):
-        self._vm_icon_name = getattr(self.vm, "icon", self.vm.label.icon)
+        # loaded again from the VM by updated entries
+        self.invalidate("vm_icon_name")
         self.update_entries(update_label=True)
 
     @property
     def has_network(self):
         """Whether VM currently has network (or, to be more precise, if its
         connected to a sensible netvm"""
-        return self._has_network
+        return self._load(
+            "_has_network",
+            lambda: self.vm_klass != "AdminVM" and self.vm.is_networked(),
+            False,
+        )
 
     @has_network.setter
     def has_network(self, new_value):
@@ -134,7 +200,11 @@ class VMEntry:
     @property
     def is_dispvm_template(self):
         """Is the VM a template for disposable VMs"""
-        return self._is_dispvm_template
+        return self._load(
+            "_is_dispvm_template",
+            lambda: getattr(self.vm, "template_for_dispvms", False),
+            False,
+        )
 
     @is_dispvm_template.setter
     def is_dispvm_template(self, new_value):
@@ -144,7 +214,13 @@ class VMEntry:
     @property
     def internal(self):
         """Is the VM internal"""
-        return self._internal
+        return self._load(
+            "_internal",
+            lambda: bool(
+                self.vm.features.check_with_template("internal", False)
+            ),
+            False,
+        )
 
     @internal.setter
     def internal(self, new_value):
@@ -154,24 +230,43 @@ class VMEntry:
     @property
     def service_vm(self):
         """Does the VM provide network"""
-        return self._servicevm
+        return self._load(
+            "_servicevm",
+            lambda: bool(self.vm.features.get("servicevm", False)),
+            False,
+        )
 
     @service_vm.setter
     def service_vm(self, new_value):
         self._servicevm = new_value
         self.update_entries(update_type=True)
 
+    @property
+    def show_dispvm_template_in_apps(self):
+        """Should the disposable template be shown in Apps section even
+        though it is a disposable template"""
+        return self._load(
+            "_show_dispvm_template_in_apps",
+            lambda: bool(self.vm.features.get("appmenus-dispvm", False)),
+            False,
+        )
+
+    @show_dispvm_template_in_apps.setter
+    def show_dispvm_template_in_apps(self, new_value):
+        self._show_dispvm_template_in_apps = new_value
+
     @property
     def show_in_apps(self):
         """Should this qube be shown in the Apps section of the menu?"""
-        if self.internal:
-            return False
-        if self.service_vm:
-            return False
+        # checks that do not need to ask qubesd go first
         if self.vm_klass == "TemplateVM":
             return False
         if self.vm_klass == "AdminVM":
             return False
+        if self.internal:
+            return False
+        if self.service_vm:
+            return False
         if self.is_dispvm_template and not self.show_dispvm_template_in_apps:
             return False
         return True
@@ -233,16 +328,17 @@ class VMManager:
         except KeyError:
             return None
         try:
-            if vm.features.check_with_template("internal", False):
-                return None
+            internal = bool(vm.features.check_with_template("internal", False))
         except qubesadmin.exc.QubesDaemonAccessError:
-            pass
+            internal = False
+        if internal:
+            return None
 
-        return self._add_vm(vm)
+        return self._add_vm(vm, internal)
 
-    def _add_vm(self, vm) -> Optional[VMEntry]:
+    def _add_vm(self, vm, internal: Optional[bool] = None) -> Optional[VMEntry]:
         try:
-            entry = VMEntry(vm)
+            entry = VMEntry(vm, internal)
         except Exception:  # pylint: disable=broad-except
             # a wrapper, to make absolutely sure dispatcher is not crashed
             # by a rogue Exception
@@ -258,13 +354,15 @@ class VMManager:
     def _remove_domain(self, _submitter, _event, vm, **_kwargs):
         vm_entry = self.vms.get(vm)
         if vm_entry:
-            for child in vm_entry.entries:
+            for child in list(vm_entry.entries):
                 try:
-                    child.get_parent().remove(child)
+                    if child.get_parent():
+                        child.get_parent().remove(child)
                 except Exception:  # pylint: disable=broad-except
                     # a wrapper, to make absolutely sure dispatcher is not
                     # crashed by a rogue Exception
                     return
+            vm_entry.entries.clear()
             del self.vms[vm]
 
     def _update_domain_state(self, vm_name, event, **_kwargs):
@@ -291,7 +389,9 @@ class VMManager:
             if event == "property-set:label":
                 vm_entry.vm_icon_name = newvalue
             elif event == "property-set:netvm":
-                vm_entry.has_network = vm_entry.vm.is_networked()
+                # will be loaded again when needed
+                vm_entry.invalidate("has_network")
+                vm_entry.update_entries(update_has_network=True)
             elif event == "property-set:template_for_dispvms":
                 vm_entry.is_dispvm_template = newvalue
         except Exception:  # pylint: disable=broad-except
@@ -329,7 +429,7 @@ class VMManager:
             # it will disable any future event handling
             pass
 
-        for entry in vm_entry.entries:
+        for entry in list(vm_entry.entries):
             # try to fix filtering, if appropriate
             try:
                 entry.get_parent().invalidate_filter()
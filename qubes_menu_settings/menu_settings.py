@@ -24,7 +24,6 @@ Settings for Qubes App Menu.
 import sys
 
 import gi
-import importlib.resources
 
 import qubesadmin
 
@@ -38,7 +37,9 @@ from qubes_menu.constants import (
     SORT_RUNNING_FEATURE,
     POSITION_FEATURE,
     DISABLE_RECENT_FEATURE,
+    FUZZY_SEARCH_FEATURE,
 )
+from qubes_menu.resources import add_ui_file, load_css
 
 MENU_PAGES = {
     "search_page": "Search",
@@ -100,12 +101,7 @@ class AppMenuSettings(Gtk.Application):
         """
         self.builder = Gtk.Builder()
 
-        glade_path = (
-            importlib.resources.files("qubes_menu_settings")
-            / "menu_settings.glade"
-        )
-        with importlib.resources.as_file(glade_path) as path:
-            self.builder.add_from_file(str(path))
+        add_ui_file(self.builder, "qubes_menu_settings", "menu_settings.glade")
 
         self.main_window: Gtk.ApplicationWindow = self.builder.get_object(
             "main_window"
@@ -134,15 +130,12 @@ class AppMenuSettings(Gtk.Application):
         self.show_recent_check: Gtk.CheckButton = self.builder.get_object(
             "show_recent_apps_check"
         )
-        screen = Gdk.Screen.get_default()
-        provider = Gtk.CssProvider()
 
-        css_path = (
-            importlib.resources.files("qubes_menu_settings")
-            / "menu_settings.css"
+        self.fuzzy_search_check: Gtk.CheckButton = self.builder.get_object(
+            "fuzzy_search_check"
         )
-        with importlib.resources.as_file(css_path) as path:
-            provider.load_from_path(str(path))
+        screen = Gdk.Screen.get_default()
+        provider = load_css("qubes_menu_settings", "menu_settings.css")
 
         Gtk.StyleContext.add_provider_for_screen(
             screen, provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
@@ -188,6 +181,9 @@ class AppMenuSettings(Gtk.Application):
         )
         self.show_recent_check.set_active(not disable_recent)
 
+        fuzzy_search = bool(self.vm.features.get(FUZZY_SEARCH_FEATURE, False))
+        self.fuzzy_search_check.set_active(fuzzy_search)
+
     def _quit(self, *_args):
         self.quit()
 
@@ -211,6 +207,15 @@ class AppMenuSettings(Gtk.Application):
             if not old_sort_running:
                 self.vm.features[DISABLE_RECENT_FEATURE] = "1"
 
+        old_fuzzy_search = self.vm.features.get(FUZZY_SEARCH_FEATURE, None)
+
+        if self.fuzzy_search_check.get_active():
+            if not old_fuzzy_search:
+                self.vm.features[FUZZY_SEARCH_FEATURE] = "1"
+        else:
+            if old_fuzzy_search:
+                del self.vm.features[FUZZY_SEARCH_FEATURE]
+
         old_initial_page = self.vm.features.get(
             INITIAL_PAGE_FEATURE, "app_page"
         )
@@ -69,6 +69,7 @@ def test_menu_settings_change():
     )  # the first option is Top Left
     app.sort_running_check.set_active(True)
     app.show_recent_check.set_active(True)
+    app.fuzzy_search_check.set_active(True)
 
     qapp.expected_calls[
         ("dom0", "admin.vm.feature.Set", "menu-sort-running", b"1")
@@ -82,6 +83,9 @@ def test_menu_settings_change():
     qapp.expected_calls[
         ("dom0", "admin.vm.feature.Remove", "menu-disable-recent", None)
     ] = b"0\0"
+    qapp.expected_calls[
+        ("dom0", "admin.vm.feature.Set", "menu-fuzzy-search", b"1")
+    ] = b"0\0"
 
     app._save()
 
@@ -14,16 +14,22 @@ setuptools.setup(
     packages=["qubes_menu", "qubes_menu_settings"],
     entry_points={
         "gui_scripts": [
-            "qubes-app-menu = qubes_menu.appmenu:main",
+            "qubes-app-menu = qubes_menu.toggle_client:main",
+            "qubes-app-menu-launch = qubes_menu.launch_client:main",
             "qubes-appmenu-settings = qubes_menu_settings.menu_settings:main",
         ]
     },
     package_data={
         "qubes_menu": [
             "qubes-menu.glade",
+            "qubes-menu-app-page.glade",
+            "qubes-menu-favorites-page.glade",
+            "qubes-menu-search-page.glade",
+            "qubes-menu-settings-page.glade",
             "qubes-menu-dark.css",
             "qubes-menu-light.css",
             "qubes-menu-base.css",
+            "qubes-menu.gresource",
         ],
         "qubes_menu_settings": ["menu_settings.glade", "menu_settings.css"],
     },